@@ -0,0 +1,215 @@
+"""
+Read-through LRU cache of rows by id, in front of Repository.get / get_many.
+
+Each cached repository (the inventory ones) has a ReadCache of up to
+PERFUM_CRM_CACHE_SIZE rows (default 1024), each kept at most PERFUM_CRM_CACHE_TTL_S
+seconds (default 300), least recently used evicted first. Rows are kept as column
+values, and every hit builds a new instance attached to the caller's session, so
+requests never share an object and can modify what they get as usual.
+
+Invalidation is by id and holds across worker processes. Triggers on the cached
+tables (migration 7) log the id of every updated or deleted row to
+cache_invalidations, in the writing transaction, whatever code made the change
+(repository writes, checkout stock deduction, imports, another process). Each
+process reads the entries it has not seen and drops those rows:
+
+- before the next read after any commit in this process, so it never serves its
+  own writes stale;
+- otherwise at most every PERFUM_CRM_CACHE_CHECK_MS (default 1000), which bounds
+  how long another process's write can go unseen. 0 checks before every read.
+
+Repository writes also drop their rows directly. The log keeps its last 10,000
+entries; a process that falls further behind empties its caches.
+
+A row is cached only if it can be invalidated later. Loads read the last log id
+in the same statement (so the same snapshot) as the rows, and rows from a snapshot
+older than the entries this process has already applied are not stored: an entry
+for them may be among those, and would never be applied again. Neither are rows
+loaded while this process invalidated the cache.
+
+Hits, misses, evictions and entries are in /metrics (perfum_crm_cache_*, with the
+table as the cache label). PERFUM_CRM_CACHE_SIZE=0 turns the cache off.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from sqlalchemy import event, func, inspect, select, text
+from sqlalchemy.orm import Session, make_transient_to_detached
+from sqlalchemy.orm.util import identity_key
+
+from . import metrics
+from .models.inventory_model import CacheInvalidation
+
+CACHE_SIZE = int(os.getenv("PERFUM_CRM_CACHE_SIZE", "1024"))
+CACHE_TTL_S = float(os.getenv("PERFUM_CRM_CACHE_TTL_S", "300"))
+CHECK_INTERVAL_S = float(os.getenv("PERFUM_CRM_CACHE_CHECK_MS", "1000")) / 1000
+
+class ReadCache:
+    """
+    Rows of one table by id: {id: (expiry, column values)} in least recently used order.
+    """
+
+    def __init__(self, model, size: int = CACHE_SIZE, ttl_s: float = CACHE_TTL_S):
+        self.model = model
+        self.name = model.__tablename__
+        self.size = size
+        self.ttl_s = ttl_s
+        self._columns = [attribute.key for attribute in inspect(model).column_attrs]
+        self._rows: "OrderedDict[int, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Bumped by every invalidation; a load that spans one is not stored
+        self.generation = 0
+        _CACHES[self.name] = self
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+    def lookup(self, db: Session, ids: Sequence[int]) -> Dict[int, Any]:
+        """
+        Instances of the cached rows among `ids`, attached to `db`. Counts a hit or a
+        miss per distinct id.
+        """
+        sync(db)
+        now = time.monotonic()
+        values = {}
+        with self._lock:
+            for item_id in dict.fromkeys(ids):
+                entry = self._rows.get(item_id)
+                if entry is None:
+                    continue
+                if entry[0] < now:
+                    del self._rows[item_id]
+                    continue
+                self._rows.move_to_end(item_id)
+                values[item_id] = entry[1]
+        misses = len(set(ids)) - len(values)
+        if values:
+            metrics.cache_hit(self.name, len(values))
+        if misses:
+            metrics.cache_miss(self.name, misses)
+        return {item_id: self._attach(db, row) for item_id, row in values.items()}
+
+    def _attach(self, db: Session, values: dict):
+        # The session's own copy wins: it may hold changes not flushed yet
+        existing = db.identity_map.get(identity_key(self.model, values["id"]))
+        if existing is not None:
+            return existing
+        instance = self.model(**values)
+        make_transient_to_detached(instance)  # As if just loaded, with no pending changes
+        return db.merge(instance, load=False)
+
+    def store(self, generation: int, log_position: int, rows: Iterable[Any]) -> None:
+        """
+        Cache loaded rows, unless the cache was invalidated since `generation` was read
+        or the rows were read at a `log_position` (see log_position()) this process has
+        already applied entries past.
+        """
+        entries = [(row.id, {column: getattr(row, column) for column in self._columns}) for row in rows]
+        if not entries:
+            return
+        expiry = time.monotonic() + self.ttl_s
+        evicted = 0
+        with self._lock:
+            if generation != self.generation or log_position < (_last_seen or 0):
+                return
+            for item_id, values in entries:
+                self._rows[item_id] = (expiry, values)
+                self._rows.move_to_end(item_id)
+            while len(self._rows) > self.size:
+                self._rows.popitem(last=False)
+                evicted += 1
+        if evicted:
+            metrics.cache_evicted(self.name, evicted)
+
+    def invalidate(self, ids: Iterable[int]) -> None:
+        with self._lock:
+            self.generation += 1
+            for item_id in ids:
+                self._rows.pop(item_id, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self.generation += 1
+            self._rows.clear()
+
+def log_position():
+    """
+    The last cache_invalidations id, as a column to select with the rows being loaded
+    so both come from the same snapshot.
+    """
+    return select(func.coalesce(func.max(CacheInvalidation.id), 0)).scalar_subquery()
+
+# table name -> its cache, for dispatching log entries
+_CACHES: Dict[str, ReadCache] = {}
+
+_sync_lock = threading.Lock()
+_last_seen: Optional[int] = None  # Last cache_invalidations id applied
+_next_check = 0.0
+_committed = False  # A session of this process committed since the last check
+
+@event.listens_for(Session, "after_commit")
+def _note_commit(session) -> None:
+    global _committed
+    _committed = True
+
+def sync(db: Session) -> None:
+    """
+    Apply the cache_invalidations entries not seen yet, if a commit happened in this
+    process or the check interval has passed.
+    """
+    global _last_seen, _next_check, _committed
+    if not _committed and time.monotonic() < _next_check:
+        return
+    with _sync_lock:
+        now = time.monotonic()
+        if not _committed and now < _next_check:
+            return  # Another thread just checked
+        _committed = False
+        _next_check = now + CHECK_INTERVAL_S
+        if _last_seen is None:
+            # Caches start empty, so earlier entries do not matter
+            _last_seen = db.scalar(text("SELECT coalesce(max(id), 0) FROM cache_invalidations"))
+            return
+        entries: List[tuple] = db.execute(
+            text("SELECT id, table_name, item_id FROM cache_invalidations WHERE id > :last ORDER BY id"),
+            {"last": _last_seen}
+        ).all()
+        if not entries:
+            return
+        gap = entries[0][0] != _last_seen + 1
+        # Moved before the rows are dropped, so a load from an older snapshot that is
+        # stored meanwhile is either refused (see ReadCache.store) or dropped here
+        _last_seen = entries[-1][0]
+        if gap:
+            # Entries we never read were pruned: any row may be stale
+            for cache in _CACHES.values():
+                cache.clear()
+        else:
+            changed: Dict[str, set] = {}
+            for _, table, item_id in entries:
+                changed.setdefault(table, set()).add(item_id)
+            for table, ids in changed.items():
+                if table in _CACHES:
+                    _CACHES[table].invalidate(ids)
+
+def reset() -> None:
+    """
+    Empty every cache and forget the log position, as in a new process. For a process
+    that moves to another database (the tests).
+    """
+    global _last_seen, _next_check, _committed
+    with _sync_lock:
+        for cache in _CACHES.values():
+            cache.clear()
+        _last_seen = None
+        _next_check = 0.0
+        _committed = False
+
+def _entries() -> List[str]:
+    return [f'perfum_crm_cache_entries{{cache="{name}"}} {len(cache)}' for name, cache in sorted(_CACHES.items())]
+
+metrics.SCRAPE_GAUGES["perfum_crm_cache_entries"] = ("Rows held in the read caches.", _entries)
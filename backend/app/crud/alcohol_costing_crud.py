@@ -0,0 +1,151 @@
+import logging
+import os
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+from typing import Optional
+from ..models import inventory_model
+
+logger = logging.getLogger(__name__)
+
+# Alcohol batch costing
+#
+# Every Alcohol row is a purchase batch with its own cost_per_ml and remaining volume.
+# Perfumes consume the oldest batches first. Each alcohol type (Alcohol.name) has one
+# AlcoholCostState row with running totals, the moving weighted-average cost and the
+# cost of the next batch in FIFO order. Purchases and consumption update it in place,
+# so the current cost of an alcohol is one row lookup, never a scan over its batches.
+#
+# PERFUM_CRM_ALCOHOL_COSTING selects which cost sales are charged: "average" (moving
+# weighted average, the default) or "fifo" (cost of the batches actually consumed).
+
+ALCOHOL_COSTING_MODES = ("average", "fifo")
+ALCOHOL_COSTING_MODE = os.getenv("PERFUM_CRM_ALCOHOL_COSTING", "average").lower()
+if ALCOHOL_COSTING_MODE not in ALCOHOL_COSTING_MODES:
+    raise ValueError(
+        f"Unknown PERFUM_CRM_ALCOHOL_COSTING '{ALCOHOL_COSTING_MODE}', expected one of: {', '.join(ALCOHOL_COSTING_MODES)}"
+    )
+
+def current_cost_per_ml(state: inventory_model.AlcoholCostState) -> float:
+    """
+    Cost per ml charged for the next consumption of this alcohol type.
+    """
+    return state.fifo_cost_per_ml if ALCOHOL_COSTING_MODE == "fifo" else state.average_cost_per_ml
+
+def _get_or_create_state(db: Session, name: str) -> inventory_model.AlcoholCostState:
+    state = db.query(inventory_model.AlcoholCostState).filter(inventory_model.AlcoholCostState.name == name).first()
+    if state is None:
+        state = inventory_model.AlcoholCostState(
+            name=name, remaining_volume_ml=0.0, remaining_value=0.0,
+            average_cost_per_ml=0.0, fifo_batch_id=None, fifo_cost_per_ml=0.0
+        )
+        db.add(state)
+    return state
+
+def _next_fifo_batch(db: Session, name: str) -> Optional[inventory_model.Alcohol]:
+    return db.query(inventory_model.Alcohol).filter(
+        inventory_model.Alcohol.name == name,
+        inventory_model.Alcohol.remaining_volume_ml > 0
+    ).order_by(inventory_model.Alcohol.purchase_date, inventory_model.Alcohol.id).first()
+
+def _move_fifo_pointer(db: Session, state: inventory_model.AlcoholCostState) -> None:
+    fifo_batch = _next_fifo_batch(db, state.name)
+    state.fifo_batch_id = fifo_batch.id if fifo_batch else None
+    state.fifo_cost_per_ml = fifo_batch.cost_per_ml if fifo_batch else 0.0
+
+def record_purchase(db: Session, batch: inventory_model.Alcohol) -> None:
+    """
+    Add a new batch (already flushed) to its alcohol type's running totals, without committing.
+    """
+    state = _get_or_create_state(db, batch.name)
+    volume = batch.remaining_volume_ml or 0.0
+    state.remaining_volume_ml += volume
+    state.remaining_value += volume * batch.cost_per_ml
+    if state.remaining_volume_ml > 0:
+        state.average_cost_per_ml = state.remaining_value / state.remaining_volume_ml
+    _move_fifo_pointer(db, state)  # A backdated purchase can become the oldest batch with volume left
+
+def consume(db: Session, name: str, volume_ml: float) -> float:
+    """
+    Take `volume_ml` out of an alcohol type's batches, oldest first, without committing.
+    Returns the cost of the consumed volume in the configured costing mode. Volume beyond
+    what the batches hold is logged and not charged, since alcohol stock is counted
+    less strictly than fragrances and bottles.
+    """
+    state = _get_or_create_state(db, name)
+    remaining = volume_ml
+    fifo_cost = 0.0
+    while remaining > 1e-9:
+        batch = _next_fifo_batch(db, name)
+        if batch is None:
+            logger.warning("Not enough %s in stock: %.2f ml consumed without a batch", name, remaining)
+            break
+        taken = min(batch.remaining_volume_ml, remaining)
+        batch.remaining_volume_ml -= taken
+        fifo_cost += taken * batch.cost_per_ml
+        remaining -= taken
+        db.flush()  # So the next lookup sees this batch's new remaining volume
+
+    consumed = volume_ml - remaining
+    cost = fifo_cost if ALCOHOL_COSTING_MODE == "fifo" else consumed * state.average_cost_per_ml
+    state.remaining_volume_ml = max(state.remaining_volume_ml - consumed, 0.0)
+    state.remaining_value = max(state.remaining_value - cost, 0.0) if state.remaining_volume_ml > 0 else 0.0
+    if state.remaining_volume_ml > 0:
+        # Unchanged in average mode; in FIFO mode, the average of what is left
+        state.average_cost_per_ml = state.remaining_value / state.remaining_volume_ml
+    _move_fifo_pointer(db, state)
+    return cost
+
+def rebuild_state(db: Session, name: str) -> None:
+    """
+    Recompute an alcohol type's totals from its batches, without committing. Used when a
+    batch is edited or deleted, which incremental updates cannot express. The remaining
+    volume is valued at each batch's own cost.
+    """
+    Alcohol = inventory_model.Alcohol
+    volume, value = db.query(
+        func.coalesce(func.sum(Alcohol.remaining_volume_ml), 0.0),
+        func.coalesce(func.sum(Alcohol.remaining_volume_ml * Alcohol.cost_per_ml), 0.0)
+    ).filter(Alcohol.name == name).one()
+    state = _get_or_create_state(db, name)
+    state.remaining_volume_ml = volume
+    state.remaining_value = value
+    if volume > 0:
+        state.average_cost_per_ml = value / volume
+    _move_fifo_pointer(db, state)
+
+def rebuild_all_states(db: Session) -> int:
+    """
+    Recompute the totals of every alcohol type, without committing. Returns the number of types.
+    """
+    names = [name for (name,) in db.query(inventory_model.Alcohol.name).distinct()]
+    for name in names:
+        rebuild_state(db, name)
+    return len(names)
+
+def get_default_state(db: Session) -> Optional[inventory_model.AlcoholCostState]:
+    """
+    The alcohol perfumes are made with: the type with the most volume in stock.
+    """
+    return db.query(inventory_model.AlcoholCostState).order_by(
+        inventory_model.AlcoholCostState.remaining_volume_ml.desc(),
+        inventory_model.AlcoholCostState.id
+    ).first()
+
+def get_states(db: Session) -> list:
+    """
+    Cost state of every alcohol type, with the cost sales are currently charged.
+    """
+    states = db.query(inventory_model.AlcoholCostState).order_by(inventory_model.AlcoholCostState.name).all()
+    return [
+        {
+            "name": state.name,
+            "remaining_volume_ml": state.remaining_volume_ml,
+            "remaining_value": state.remaining_value,
+            "average_cost_per_ml": state.average_cost_per_ml,
+            "fifo_batch_id": state.fifo_batch_id,
+            "fifo_cost_per_ml": state.fifo_cost_per_ml,
+            "costing_mode": ALCOHOL_COSTING_MODE,
+            "current_cost_per_ml": current_cost_per_ml(state),
+        }
+        for state in states
+    ]
@@ -0,0 +1,124 @@
+import csv
+import hashlib
+import logging
+from itertools import islice
+from sqlalchemy.orm import Session
+from typing import Iterator, List, Optional
+from ..models import inventory_model
+from ..pagination import Keyset
+from . import costing_crud, inventory_bulk_crud
+
+logger = logging.getLogger(__name__)
+
+# Supplier catalogue import
+#
+# A catalogue is a CSV file whose header row names fields of the kind's create schema
+# (FragranceCreate, BottleCreate or AdditiveCreate); other columns are ignored and
+# empty cells count as not sent. The file is read row by row and upserted in chunks
+# through inventory_bulk_crud, so memory is bounded by the chunk size. Each chunk, its
+# rejected rows and the job's progress are committed together: when an import is
+# interrupted, running it again with the same file picks up after the last committed
+# chunk. A key repeated across chunks updates the item again (the last row wins).
+
+IMPORT_KINDS = ("fragrance", "bottle", "additive")
+DEFAULT_CHUNK_ROWS = 500
+
+REJECTED_ROW_KEYSET = Keyset(inventory_model.ImportRejectedRow.id)
+
+def file_sha256(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as catalogue:
+        for block in iter(lambda: catalogue.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _chunks(rows: Iterator[dict], size: int) -> Iterator[List[dict]]:
+    while True:
+        chunk = list(islice(rows, size))
+        if not chunk:
+            return
+        yield chunk
+
+def _clean_row(row: dict) -> dict:
+    """
+    CSV row -> schema input: header names trimmed, empty cells dropped.
+    """
+    return {
+        name.strip(): value.strip() for name, value in row.items()
+        if name is not None and isinstance(value, str) and value.strip() != ""
+    }
+
+def _get_or_start_job(db: Session, kind: str, sha256: str, filename: Optional[str], chunk_size: int) -> inventory_model.ImportJob:
+    """
+    The unfinished job of this file if there is one (to resume it), otherwise a new job.
+    """
+    ImportJob = inventory_model.ImportJob
+    job = db.query(ImportJob).filter(
+        ImportJob.kind == kind, ImportJob.file_sha256 == sha256, ImportJob.status != "completed"
+    ).order_by(ImportJob.id.desc()).first()
+    if job is None:
+        job = ImportJob(kind=kind, filename=filename, file_sha256=sha256, chunk_size=chunk_size,
+                        status="running", rows_processed=0, created_count=0, updated_count=0, rejected_count=0)
+        db.add(job)
+    else:
+        logger.info("Resuming import %s of %s after row %s", job.id, job.filename, job.rows_processed)
+        job.chunk_size = chunk_size
+        job.status = "running"
+        job.error = None
+    db.commit()
+    return job
+
+def import_catalogue(db: Session, kind: str, path: str, chunk_size: int = DEFAULT_CHUNK_ROWS,
+                     filename: Optional[str] = None) -> inventory_model.ImportJob:
+    """
+    Import the CSV catalogue at `path`, committing every `chunk_size` rows. Rejected rows
+    are recorded on the job and never stop it. An error that does stop it (unreadable
+    CSV, database failure) marks the job "failed"; running the import again with the
+    same file resumes it. Returns the job.
+    """
+    if kind not in IMPORT_KINDS:
+        raise ValueError(f"Unknown catalogue kind '{kind}', expected one of: {', '.join(IMPORT_KINDS)}")
+    if not 1 <= chunk_size <= inventory_bulk_crud.MAX_BULK_ROWS:
+        raise ValueError(f"chunk_size must be between 1 and {inventory_bulk_crud.MAX_BULK_ROWS}")
+
+    job = _get_or_start_job(db, kind, file_sha256(path), filename, chunk_size)
+    try:
+        with open(path, newline="", encoding="utf-8-sig") as catalogue:
+            rows = islice(csv.DictReader(catalogue), job.rows_processed, None)
+            for chunk in _chunks(rows, chunk_size):
+                first_row = job.rows_processed + 1
+                results = inventory_bulk_crud.upsert_rows(db, kind, [_clean_row(row) for row in chunk], first_row)
+                rejected = [result for result in results if result["status"] == "error"]
+                db.bulk_insert_mappings(inventory_model.ImportRejectedRow, [
+                    {"job_id": job.id, "row_number": first_row + result["index"], "key": result["key"], "error": result["error"]}
+                    for result in rejected
+                ])
+                job.rows_processed += len(chunk)
+                job.created_count += sum(result["status"] == "created" for result in results)
+                job.updated_count += sum(result["status"] == "updated" for result in results)
+                job.rejected_count += len(rejected)
+                db.commit()
+                costing_crud.invalidate_cost_tables()
+    except Exception as e:
+        db.rollback()
+        logger.exception("Import %s stopped after row %s", job.id, job.rows_processed)
+        job.status = "failed"
+        job.error = str(e) or type(e).__name__
+        db.commit()
+        return job
+
+    job.status = "completed"
+    db.commit()
+    db.refresh(job)
+    return job
+
+def get_job(db: Session, job_id: int) -> Optional[inventory_model.ImportJob]:
+    return db.query(inventory_model.ImportJob).filter(inventory_model.ImportJob.id == job_id).first()
+
+def get_rejected_rows(db: Session, job_id: int, skip: int = 0, limit: int = 100,
+                      cursor: Optional[list] = None) -> List[inventory_model.ImportRejectedRow]:
+    """
+    Rejected rows of an import, in file order.
+    """
+    query = db.query(inventory_model.ImportRejectedRow).filter(inventory_model.ImportRejectedRow.job_id == job_id)
+    return REJECTED_ROW_KEYSET.paginate(query, skip, limit, cursor)
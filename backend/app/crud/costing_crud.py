@@ -0,0 +1,240 @@
+import threading
+import numpy as np
+from sqlalchemy.orm import Session
+from typing import Dict, List, Optional, Sequence
+from .. import metrics
+from ..models import inventory_model, sales_model
+from . import alcohol_costing_crud
+
+# Recipe cost engine
+#
+# A perfume's cost is its fragrance grams at the fragrance's cost_per_g, the additive
+# drops of the recipe at their per-drop cost, the alcohol that fills the rest of the
+# bottle at the current cost of the alcohol in stock (see alcohol_costing_crud), and
+# the bottle itself. Ingredient costs are loaded once into NumPy arrays (cached
+# in-process like the recipe price matrix and dropped on every inventory or recipe
+# write), so the full recipes x fragrances cost matrix and the costs of all lines of a
+# sale are computed in one vectorized pass.
+
+DROPS_PER_ML = 20.0  # Standard dropper
+FRAGRANCE_G_PER_ML = 1.0  # Perfume oils are close enough to water density for costing
+
+# Recipe drop column -> Additive.type it is dosed from
+RECIPE_DROP_ADDITIVES = {
+    "fijador_drops": "Fixative",
+    "potencializador_drops": "Enhancer",
+    "concentrado_drops": "Concentrate",
+}
+PHEROMONE_ADDITIVE_TYPE = "Pheromone"
+
+def additive_cost_per_drop(additive: inventory_model.Additive) -> Optional[float]:
+    """
+    Cost of one drop of an additive. Recipes dose additives in drops, so one application
+    is one drop; without an estimate the cost is derived from the purchase unit instead.
+    """
+    if additive.cost_per_application_estimate is not None:
+        return additive.cost_per_application_estimate
+    if additive.purchase_unit_cost and additive.purchase_unit_volume_ml:
+        return additive.purchase_unit_cost / (additive.purchase_unit_volume_ml * DROPS_PER_ML)
+    return None
+
+def alcohol_volume_ml(size_ml, fragrance_grams, drops) -> np.ndarray:
+    """
+    Alcohol that tops up a recipe to its size: what the fragrance and additive drops
+    (N x 3 in RECIPE_DROP_ADDITIVES order) leave of the bottle. Works on arrays.
+    """
+    drops = np.asarray(drops, dtype=np.float64).reshape(-1, len(RECIPE_DROP_ADDITIVES))
+    return np.maximum(
+        np.asarray(size_ml, dtype=np.float64)
+        - np.asarray(fragrance_grams, dtype=np.float64) / FRAGRANCE_G_PER_ML
+        - drops.sum(axis=1) / DROPS_PER_ML,
+        0.0
+    )
+
+def id_positions(ids: np.ndarray, values: np.ndarray) -> np.ndarray:
+    """
+    Positions of `values` in the sorted `ids` array; values that are not there
+    (including -1 for "none") map to len(ids), the sentinel slot of each cost array.
+    """
+    if len(ids) == 0:
+        return np.zeros(len(values), dtype=np.intp)
+    positions = np.minimum(np.searchsorted(ids, values), len(ids) - 1)
+    return np.where(ids[positions] == values, positions, len(ids))
+
+def id_array(values: Sequence[Optional[int]]) -> np.ndarray:
+    """
+    Ids as an int64 array, with None as -1.
+    """
+    return np.array([-1 if value is None else value for value in values], dtype=np.int64)
+
+class CostTables:
+    """
+    Ingredient costs as arrays sorted by id. Every per-item array has one extra
+    sentinel slot at the end, used for lines whose item is missing or unknown.
+    """
+
+    def __init__(self, recipes: List[tuple], fragrances: List[tuple], bottles: List[tuple],
+                 drop_costs: Dict[str, float], pheromone_cost: float, alcohol_cost_per_ml: float,
+                 unit_costs: Dict[str, Dict[int, float]]):
+        self.drop_costs = np.array([drop_costs.get(column, 0.0) for column in RECIPE_DROP_ADDITIVES])
+        self.pheromone_cost = pheromone_cost
+        self.alcohol_cost_per_ml = alcohol_cost_per_ml
+        self.unit_costs = unit_costs  # Finished products, humidifiers and essences: {kind: {id: cost}}
+
+        recipe_array = np.array(recipes, dtype=np.float64).reshape(-1, 6)
+        self.recipe_ids = recipe_array[:, 0].astype(np.int64)
+        # Unknown recipe: no recipe ingredients at all
+        self.recipe_grams = np.append(recipe_array[:, 2], 0.0)
+        self.recipe_base_costs = np.append(
+            self.base_costs(recipe_array[:, 1], recipe_array[:, 2], recipe_array[:, 3:6]), 0.0
+        )
+
+        self.fragrance_ids = np.array([row[0] for row in fragrances], dtype=np.int64)
+        fragrance_costs = np.array([row[1] for row in fragrances], dtype=np.float64)
+        # Unknown fragrance: priced at the average fragrance
+        self.fragrance_costs = np.append(fragrance_costs, fragrance_costs.mean() if len(fragrance_costs) else 0.0)
+
+        self.bottle_ids = np.array([row[0] for row in bottles], dtype=np.int64)
+        self.bottle_costs = np.append(np.array([row[1] for row in bottles], dtype=np.float64), 0.0)
+
+        # Unit cost of every recipe made with every fragrance, bottle excluded (R+1 x F+1)
+        self.recipe_fragrance_costs = (
+            self.recipe_base_costs[:, None] + np.outer(self.recipe_grams, self.fragrance_costs)
+        )
+
+    def base_costs(self, size_ml: np.ndarray, fragrance_grams: np.ndarray, drops: np.ndarray) -> np.ndarray:
+        """
+        Per-unit cost of additives and alcohol for recipes given as arrays
+        (drops is N x 3 in RECIPE_DROP_ADDITIVES order).
+        """
+        drops = np.asarray(drops, dtype=np.float64).reshape(-1, len(RECIPE_DROP_ADDITIVES))
+        return drops @ self.drop_costs + alcohol_volume_ml(size_ml, fragrance_grams, drops) * self.alcohol_cost_per_ml
+
+    def perfume_unit_costs(self, recipe_ids: Sequence[Optional[int]], fragrance_ids: Sequence[Optional[int]],
+                           bottle_ids: Sequence[Optional[int]], extra_grams: Sequence[float],
+                           has_pheromones: Sequence[bool]) -> np.ndarray:
+        """
+        Per-unit cost of perfume lines, all lines at once.
+        """
+        recipes = id_positions(self.recipe_ids, id_array(recipe_ids))
+        fragrances = id_positions(self.fragrance_ids, id_array(fragrance_ids))
+        bottles = id_positions(self.bottle_ids, id_array(bottle_ids))
+        return (
+            self.recipe_fragrance_costs[recipes, fragrances]
+            + np.asarray(extra_grams, dtype=np.float64) * self.fragrance_costs[fragrances]
+            + self.bottle_costs[bottles]
+            + np.asarray(has_pheromones, dtype=bool) * self.pheromone_cost
+        )
+
+def load_cost_tables(db: Session) -> CostTables:
+    """
+    Load every ingredient cost with one query per table.
+    """
+    Recipe = sales_model.Recipe
+    recipes = db.query(
+        Recipe.id, Recipe.size_ml, Recipe.fragrance_grams,
+        *(getattr(Recipe, column) for column in RECIPE_DROP_ADDITIVES)
+    ).order_by(Recipe.id).all()
+    fragrances = db.query(inventory_model.Fragrance.id, inventory_model.Fragrance.cost_per_g).order_by(inventory_model.Fragrance.id).all()
+    bottles = db.query(inventory_model.Bottle.id, inventory_model.Bottle.cost_per_unit).order_by(inventory_model.Bottle.id).all()
+
+    # Average per-drop cost of the additives of each type
+    per_type: Dict[str, List[float]] = {}
+    for additive in db.query(inventory_model.Additive).all():
+        cost = additive_cost_per_drop(additive)
+        if additive.type and cost is not None:
+            per_type.setdefault(additive.type.lower(), []).append(cost)
+    average = {additive_type: sum(costs) / len(costs) for additive_type, costs in per_type.items()}
+    drop_costs = {column: average.get(additive_type.lower(), 0.0) for column, additive_type in RECIPE_DROP_ADDITIVES.items()}
+
+    alcohol = alcohol_costing_crud.get_default_state(db)
+
+    unit_costs = {
+        "finished_product": dict(db.query(inventory_model.FinishedProduct.id, inventory_model.FinishedProduct.cost_price).all()),
+        "humidifier": dict(db.query(inventory_model.Humidifier.id, inventory_model.Humidifier.cost_per_unit).all()),
+        "humidifier_essence": dict(db.query(inventory_model.HumidifierEssence.id, inventory_model.HumidifierEssence.cost_per_bottle).all()),
+    }
+    return CostTables(
+        recipes=[tuple(row) for row in recipes],
+        fragrances=fragrances,
+        bottles=bottles,
+        drop_costs=drop_costs,
+        pheromone_cost=average.get(PHEROMONE_ADDITIVE_TYPE.lower(), 0.0),
+        alcohol_cost_per_ml=alcohol_costing_crud.current_cost_per_ml(alcohol) if alcohol else 0.0,
+        unit_costs=unit_costs,
+    )
+
+_cost_tables_lock = threading.Lock()
+_cost_tables: Optional[CostTables] = None
+_cost_tables_version = 0
+
+def invalidate_cost_tables() -> None:
+    """
+    Drop the cached cost tables. Called after every committed inventory or recipe write.
+    """
+    global _cost_tables, _cost_tables_version
+    with _cost_tables_lock:
+        _cost_tables = None
+        _cost_tables_version += 1
+
+def get_cost_tables(db: Session) -> CostTables:
+    """
+    Return the cached cost tables, loading them if needed.
+    """
+    global _cost_tables
+    tables = _cost_tables
+    if tables is not None:
+        metrics.cache_hit("cost_tables")
+        return tables
+
+    metrics.cache_miss("cost_tables")
+    version = _cost_tables_version
+    tables = load_cost_tables(db)
+    with _cost_tables_lock:
+        if version == _cost_tables_version:
+            _cost_tables = tables
+    return tables
+
+def recipe_estimated_cost(db: Session, recipe: sales_model.Recipe) -> float:
+    """
+    Per-unit cost of a recipe made with an average fragrance, bottle excluded.
+    """
+    tables = get_cost_tables(db)
+    drops = [[getattr(recipe, column) for column in RECIPE_DROP_ADDITIVES]]
+    cost = tables.base_costs([recipe.size_ml], [recipe.fragrance_grams], drops)[0] + recipe.fragrance_grams * tables.fragrance_costs[-1]
+    return round(float(cost), 2)
+
+def stamp_item_costs(db: Session, sale_items: List[sales_model.SaleItem]) -> None:
+    """
+    Set item_cost (cost of the whole line) and profit_margin (line total minus cost)
+    on new sale items. Perfume lines are costed together in one vectorized pass.
+    """
+    tables = get_cost_tables(db)
+    perfumes = [item for item in sale_items if item.product_type == "perfume"]
+    if perfumes:
+        unit_costs = tables.perfume_unit_costs(
+            [item.recipe_id for item in perfumes],
+            [item.fragrance_id for item in perfumes],
+            [item.bottle_id for item in perfumes],
+            [item.extra_fragrance_grams or 0.0 for item in perfumes],
+            [bool(item.has_pheromones) for item in perfumes],
+        )
+        for item, unit_cost in zip(perfumes, unit_costs.tolist()):
+            item.item_cost = round(unit_cost * item.quantity, 2)
+
+    # Everything else is sold as stocked, at its unit cost
+    unit_cost_ids = (
+        ("finished_product", "finished_product_id"),
+        ("humidifier", "humidifier_id"),
+        ("humidifier_essence", "humidifier_essence_id"),
+    )
+    for item in sale_items:
+        if item.product_type != "perfume":
+            kind, item_id = next(
+                ((kind, getattr(item, column)) for kind, column in unit_cost_ids if getattr(item, column) is not None),
+                (None, None)
+            )
+            # Lines with no stocked item to cost them from (individual items) cost nothing
+            unit_cost = tables.unit_costs[kind].get(item_id, 0.0) if kind is not None else 0.0
+            item.item_cost = round(unit_cost * item.quantity, 2)
+        item.profit_margin = round(item.line_total - item.item_cost, 2)
@@ -0,0 +1,170 @@
+from typing import Any, Dict, List, Optional, Tuple
+from pydantic import BaseModel, ValidationError
+from sqlalchemy import func, select
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session
+from ..models import inventory_model
+from ..schemas import inventory_schema
+from . import alcohol_costing_crud, costing_crud, inventory_ledger_crud
+
+# Bulk upserts
+#
+# Supplier catalogues arrive as thousands of items at once. Every row is validated on
+# its own, matched to the existing items by its natural key with one SELECT per chunk,
+# and written with multi-row INSERT ... ON CONFLICT (key) DO UPDATE statements. Stock
+# changes go to the ledger in one bulk INSERT and the whole batch is committed once,
+# so an import costs a handful of statements instead of four round trips per item.
+
+MAX_BULK_ROWS = 10_000
+CHUNK_ROWS = 500  # Rows per statement, well under SQLite's bound parameter limit
+
+# kind -> (model, create schema, natural key column). Alcohol rows are purchase
+# batches whose name repeats, so they have no natural key and are always inserted.
+BULK_KINDS = {
+    "fragrance": (inventory_model.Fragrance, inventory_schema.FragranceCreate, "internal_name"),
+    "bottle": (inventory_model.Bottle, inventory_schema.BottleCreate, "name"),
+    "alcohol": (inventory_model.Alcohol, inventory_schema.AlcoholCreate, None),
+    "additive": (inventory_model.Additive, inventory_schema.AdditiveCreate, "name"),
+    "humidifier": (inventory_model.Humidifier, inventory_schema.HumidifierCreate, "name"),
+    "humidifier_essence": (inventory_model.HumidifierEssence, inventory_schema.HumidifierEssenceCreate, "name"),
+    "finished_product": (inventory_model.FinishedProduct, inventory_schema.FinishedProductCreate, "name"),
+}
+
+def _chunks(items: list, size: int = CHUNK_ROWS):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+def _validation_message(error: ValidationError) -> str:
+    return "; ".join(
+        f"{'.'.join(str(part) for part in detail['loc']) or 'row'}: {detail['msg']}" for detail in error.errors()
+    )
+
+def _validate_rows(schema, key: Optional[str], rows: List[Any], first_row: int = 0) -> Tuple[List[dict], List[Tuple[int, BaseModel]]]:
+    """
+    Validate every row against the create schema. Returns the per-row results (errors
+    filled in) and the valid rows as (index, item). A natural key repeated in the batch
+    is an error on every occurrence after the first, which the error names by its row
+    number counted from `first_row`.
+    """
+    results = []
+    valid = []
+    seen: Dict[str, int] = {}
+    for index, row in enumerate(rows):
+        raw_key = row.get(key) if key is not None and isinstance(row, dict) else None
+        result = {"index": index, "status": "error", "id": None, "key": raw_key if isinstance(raw_key, str) else None, "error": None}
+        results.append(result)
+        try:
+            item = schema.model_validate(row)
+        except ValidationError as e:
+            result["error"] = _validation_message(e)
+            continue
+        if key is not None:
+            value = getattr(item, key)
+            result["key"] = value
+            if value in seen:
+                result["error"] = f"Duplicate {key} '{value}' (first in row {first_row + seen[value]})"
+                continue
+            seen[value] = index
+        valid.append((index, item))
+    return results, valid
+
+def _summary(results: List[dict]) -> dict:
+    counts = {"created": 0, "updated": 0, "error": 0}
+    for result in results:
+        counts[result["status"]] += 1
+    return {"created": counts["created"], "updated": counts["updated"], "errors": counts["error"], "results": results}
+
+def _upsert(db: Session, kind: str, results: List[dict], valid: List[Tuple[int, BaseModel]]) -> None:
+    model, _, key = BULK_KINDS[kind]
+    table = model.__table__
+    key_column = table.c[key]
+    stock_name = inventory_ledger_crud.STOCK_COLUMNS[kind][1] if kind in inventory_ledger_crud.STOCK_COLUMNS else None
+
+    # Existing items by key, with their stock before the import
+    existing: Dict[str, Optional[float]] = {}
+    stock_column = table.c[stock_name] if stock_name else None
+    for chunk in _chunks([getattr(item, key) for _, item in valid]):
+        columns = [key_column, stock_column] if stock_column is not None else [key_column]
+        for row in db.execute(select(*columns).where(key_column.in_(chunk))):
+            existing[row[0]] = row[1] if stock_column is not None else None
+
+    # Existing items only get the fields each row actually sent, so a catalogue without
+    # stock columns never resets stock. Rows sending the same fields share statements.
+    groups: Dict[Tuple[str, ...], List[Tuple[int, BaseModel]]] = {}
+    for index, item in valid:
+        fields = tuple(sorted(item.model_fields_set - {key}))
+        groups.setdefault(fields, []).append((index, item))
+
+    ids: Dict[str, int] = {}
+    for fields, group in groups.items():
+        for chunk in _chunks(group):
+            statement = sqlite_insert(table).values([item.model_dump() for _, item in chunk])
+            statement = statement.on_conflict_do_update(
+                index_elements=[key_column],
+                set_={**{name: statement.excluded[name] for name in fields}, "updated_at": func.now()}
+            ).returning(key_column, table.c.id)
+            ids.update(dict(db.execute(statement).all()))
+
+    movements = []
+    for index, item in valid:
+        value = getattr(item, key)
+        result = results[index]
+        result["id"] = ids[value]
+        result["status"] = "updated" if value in existing else "created"
+        if stock_name is None:
+            continue
+        previous = existing.get(value) or 0
+        current = getattr(item, stock_name) if (value not in existing or stock_name in item.model_fields_set) else previous
+        if current - previous:
+            movements.append({
+                "item_type": kind, "item_id": result["id"], "movement_type": "adjustment",
+                "quantity": current - previous, "notes": "Bulk import" if value in existing else "Opening stock",
+            })
+    inventory_ledger_crud.record_movements(db, movements)
+
+def _insert_alcohols(db: Session, results: List[dict], valid: List[Tuple[int, BaseModel]]) -> None:
+    table = inventory_model.Alcohol.__table__
+    for chunk in _chunks(valid):
+        values = []
+        for _, item in chunk:
+            row = item.model_dump()
+            row["cost_per_ml"] = item.purchase_unit_cost / item.purchase_unit_volume_ml if item.purchase_unit_volume_ml > 0 else 0
+            row["remaining_volume_ml"] = item.purchase_unit_volume_ml # A new batch is full
+            values.append(row)
+        # SQLite returns RETURNING rows in no set order, but one INSERT assigns
+        # consecutive rowids in VALUES order, so sorted ids line up with the rows
+        new_ids = sorted(db.execute(table.insert().values(values).returning(table.c.id)).scalars().all())
+        for (index, _), new_id in zip(chunk, new_ids):
+            results[index].update(status="created", id=new_id)
+    for name in {item.name for _, item in valid}:
+        alcohol_costing_crud.rebuild_state(db, name)
+
+def upsert_rows(db: Session, kind: str, rows: List[Any], first_row: int = 0) -> List[dict]:
+    """
+    Validate and write rows of one inventory kind, without committing. Returns one
+    result per row, in order. Used by bulk_upsert and by chunked catalogue imports,
+    which pass the file row number of the chunk's first row as `first_row`.
+    """
+    _, schema, key = BULK_KINDS[kind]
+    results, valid = _validate_rows(schema, key, rows, first_row)
+    if valid:
+        if key is None:
+            _insert_alcohols(db, results, valid)
+        else:
+            _upsert(db, kind, results, valid)
+    return results
+
+def bulk_upsert(db: Session, kind: str, rows: List[Any]) -> dict:
+    """
+    Create or update many items of one inventory kind, committing once. Rows are
+    matched on the natural key (internal_name for fragrances, name otherwise); alcohol
+    batches are always created. Invalid rows are reported and skipped, never fatal.
+    Returns {created, updated, errors, results} with one result per row, in order.
+    """
+    if len(rows) > MAX_BULK_ROWS:
+        raise ValueError(f"At most {MAX_BULK_ROWS} rows per bulk request")
+    results = upsert_rows(db, kind, rows)
+    if any(result["status"] != "error" for result in results):
+        db.commit()
+        costing_crud.invalidate_cost_tables()
+    return _summary(results)
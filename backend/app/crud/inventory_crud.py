@@ -1,342 +1,273 @@
+from sqlalchemy import case, insert, literal, select
 from sqlalchemy.orm import Session
-from typing import List, Optional # Added for type hinting
+from typing import Any, List, Optional, Sequence
+from pydantic import BaseModel
 from ..models import inventory_model # Import your SQLAlchemy models
 from ..schemas import inventory_schema # Import your Pydantic schemas
+from ..pagination import Keyset
+from ..repository import Repository
+from . import alcohol_costing_crud, costing_crud, inventory_ledger_crud
+
+# Inventory CRUD
+#
+# Every inventory resource is a Repository (app/repository.py): single and batch reads
+# and writes, each one statement with RETURNING. Stocked resources also write the
+# ledger, and alcohol batches keep their type's cost state. Committed writes drop the
+# cached cost tables. Reads by id go through the read cache (app/cache.py). The
+# functions at the end (create_fragrance, get_bottle, ...) are the per-resource API
+# over the repositories.
+
+class StockRepository(Repository):
+    """
+    A resource with a stock column: the opening stock of new items and stock fields set
+    by updates are recorded as "adjustment" movements in the ledger.
+    """
+
+    def __init__(self, item_type: str, *args, **kwargs):
+        self.item_type = item_type
+        self.stock_column = inventory_ledger_crud.STOCK_COLUMNS[item_type][1]
+        super().__init__(inventory_ledger_crud.STOCK_COLUMNS[item_type][0], *args, **kwargs)
+
+    def _write_insert(self, db: Session, item: BaseModel):
+        row = super()._write_insert(db, item)
+        inventory_ledger_crud.record_stock_change(db, self.item_type, row.id, 0, getattr(row, self.stock_column), "Opening stock")
+        return row
+
+    def _write_update(self, db: Session, ids: Sequence[int], values: dict) -> List[Any]:
+        if values.get(self.stock_column) is not None:
+            # Reads the stock being overwritten, so it runs before the UPDATE
+            inventory_ledger_crud.record_stock_overwrite(db, self.item_type, ids, values[self.stock_column], "Manual stock update")
+        return super()._write_update(db, ids, values)
+
+class AlcoholRepository(Repository):
+    """
+    Alcohol purchases/batches. cost_per_ml is derived from the purchase cost and volume,
+    and every write keeps the running totals of the batch's alcohol type up to date.
+    """
+
+    def _write_insert(self, db: Session, item: BaseModel):
+        values = item.model_dump(exclude_none=True) # Leave purchase_date to its server default if not sent
+        # Calculate cost_per_ml safely
+        values["cost_per_ml"] = item.purchase_unit_cost / item.purchase_unit_volume_ml if item.purchase_unit_volume_ml > 0 else 0
+        values["remaining_volume_ml"] = item.purchase_unit_volume_ml # A new batch is full
+        row = db.scalar(insert(self.model).values(**values).returning(self.model))
+        alcohol_costing_crud.record_purchase(db, row)
+        return row
+
+    def _write_update(self, db: Session, ids: Sequence[int], values: dict) -> List[Any]:
+        Alcohol = self.model
+        values = dict(values)
+        # If purchase_unit_cost or purchase_unit_volume_ml are being updated, recalculate cost_per_ml
+        # in the same UPDATE, from the stored value of whichever one is not being updated
+        if "purchase_unit_cost" in values or "purchase_unit_volume_ml" in values:
+            cost = literal(values["purchase_unit_cost"]) if "purchase_unit_cost" in values else Alcohol.purchase_unit_cost
+            volume = literal(values["purchase_unit_volume_ml"]) if "purchase_unit_volume_ml" in values else Alcohol.purchase_unit_volume_ml
+            values["cost_per_ml"] = case((volume > 0, cost / volume), else_=0) # Avoid division by zero
+        # Only a rename needs the previous names, to recompute the types the batches leave
+        previous_names = set(db.scalars(select(Alcohol.name).where(Alcohol.id.in_(ids)).distinct())) if "name" in values else set()
+        rows = super()._write_update(db, ids, values)
+        # Edited batches change history, so their alcohol types' totals are recomputed
+        for name in previous_names | {row.name for row in rows}:
+            alcohol_costing_crud.rebuild_state(db, name)
+        return rows
+
+    def _write_delete(self, db: Session, ids: Sequence[int]) -> List[Any]:
+        rows = super()._write_delete(db, ids)
+        for name in {row.name for row in rows}:
+            alcohol_costing_crud.rebuild_state(db, name)
+        return rows
+
+ON_CHANGE = (costing_crud.invalidate_cost_tables,)
+
+# List orders each end with the primary key so pages are stable and can be walked with
+# a keyset cursor as well as skip/limit.
+FRAGRANCE_KEYSET = Keyset(inventory_model.Fragrance.id)
+BOTTLE_KEYSET = Keyset(inventory_model.Bottle.id)
+ALCOHOL_KEYSET = Keyset(inventory_model.Alcohol.id, inventory_model.Alcohol.purchase_date, descending=True)
+ADDITIVE_KEYSET = Keyset(inventory_model.Additive.id, inventory_model.Additive.name)
+HUMIDIFIER_KEYSET = Keyset(inventory_model.Humidifier.id, inventory_model.Humidifier.name)
+HUMIDIFIER_ESSENCE_KEYSET = Keyset(inventory_model.HumidifierEssence.id, inventory_model.HumidifierEssence.name)
+FINISHED_PRODUCT_KEYSET = Keyset(inventory_model.FinishedProduct.id, inventory_model.FinishedProduct.name)
+
+fragrances = StockRepository("fragrance", FRAGRANCE_KEYSET, unique_name="internal_name", on_change=ON_CHANGE, cached=True)
+bottles = StockRepository("bottle", BOTTLE_KEYSET, on_change=ON_CHANGE, cached=True)
+alcohols = AlcoholRepository(
+    inventory_model.Alcohol, ALCOHOL_KEYSET,
+    unique_name=None, filters=("name",), on_change=ON_CHANGE, cached=True # name is the alcohol type, repeated across batches
+)
+additives = Repository(inventory_model.Additive, ADDITIVE_KEYSET, filters=("type",), on_change=ON_CHANGE, cached=True)
+humidifiers = StockRepository("humidifier", HUMIDIFIER_KEYSET, on_change=ON_CHANGE, cached=True)
+humidifier_essences = StockRepository("humidifier_essence", HUMIDIFIER_ESSENCE_KEYSET, on_change=ON_CHANGE, cached=True)
+finished_products = StockRepository(
+    "finished_product", FINISHED_PRODUCT_KEYSET, filters=("product_type",), on_change=ON_CHANGE, cached=True
+)
+
+# kind (as in inventory_bulk_crud.BULK_KINDS and the ledger) -> repository
+REPOSITORIES = {
+    "fragrance": fragrances,
+    "bottle": bottles,
+    "alcohol": alcohols,
+    "additive": additives,
+    "humidifier": humidifiers,
+    "humidifier_essence": humidifier_essences,
+    "finished_product": finished_products,
+}
+
+# CRUD functions by resource, over the repositories above
 
 # CRUD operations for Fragrance
 
 def create_fragrance(db: Session, fragrance: inventory_schema.FragranceCreate) -> inventory_model.Fragrance:
     """
-    Create a new fragrance in the database.
+    Create a new fragrance. Raises DuplicateNameError if the internal name is taken.
     """
-    # Create an instance of the SQLAlchemy model from the Pydantic schema data
-    db_fragrance = inventory_model.Fragrance(
-        internal_name=fragrance.internal_name,
-        inspiration_name=fragrance.inspiration_name,
-        house=fragrance.house,
-        description=fragrance.description,
-        supplier_name=fragrance.supplier_name,
-        cost_per_g=fragrance.cost_per_g,
-        stock_g=fragrance.stock_g,
-        min_stock_g=fragrance.min_stock_g
-    ) # Pydantic V2 model_dump() can also be used: inventory_model.Fragrance(**fragrance.model_dump())
-    
-    db.add(db_fragrance)
-    db.commit()
-    db.refresh(db_fragrance)
-    return db_fragrance
+    return fragrances.create(db, fragrance)
 
 def get_fragrance(db: Session, fragrance_id: int) -> inventory_model.Fragrance | None:
-    """
-    Retrieve a single fragrance by its ID.
-    Returns the Fragrance object or None if not found.
-    """
-    return db.query(inventory_model.Fragrance).filter(inventory_model.Fragrance.id == fragrance_id).first()
+    return fragrances.get(db, fragrance_id)
 
-def get_fragrances(db: Session, skip: int = 0, limit: int = 100) -> List[inventory_model.Fragrance]:
-    """
-    Retrieve a list of fragrances with pagination.
-    """
-    return db.query(inventory_model.Fragrance).offset(skip).limit(limit).all()
+def get_fragrances(db: Session, skip: int = 0, limit: int = 100, cursor: Optional[list] = None) -> List[inventory_model.Fragrance]:
+    return fragrances.list(db, skip=skip, limit=limit, cursor=cursor)
 
 def get_fragrance_by_internal_name(db: Session, internal_name: str) -> inventory_model.Fragrance | None:
-    """
-    Retrieve a single fragrance by its internal name.
-    Used to check for duplicates before creation or for other lookup needs.
-    """
-    return db.query(inventory_model.Fragrance).filter(inventory_model.Fragrance.internal_name == internal_name).first()
+    return fragrances.get_by_name(db, internal_name)
 
 def update_fragrance(db: Session, fragrance_id: int, fragrance_update: inventory_schema.FragranceUpdate) -> inventory_model.Fragrance | None:
     """
-    Update an existing fragrance by its ID.
-    Only updates fields that are provided in the fragrance_update schema.
+    Update an existing fragrance by its ID. Only the fields set in fragrance_update are changed.
     """
-    db_fragrance = get_fragrance(db, fragrance_id=fragrance_id) # Re-use existing function to get the fragrance
-    if not db_fragrance:
-        return None
-
-    # Get the update data as a dictionary, excluding unset values to prevent overwriting with None if not provided
-    update_data = fragrance_update.model_dump(exclude_unset=True)
-
-    for key, value in update_data.items():
-        setattr(db_fragrance, key, value) # Set the new values on the SQLAlchemy model instance
-    
-    db.add(db_fragrance) # Mark the instance as dirty (SQLAlchemy often detects changes automatically too)
-    db.commit() # Commit the transaction to the database
-    db.refresh(db_fragrance) # Refresh the instance with data from the database (e.g., updated_at)
-    return db_fragrance
+    return fragrances.update(db, fragrance_id, fragrance_update)
 
 def delete_fragrance(db: Session, fragrance_id: int) -> inventory_model.Fragrance | None:
-    """
-    Delete a fragrance by its ID.
-    Returns the deleted fragrance object (before commit) or None if not found.
-    """
-    db_fragrance = get_fragrance(db, fragrance_id=fragrance_id)
-    if not db_fragrance:
-        return None
-        
-    db.delete(db_fragrance) # Mark for deletion
-    db.commit() # Commit the deletion
-    return db_fragrance # The object still holds data before the session expires or is closed
+    return fragrances.delete(db, fragrance_id)
 
+# CRUD operations for Bottle
 
 def create_bottle(db: Session, bottle: inventory_schema.BottleCreate) -> inventory_model.Bottle:
-    db_bottle = inventory_model.Bottle(**bottle.model_dump())
-    db.add(db_bottle)
-    db.commit()
-    db.refresh(db_bottle)
-    return db_bottle
+    return bottles.create(db, bottle)
 
 def get_bottle(db: Session, bottle_id: int) -> inventory_model.Bottle | None:
-    return db.query(inventory_model.Bottle).filter(inventory_model.Bottle.id == bottle_id).first()
+    return bottles.get(db, bottle_id)
 
-def get_bottles(db: Session, skip: int = 0, limit: int = 100) -> List[inventory_model.Bottle]:
-    return db.query(inventory_model.Bottle).offset(skip).limit(limit).all()
+def get_bottles(db: Session, skip: int = 0, limit: int = 100, cursor: Optional[list] = None) -> List[inventory_model.Bottle]:
+    return bottles.list(db, skip=skip, limit=limit, cursor=cursor)
 
 def get_bottle_by_name(db: Session, name: str) -> inventory_model.Bottle | None:
-    return db.query(inventory_model.Bottle).filter(inventory_model.Bottle.name == name).first()
+    return bottles.get_by_name(db, name)
 
 def update_bottle(db: Session, bottle_id: int, bottle_update: inventory_schema.BottleUpdate) -> inventory_model.Bottle | None:
-    db_bottle = get_bottle(db, bottle_id=bottle_id)
-    if not db_bottle:
-        return None
+    return bottles.update(db, bottle_id, bottle_update)
 
 def delete_bottle(db: Session, bottle_id: int) -> inventory_model.Bottle | None:
-    db_bottle = get_bottle(db, bottle_id=bottle_id)
-    if not db_bottle:
-        return None
-    db.delete(db_bottle)
-    db.commit()
-    return db_bottle
+    return bottles.delete(db, bottle_id)
 
 # CRUD operations for Alcohol (Purchase/Batch Tracking)
 
 def create_alcohol(db: Session, alcohol: inventory_schema.AlcoholCreate) -> inventory_model.Alcohol:
-    """Create a new alcohol purchase/batch record."""
-    
-    db_alcohol_data = alcohol.model_dump(exclude_none=True) # Excluir valores None para no sobrescribir defaults del modelo si no se envían
-
-    # Calculate cost_per_ml safely
-    if alcohol.purchase_unit_volume_ml is not None and alcohol.purchase_unit_volume_ml > 0:
-        calculated_cost_per_ml = alcohol.purchase_unit_cost / alcohol.purchase_unit_volume_ml
-    else:
-        calculated_cost_per_ml = 0  # O None, o levantar un HTTPException si se considera un error de validación
-    
-    db_alcohol_data['cost_per_ml'] = calculated_cost_per_ml
-
-    # Si purchase_date es un string del frontend, Pydantic/FastAPI ya debería haberlo convertido a datetime.
-    # Si aún hay problemas con purchase_date, se necesitaría ver el error exacto de Pydantic.
-
-    db_alcohol = inventory_model.Alcohol(**db_alcohol_data)
-    db.add(db_alcohol)
-    db.commit()
-    db.refresh(db_alcohol)
-    return db_alcohol
+    """
+    Record a new alcohol purchase/batch. cost_per_ml is derived from the purchase cost and volume.
+    """
+    return alcohols.create(db, alcohol)
 
 def get_alcohol(db: Session, alcohol_id: int) -> inventory_model.Alcohol | None:
-    """Retrieve a specific alcohol purchase/batch by its ID."""
-    return db.query(inventory_model.Alcohol).filter(inventory_model.Alcohol.id == alcohol_id).first()
+    return alcohols.get(db, alcohol_id)
 
-def get_alcohols(db: Session, skip: int = 0, limit: int = 100) -> List[inventory_model.Alcohol]:
-    """Retrieve a list of alcohol purchase/batch records with pagination."""
-    return db.query(inventory_model.Alcohol).order_by(inventory_model.Alcohol.purchase_date.desc()).offset(skip).limit(limit).all()
+def get_alcohols(db: Session, skip: int = 0, limit: int = 100, cursor: Optional[list] = None) -> List[inventory_model.Alcohol]:
+    return alcohols.list(db, skip=skip, limit=limit, cursor=cursor)
 
-def get_alcohols_by_name(db: Session, name: str, skip: int = 0, limit: int = 100) -> List[inventory_model.Alcohol]:
-    """Retrieve alcohol purchase/batch records of a specific type/name with pagination."""
-    return db.query(inventory_model.Alcohol).filter(inventory_model.Alcohol.name == name).order_by(inventory_model.Alcohol.purchase_date.desc()).offset(skip).limit(limit).all()
+def get_alcohols_by_name(db: Session, name: str, skip: int = 0, limit: int = 100, cursor: Optional[list] = None) -> List[inventory_model.Alcohol]:
+    """
+    Batches of one alcohol type, newest purchase first.
+    """
+    return alcohols.list(db, skip=skip, limit=limit, cursor=cursor, name=name)
 
 def update_alcohol(db: Session, alcohol_id: int, alcohol_update: inventory_schema.AlcoholUpdate) -> inventory_model.Alcohol | None:
-    """Update an existing alcohol purchase/batch record."""
-    db_alcohol = get_alcohol(db, alcohol_id=alcohol_id)
-    if not db_alcohol:
-        return None
-
-    update_data = alcohol_update.model_dump(exclude_unset=True)
-
-    # If purchase_unit_cost or purchase_unit_volume_ml are being updated, recalculate cost_per_ml
-    new_purchase_cost = update_data.get('purchase_unit_cost', db_alcohol.purchase_unit_cost)
-    new_purchase_volume = update_data.get('purchase_unit_volume_ml', db_alcohol.purchase_unit_volume_ml)
-    
-    if 'purchase_unit_cost' in update_data or 'purchase_unit_volume_ml' in update_data:
-        if new_purchase_volume > 0: # Avoid division by zero
-            update_data['cost_per_ml'] = new_purchase_cost / new_purchase_volume
-        else:
-            # Handle error or set a default/None if volume can be zero post-update
-            update_data['cost_per_ml'] = 0 # Or some other appropriate value/error handling
-    
-    for key, value in update_data.items():
-        setattr(db_alcohol, key, value)
-    
-    db.add(db_alcohol)
-    db.commit()
-    db.refresh(db_alcohol)
-    return db_alcohol
+    """
+    Update an alcohol batch by its ID. cost_per_ml follows the purchase cost and volume.
+    """
+    return alcohols.update(db, alcohol_id, alcohol_update)
 
 def delete_alcohol(db: Session, alcohol_id: int) -> inventory_model.Alcohol | None:
-    """Delete an alcohol purchase/batch record."""
-    db_alcohol = get_alcohol(db, alcohol_id=alcohol_id)
-    if not db_alcohol:
-        return None
-    db.delete(db_alcohol)
-    db.commit()
-    return db_alcohol
+    return alcohols.delete(db, alcohol_id)
 
 # CRUD operations for Additive
 
 def create_additive(db: Session, additive: inventory_schema.AdditiveCreate) -> inventory_model.Additive:
-    db_additive = inventory_model.Additive(**additive.model_dump())
-    db.add(db_additive)
-    db.commit()
-    db.refresh(db_additive)
-    return db_additive
+    return additives.create(db, additive)
 
 def get_additive(db: Session, additive_id: int) -> inventory_model.Additive | None:
-    return db.query(inventory_model.Additive).filter(inventory_model.Additive.id == additive_id).first()
+    return additives.get(db, additive_id)
 
-def get_additives(db: Session, additive_type: Optional[str] = None, skip: int = 0, limit: int = 100) -> List[inventory_model.Additive]: # Added Optional from typing
-    query = db.query(inventory_model.Additive)
-    if additive_type:
-        query = query.filter(inventory_model.Additive.type == additive_type)
-    return query.order_by(inventory_model.Additive.name).offset(skip).limit(limit).all()
+def get_additives(db: Session, additive_type: Optional[str] = None, skip: int = 0, limit: int = 100, cursor: Optional[list] = None) -> List[inventory_model.Additive]:
+    return additives.list(db, skip=skip, limit=limit, cursor=cursor, type=additive_type)
 
 def get_additive_by_name(db: Session, name: str) -> inventory_model.Additive | None:
-    return db.query(inventory_model.Additive).filter(inventory_model.Additive.name == name).first()
+    return additives.get_by_name(db, name)
 
 def update_additive(db: Session, additive_id: int, additive_update: inventory_schema.AdditiveUpdate) -> inventory_model.Additive | None:
-    db_additive = get_additive(db, additive_id=additive_id)
-    if not db_additive:
-        return None
-    update_data = additive_update.model_dump(exclude_unset=True)
-    for key, value in update_data.items():
-        setattr(db_additive, key, value)
-    db.add(db_additive)
-    db.commit()
-    db.refresh(db_additive)
-    return db_additive
+    return additives.update(db, additive_id, additive_update)
 
 def delete_additive(db: Session, additive_id: int) -> inventory_model.Additive | None:
-    db_additive = get_additive(db, additive_id=additive_id)
-    if not db_additive:
-        return None
-    db.delete(db_additive)
-    db.commit()
-    return db_additive
+    return additives.delete(db, additive_id)
 
 # CRUD operations for Humidifier
 
 def create_humidifier(db: Session, humidifier: inventory_schema.HumidifierCreate) -> inventory_model.Humidifier:
-    db_humidifier = inventory_model.Humidifier(**humidifier.model_dump())
-    db.add(db_humidifier)
-    db.commit()
-    db.refresh(db_humidifier)
-    return db_humidifier
+    return humidifiers.create(db, humidifier)
 
 def get_humidifier(db: Session, humidifier_id: int) -> inventory_model.Humidifier | None:
-    return db.query(inventory_model.Humidifier).filter(inventory_model.Humidifier.id == humidifier_id).first()
+    return humidifiers.get(db, humidifier_id)
 
-def get_humidifiers(db: Session, skip: int = 0, limit: int = 100) -> List[inventory_model.Humidifier]:
-    return db.query(inventory_model.Humidifier).order_by(inventory_model.Humidifier.name).offset(skip).limit(limit).all()
+def get_humidifiers(db: Session, skip: int = 0, limit: int = 100, cursor: Optional[list] = None) -> List[inventory_model.Humidifier]:
+    return humidifiers.list(db, skip=skip, limit=limit, cursor=cursor)
 
 def get_humidifier_by_name(db: Session, name: str) -> inventory_model.Humidifier | None:
-    return db.query(inventory_model.Humidifier).filter(inventory_model.Humidifier.name == name).first()
+    return humidifiers.get_by_name(db, name)
 
 def update_humidifier(db: Session, humidifier_id: int, humidifier_update: inventory_schema.HumidifierUpdate) -> inventory_model.Humidifier | None:
-    db_humidifier = get_humidifier(db, humidifier_id=humidifier_id)
-    if not db_humidifier:
-        return None
-    update_data = humidifier_update.model_dump(exclude_unset=True)
-    for key, value in update_data.items():
-        setattr(db_humidifier, key, value)
-    db.add(db_humidifier)
-    db.commit()
-    db.refresh(db_humidifier)
-    return db_humidifier
+    return humidifiers.update(db, humidifier_id, humidifier_update)
 
 def delete_humidifier(db: Session, humidifier_id: int) -> inventory_model.Humidifier | None:
-    db_humidifier = get_humidifier(db, humidifier_id=humidifier_id)
-    if not db_humidifier:
-        return None
-    db.delete(db_humidifier)
-    db.commit()
-    return db_humidifier
+    return humidifiers.delete(db, humidifier_id)
 
 # CRUD operations for HumidifierEssence
 
 def create_humidifier_essence(db: Session, hf_essence: inventory_schema.HumidifierEssenceCreate) -> inventory_model.HumidifierEssence:
-    db_hf_essence = inventory_model.HumidifierEssence(**hf_essence.model_dump())
-    db.add(db_hf_essence)
-    db.commit()
-    db.refresh(db_hf_essence)
-    return db_hf_essence
+    return humidifier_essences.create(db, hf_essence)
 
 def get_humidifier_essence(db: Session, hf_essence_id: int) -> inventory_model.HumidifierEssence | None:
-    return db.query(inventory_model.HumidifierEssence).filter(inventory_model.HumidifierEssence.id == hf_essence_id).first()
+    return humidifier_essences.get(db, hf_essence_id)
 
-def get_humidifier_essences(db: Session, skip: int = 0, limit: int = 100) -> List[inventory_model.HumidifierEssence]:
-    return db.query(inventory_model.HumidifierEssence).order_by(inventory_model.HumidifierEssence.name).offset(skip).limit(limit).all()
+def get_humidifier_essences(db: Session, skip: int = 0, limit: int = 100, cursor: Optional[list] = None) -> List[inventory_model.HumidifierEssence]:
+    return humidifier_essences.list(db, skip=skip, limit=limit, cursor=cursor)
 
 def get_humidifier_essence_by_name(db: Session, name: str) -> inventory_model.HumidifierEssence | None:
-    return db.query(inventory_model.HumidifierEssence).filter(inventory_model.HumidifierEssence.name == name).first()
+    return humidifier_essences.get_by_name(db, name)
 
 def update_humidifier_essence(db: Session, hf_essence_id: int, hf_essence_update: inventory_schema.HumidifierEssenceUpdate) -> inventory_model.HumidifierEssence | None:
-    db_hf_essence = get_humidifier_essence(db, hf_essence_id=hf_essence_id)
-    if not db_hf_essence:
-        return None
-    update_data = hf_essence_update.model_dump(exclude_unset=True)
-    for key, value in update_data.items():
-        setattr(db_hf_essence, key, value)
-    db.add(db_hf_essence)
-    db.commit()
-    db.refresh(db_hf_essence)
-    return db_hf_essence
+    return humidifier_essences.update(db, hf_essence_id, hf_essence_update)
 
 def delete_humidifier_essence(db: Session, hf_essence_id: int) -> inventory_model.HumidifierEssence | None:
-    db_hf_essence = get_humidifier_essence(db, hf_essence_id=hf_essence_id)
-    if not db_hf_essence:
-        return None
-    db.delete(db_hf_essence)
-    db.commit()
-    return db_hf_essence
+    return humidifier_essences.delete(db, hf_essence_id)
 
 # CRUD operations for FinishedProduct
 
 def create_finished_product(db: Session, product: inventory_schema.FinishedProductCreate) -> inventory_model.FinishedProduct:
-    db_product = inventory_model.FinishedProduct(**product.model_dump())
-    db.add(db_product)
-    db.commit()
-    db.refresh(db_product)
-    return db_product
+    return finished_products.create(db, product)
 
 def get_finished_product(db: Session, product_id: int) -> inventory_model.FinishedProduct | None:
-    return db.query(inventory_model.FinishedProduct).filter(inventory_model.FinishedProduct.id == product_id).first()
+    return finished_products.get(db, product_id)
 
-def get_finished_products(db: Session, product_type: Optional[str] = None, skip: int = 0, limit: int = 100) -> List[inventory_model.FinishedProduct]:
-    query = db.query(inventory_model.FinishedProduct)
-    if product_type:
-        query = query.filter(inventory_model.FinishedProduct.product_type == product_type)
-    return query.order_by(inventory_model.FinishedProduct.name).offset(skip).limit(limit).all()
+def get_finished_products(db: Session, product_type: Optional[str] = None, skip: int = 0, limit: int = 100, cursor: Optional[list] = None) -> List[inventory_model.FinishedProduct]:
+    return finished_products.list(db, skip=skip, limit=limit, cursor=cursor, product_type=product_type)
 
 def get_finished_product_by_name(db: Session, name: str) -> inventory_model.FinishedProduct | None:
-    return db.query(inventory_model.FinishedProduct).filter(inventory_model.FinishedProduct.name == name).first()
+    return finished_products.get_by_name(db, name)
 
 def update_finished_product(db: Session, product_id: int, product_update: inventory_schema.FinishedProductUpdate) -> inventory_model.FinishedProduct | None:
-    db_product = get_finished_product(db, product_id=product_id)
-    if not db_product:
-        return None
-    update_data = product_update.model_dump(exclude_unset=True)
-    for key, value in update_data.items():
-        setattr(db_product, key, value)
-    db.add(db_product)
-    db.commit()
-    db.refresh(db_product)
-    return db_product
+    return finished_products.update(db, product_id, product_update)
 
 def delete_finished_product(db: Session, product_id: int) -> inventory_model.FinishedProduct | None:
-    db_product = get_finished_product(db, product_id=product_id)
-    if not db_product:
-        return None
-    db.delete(db_product)
-    db.commit()
-    return db_product
+    return finished_products.delete(db, product_id)
 
 # End of CRUD functions for inventory
@@ -0,0 +1,284 @@
+from datetime import datetime, timezone
+from sqlalchemy import bindparam, func, literal, select
+from sqlalchemy.orm import Session
+from typing import Dict, List, Optional, Sequence
+from ..models import inventory_model
+from ..pagination import Keyset
+
+MOVEMENT_KEYSET = Keyset(inventory_model.InventoryMovement.id, descending=True)
+
+# Inventory deduction
+#
+# A sale consumes stock: recipe plus extra fragrance grams, bottles, and units of
+# finished products, humidifiers and humidifier essences. Stock is decremented with
+# conditional UPDATE ... SET stock = stock - :q WHERE id = :id AND stock >= :q
+# statements, one executemany per inventory kind, inside the sale's transaction.
+# Concurrent checkouts can therefore never oversell, and no row is read first.
+
+# kind -> (model, stock column)
+STOCK_COLUMNS = {
+    "fragrance": (inventory_model.Fragrance, "stock_g"),
+    "bottle": (inventory_model.Bottle, "stock_units"),
+    "finished_product": (inventory_model.FinishedProduct, "stock_units"),
+    "humidifier": (inventory_model.Humidifier, "stock_units"),
+    "humidifier_essence": (inventory_model.HumidifierEssence, "stock_units"),
+}
+
+class OutOfStockError(Exception):
+    """
+    Raised by create_sale when an item does not have enough stock. The sale is rolled back.
+    `shortages` lists {kind, id, name, required, available} for every item that is short.
+    """
+    def __init__(self, shortages: List[dict]):
+        self.shortages = shortages
+        details = ", ".join(
+            f"{shortage['kind']} {shortage['name'] or shortage['id']} (needs {shortage['required']:g}, has {shortage['available']:g})"
+            for shortage in shortages
+        )
+        super().__init__(f"Not enough stock: {details}")
+
+def _find_stock_shortages(db: Session, requirements: Dict[str, Dict[int, float]]) -> List[dict]:
+    """
+    Compare required quantities with the current stock (missing items count as zero).
+    """
+    shortages = []
+    for kind, quantities in requirements.items():
+        model, column_name = STOCK_COLUMNS[kind]
+        name_column = model.internal_name if kind == "fragrance" else model.name
+        current = {
+            item_id: (name, stock) for item_id, name, stock in db.query(
+                model.id, name_column, getattr(model, column_name)
+            ).filter(model.id.in_(quantities))
+        }
+        for item_id, required in quantities.items():
+            name, available = current.get(item_id, (None, 0))
+            if available < required:
+                shortages.append({"kind": kind, "id": item_id, "name": name, "required": required, "available": available})
+    return shortages
+
+def deduct_stock(db: Session, requirements: Dict[str, Dict[int, float]]) -> None:
+    """
+    Atomically take the required quantities ({kind: {item id: quantity}}) out of stock,
+    without committing. Raises OutOfStockError (after rolling back) if anything is short.
+    """
+    for kind, quantities in requirements.items():
+        if not quantities:
+            continue
+        model, column_name = STOCK_COLUMNS[kind]
+        table = model.__table__
+        stock = table.c[column_name]
+        result = db.execute(
+            table.update()
+            .where(table.c.id == bindparam("item_id"), stock >= bindparam("quantity"))
+            .values({column_name: stock - bindparam("quantity")}),
+            [{"item_id": item_id, "quantity": quantity} for item_id, quantity in quantities.items()]
+        )
+        if result.rowcount != len(quantities):
+            db.rollback()
+            raise OutOfStockError(_find_stock_shortages(db, requirements))
+
+
+# Inventory movement ledger
+#
+# Every stock change is also appended to inventory_movements (one signed row per item),
+# so the stock columns stay the constant-time current balance while the ledger keeps
+# the history. take_balance_snapshots periodically folds new movements into per-item
+# balance snapshots; a point-in-time query reads the latest snapshot before that time
+# and adds only that item's movements after it, through the (item_type, item_id, id)
+# index. An item with no snapshot before that time sums all its movements up to it.
+
+def record_movements(db: Session, movements: List[dict]) -> None:
+    """
+    Append movements ({item_type, item_id, movement_type, quantity, sale_id?, notes?})
+    to the ledger with one bulk INSERT, without committing.
+    """
+    if not movements:
+        return
+    db.execute(
+        inventory_model.InventoryMovement.__table__.insert(),
+        [{"sale_id": None, "notes": None, **movement} for movement in movements]
+    )
+
+def record_stock_change(db: Session, item_type: str, item_id: int, previous: Optional[float],
+                        current: Optional[float], notes: str) -> None:
+    """
+    Record an "adjustment" for a stock field written directly (item creation or update),
+    without committing. Nothing is recorded when the stock did not change.
+    """
+    quantity = (current or 0) - (previous or 0)
+    if quantity:
+        record_movements(db, [{
+            "item_type": item_type, "item_id": item_id, "movement_type": "adjustment",
+            "quantity": quantity, "notes": notes,
+        }])
+
+def record_stock_overwrite(db: Session, item_type: str, item_ids: Sequence[int], stock: float, notes: str) -> None:
+    """
+    Record the "adjustment" of the stock fields of `item_ids` that are about to be
+    overwritten with `stock`, without committing. One INSERT ... SELECT reads the current
+    stock inside the database, so it must run before the UPDATE. Nothing is recorded for
+    items whose stock does not change.
+    """
+    model, column_name = STOCK_COLUMNS[item_type]
+    table = model.__table__
+    current = func.coalesce(table.c[column_name], 0)
+    db.execute(inventory_model.InventoryMovement.__table__.insert().from_select(
+        ["item_type", "item_id", "movement_type", "quantity", "notes"],
+        select(
+            literal(item_type), table.c.id, literal("adjustment"), literal(stock) - current, literal(notes)
+        ).where(table.c.id.in_(item_ids), current != stock)
+    ))
+
+def create_movement(db: Session, item_type: str, item_id: int, movement_type: str,
+                    quantity: float, notes: Optional[str] = None) -> inventory_model.InventoryMovement:
+    """
+    Apply a manual purchase, waste or adjustment to the item's stock and record it.
+    Raises ValueError if the item does not exist and OutOfStockError if a decrease
+    would take the stock below zero.
+    """
+    model, column_name = STOCK_COLUMNS[item_type]
+    if db.get(model, item_id) is None:
+        raise ValueError(f"{item_type} {item_id} not found")
+    if quantity < 0:
+        deduct_stock(db, {item_type: {item_id: -quantity}})
+    else:
+        stock = getattr(model, column_name)
+        db.query(model).filter(model.id == item_id).update(
+            {column_name: stock + quantity}, synchronize_session=False
+        )
+    db_movement = inventory_model.InventoryMovement(
+        item_type=item_type, item_id=item_id, movement_type=movement_type, quantity=quantity, notes=notes
+    )
+    db.add(db_movement)
+    db.commit()
+    db.refresh(db_movement)
+    return db_movement
+
+def get_movements(db: Session, item_type: Optional[str] = None, item_id: Optional[int] = None,
+                  skip: int = 0, limit: int = 100, cursor: Optional[list] = None) -> List[inventory_model.InventoryMovement]:
+    """
+    Retrieve ledger movements, newest first, optionally for one item type or item.
+    """
+    query = db.query(inventory_model.InventoryMovement)
+    if item_type:
+        query = query.filter(inventory_model.InventoryMovement.item_type == item_type)
+    if item_id is not None:
+        query = query.filter(inventory_model.InventoryMovement.item_id == item_id)
+    return MOVEMENT_KEYSET.paginate(query, skip, limit, cursor)
+
+def take_balance_snapshots(db: Session) -> int:
+    """
+    Snapshot the balance of every item that has moved since its last snapshot (see
+    write_balance_snapshots). Commits and returns the number of snapshots written.
+    """
+    count = write_balance_snapshots(db)
+    db.commit()
+    return count
+
+def write_balance_snapshots(db: Session) -> int:
+    """
+    Snapshot the balance of every item that has moved since its last snapshot: previous
+    snapshot balance plus the newer movements, in a single INSERT ... SELECT.
+    Does not commit. Returns the number of snapshots written.
+    """
+    movements = inventory_model.InventoryMovement.__table__
+    snapshots = inventory_model.InventoryBalanceSnapshot.__table__
+
+    # Latest snapshot per item
+    latest = (
+        select(
+            snapshots.c.item_type, snapshots.c.item_id,
+            func.max(snapshots.c.last_movement_id).label("last_movement_id"),
+        )
+        .group_by(snapshots.c.item_type, snapshots.c.item_id)
+        .subquery()
+    )
+    previous = (
+        select(snapshots.c.item_type, snapshots.c.item_id, snapshots.c.balance, snapshots.c.last_movement_id)
+        .join(latest, (snapshots.c.item_type == latest.c.item_type)
+              & (snapshots.c.item_id == latest.c.item_id)
+              & (snapshots.c.last_movement_id == latest.c.last_movement_id))
+        .subquery()
+    )
+    new_movements = (
+        select(
+            movements.c.item_type, movements.c.item_id,
+            func.sum(movements.c.quantity).label("delta"),
+            func.max(movements.c.id).label("last_movement_id"),
+        )
+        .select_from(movements.outerjoin(
+            previous, (movements.c.item_type == previous.c.item_type) & (movements.c.item_id == previous.c.item_id)
+        ))
+        .where(movements.c.id > func.coalesce(previous.c.last_movement_id, 0))
+        .group_by(movements.c.item_type, movements.c.item_id)
+        .subquery()
+    )
+    source = select(
+        new_movements.c.item_type,
+        new_movements.c.item_id,
+        new_movements.c.delta + func.coalesce(previous.c.balance, 0),
+        new_movements.c.last_movement_id,
+    ).select_from(new_movements.outerjoin(
+        previous, (new_movements.c.item_type == previous.c.item_type) & (new_movements.c.item_id == previous.c.item_id)
+    ))
+    result = db.execute(
+        snapshots.insert().from_select(["item_type", "item_id", "balance", "last_movement_id"], source)
+    )
+    return result.rowcount
+
+def _naive_utc(at: datetime) -> datetime:
+    # Timestamps are stored as naive UTC text (SQLite CURRENT_TIMESTAMP) and compared as
+    # text, so an aware datetime is converted to UTC first; a naive one is taken as UTC
+    return at.astimezone(timezone.utc).replace(tzinfo=None) if at.tzinfo is not None else at
+
+def get_stock_at(db: Session, item_type: str, item_id: int, at: datetime) -> dict:
+    """
+    Stock of one item at a point in time: the latest snapshot taken at or before `at`
+    plus the movements recorded after that snapshot up to `at`.
+    """
+    stored_at = _naive_utc(at)
+    Movement = inventory_model.InventoryMovement
+    Snapshot = inventory_model.InventoryBalanceSnapshot
+    snapshot = (
+        db.query(Snapshot)
+        .filter(Snapshot.item_type == item_type, Snapshot.item_id == item_id, Snapshot.taken_at <= stored_at)
+        .order_by(Snapshot.taken_at.desc(), Snapshot.id.desc())
+        .first()
+    )
+    delta, count = (
+        db.query(func.coalesce(func.sum(Movement.quantity), 0), func.count(Movement.id))
+        .filter(
+            Movement.item_type == item_type,
+            Movement.item_id == item_id,
+            Movement.id > (snapshot.last_movement_id if snapshot else 0),
+            Movement.created_at <= stored_at,
+        )
+        .one()
+    )
+    return {
+        "item_type": item_type,
+        "item_id": item_id,
+        "at": at,
+        "balance": (snapshot.balance if snapshot else 0) + delta,
+        "snapshot_id": snapshot.id if snapshot else None,
+        "movements_applied": count,
+    }
+
+def record_opening_balances(db: Session) -> int:
+    """
+    Record the current stock of every item as an "Opening stock" adjustment, for
+    ledgers started on a database that already had stock. Does not commit.
+    """
+    movements = inventory_model.InventoryMovement.__table__
+    total = 0
+    for item_type, (model, column_name) in STOCK_COLUMNS.items():
+        table = model.__table__
+        stock = table.c[column_name]
+        result = db.execute(movements.insert().from_select(
+            ["item_type", "item_id", "movement_type", "quantity", "notes"],
+            select(
+                literal(item_type), table.c.id, literal("adjustment"), stock, literal("Opening stock")
+            ).where(stock > 0)
+        ))
+        total += result.rowcount
+    return total
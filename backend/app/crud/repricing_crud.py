@@ -0,0 +1,235 @@
+from datetime import date as date_cls
+import numpy as np
+from sqlalchemy import Integer, cast, func, select
+from sqlalchemy.orm import Session
+from typing import Dict, List, Optional
+from ..models import sales_model, inventory_model
+from ..schemas import sales_schema
+from . import costing_crud
+
+# What-if repricing
+#
+# Historical perfume lines are loaded once into columnar arrays (ids, quantities,
+# revenue and the per-unit cost of each ingredient group at current costs). A scenario
+# is a set of multipliers on those cost groups and on prices, so every scenario is a
+# row of a scenarios x lines matrix computed in one vectorized pass, and the margin
+# deltas per recipe, fragrance and month are weighted bincounts over that matrix.
+
+MAX_SCENARIOS = 50
+MATRIX_CELLS = 8_000_000  # Scenario x line cells evaluated at once (64 MB per float matrix)
+
+# Columns of the sale line matrix loaded by load_sale_lines
+LINE_COLUMNS = (
+    "sale_id", "recipe_id", "fragrance_id", "bottle_id", "quantity", "line_total",
+    "extra_fragrance_grams", "has_pheromones", "size_ml",
+    "fragrance_grams", "fijador_drops", "potencializador_drops", "concentrado_drops",
+)
+
+class SaleLineColumns:
+    """
+    Perfume sale lines as NumPy columns, with their cost split by ingredient group.
+    `lines` is a float matrix with LINE_COLUMNS; `months` holds each line's YYYYMM.
+    """
+
+    def __init__(self, lines: np.ndarray, months: np.ndarray, tables: costing_crud.CostTables):
+        column = {name: lines[:, position] for position, name in enumerate(LINE_COLUMNS)}
+        self.recipe_ids = column["recipe_id"].astype(np.int64)
+        self.fragrance_ids = column["fragrance_id"].astype(np.int64)
+        self.quantity = column["quantity"]
+        self.revenue = column["line_total"]
+        month_keys, self.month_index = np.unique(months, return_inverse=True)
+        self.months = np.array([f"{key // 100:04d}-{key % 100:02d}" for key in month_keys.tolist()])
+
+        drops = lines[:, LINE_COLUMNS.index("fijador_drops"):]
+        recipe_grams = column["fragrance_grams"]
+        alcohol_ml = costing_crud.alcohol_volume_ml(column["size_ml"], recipe_grams, drops)
+        fragrances = costing_crud.id_positions(tables.fragrance_ids, self.fragrance_ids)
+        bottles = costing_crud.id_positions(tables.bottle_ids, column["bottle_id"].astype(np.int64))
+
+        # Per-unit cost of each ingredient group, at current costs
+        self.fragrance_cost = (recipe_grams + column["extra_fragrance_grams"]) * tables.fragrance_costs[fragrances]
+        self.additive_cost = drops @ tables.drop_costs + (column["has_pheromones"] > 0) * tables.pheromone_cost
+        self.alcohol_cost = alcohol_ml * tables.alcohol_cost_per_ml
+        self.bottle_cost = tables.bottle_costs[bottles]
+
+    def __len__(self) -> int:
+        return len(self.quantity)
+
+def months_ago_start(months: int, today: Optional[date_cls] = None) -> date_cls:
+    """
+    First day of the month `months - 1` months before today, so months=1 is the current month.
+    """
+    today = today or date_cls.today()
+    month_number = today.year * 12 + today.month - 1 - (months - 1)
+    return date_cls(month_number // 12, month_number % 12 + 1, 1)
+
+def _matrix(db: Session, statement, width: int, dtype) -> np.ndarray:
+    """
+    Run a Core SELECT on the raw DBAPI cursor and return its rows as a 2-D array.
+    Building a Row object per line costs more than the query itself at this size.
+    """
+    compiled = statement.compile(dialect=db.get_bind().dialect, compile_kwargs={"render_postcompile": True})
+    cursor = db.connection().connection.cursor()
+    try:
+        cursor.execute(str(compiled), [compiled.params[name] for name in compiled.positiontup])
+        return np.array(cursor.fetchall(), dtype=dtype).reshape(-1, width)
+    finally:
+        cursor.close()
+
+def load_sale_lines(db: Session, start: date_cls, tables: costing_crud.CostTables) -> SaleLineColumns:
+    """
+    Load the perfume lines sold since `start`. Ingredient quantities come from the
+    recipe recorded on each line (recipe_used), not from today's recipe.
+
+    Sales in the window and their lines are read with two range scans instead of a
+    join (which walks the sale_id index once per sale): lines are read in id order from
+    the first line of the first sale in the window and matched to their sale's month
+    with a sorted search.
+    """
+    item = sales_model.SaleItem.__table__
+    sale = sales_model.Sale.__table__
+
+    sales = _matrix(db,
+        select(sale.c.id, cast(func.strftime("%Y%m", sale.c.sale_date), Integer))
+        .where(sale.c.sale_date >= start.isoformat())
+        .order_by(sale.c.id),
+        2, np.int64
+    )
+    first_line = db.execute(
+        select(func.min(item.c.id)).where(item.c.sale_id >= int(sales[0, 0]))
+    ).scalar() if len(sales) else None
+    if first_line is None:
+        return SaleLineColumns(np.empty((0, len(LINE_COLUMNS))), np.empty(0, dtype=np.int64), tables)
+
+    def recipe_used(key: str):
+        return func.coalesce(func.json_extract(item.c.recipe_used, f"$.{key}"), 0)
+
+    # Numeric columns only (ids default to -1), so the rows convert to one float matrix
+    lines = _matrix(db,
+        select(
+            item.c.sale_id,
+            func.coalesce(item.c.recipe_id, -1), func.coalesce(item.c.fragrance_id, -1), func.coalesce(item.c.bottle_id, -1),
+            item.c.quantity, item.c.line_total,
+            func.coalesce(item.c.extra_fragrance_grams, 0), func.coalesce(item.c.has_pheromones, 0), func.coalesce(item.c.size_ml, 0),
+            recipe_used("fragrance_grams"), recipe_used("fijador_drops"),
+            recipe_used("potencializador_drops"), recipe_used("concentrado_drops"),
+        )
+        .where(item.c.id >= first_line, item.c.product_type == "perfume"),
+        len(LINE_COLUMNS), np.float64
+    )
+
+    # Keep lines whose sale is in the window (sale ids need not follow sale dates)
+    sale_ids = lines[:, 0].astype(np.int64)
+    positions = np.minimum(np.searchsorted(sales[:, 0], sale_ids), len(sales) - 1)
+    in_window = sales[positions, 0] == sale_ids
+    return SaleLineColumns(lines[in_window], sales[positions[in_window], 1], tables)
+
+def _group(index: np.ndarray, keys: np.ndarray, revenue: np.ndarray, cost: np.ndarray,
+           baseline_margin: np.ndarray, key_name: str, labels: Optional[Dict] = None) -> List[dict]:
+    """
+    Per-group revenue, cost, margin and margin delta for one scenario.
+    """
+    size = len(keys)
+    revenue_sum = np.bincount(index, weights=revenue, minlength=size)
+    cost_sum = np.bincount(index, weights=cost, minlength=size)
+    baseline_sum = np.bincount(index, weights=baseline_margin, minlength=size)
+    margin = revenue_sum - cost_sum
+    groups = []
+    for position, key in enumerate(keys.tolist()):
+        entry = {key_name: None if key == -1 else key}
+        if labels is not None:
+            entry["name"] = labels.get(key)
+        entry.update({
+            "revenue": round(float(revenue_sum[position]), 2),
+            "cost": round(float(cost_sum[position]), 2),
+            "margin": round(float(margin[position]), 2),
+            "margin_delta": round(float(margin[position] - baseline_sum[position]), 2),
+        })
+        groups.append(entry)
+    return groups
+
+def simulate_repricing(db: Session, scenarios: List[sales_schema.RepricingScenario], months: int = 6) -> dict:
+    """
+    Evaluate cost and price scenarios against the perfume lines sold in the last
+    `months` months. Margin deltas are relative to today's costs and the prices
+    actually charged.
+    """
+    if not scenarios:
+        raise ValueError("At least one scenario is required")
+    if len(scenarios) > MAX_SCENARIOS:
+        raise ValueError(f"At most {MAX_SCENARIOS} scenarios per simulation")
+    if months < 1:
+        raise ValueError("months must be at least 1")
+
+    tables = costing_crud.get_cost_tables(db)
+    start = months_ago_start(months)
+    lines = load_sale_lines(db, start, tables)
+
+    recipe_keys, recipe_index = np.unique(lines.recipe_ids, return_inverse=True)
+    fragrance_keys, fragrance_index = np.unique(lines.fragrance_ids, return_inverse=True)
+
+    # Scenario multipliers: one row per scenario. Fragrance and recipe overrides are
+    # gathered into per-line factor matrices (scenarios x lines).
+    count = len(scenarios)
+    fragrance_factors = np.ones((count, len(fragrance_keys)))
+    price_factors = np.ones((count, len(recipe_keys)))
+    group_factors = np.ones((count, 3))  # additives, alcohol, bottles
+    for row, scenario in enumerate(scenarios):
+        fragrance_factors[row, :] = scenario.fragrance_cost_multiplier
+        for fragrance_id, factor in scenario.fragrance_cost_multipliers.items():
+            fragrance_factors[row, fragrance_keys == fragrance_id] = factor
+        price_factors[row, :] = scenario.price_multiplier
+        for recipe_id, factor in scenario.recipe_price_multipliers.items():
+            price_factors[row, recipe_keys == recipe_id] = factor
+        group_factors[row] = (
+            scenario.additive_cost_multiplier, scenario.alcohol_cost_multiplier, scenario.bottle_cost_multiplier
+        )
+
+    quantity = lines.quantity
+    baseline_cost = (lines.fragrance_cost + lines.additive_cost + lines.alcohol_cost + lines.bottle_cost) * quantity
+    baseline_margin = lines.revenue - baseline_cost
+
+    recipe_names = dict(db.query(sales_model.Recipe.id, sales_model.Recipe.name).filter(
+        sales_model.Recipe.id.in_(recipe_keys.tolist())
+    ).all())
+    fragrance_names = dict(db.query(inventory_model.Fragrance.id, inventory_model.Fragrance.internal_name).filter(
+        inventory_model.Fragrance.id.in_(fragrance_keys.tolist())
+    ).all())
+
+    results = []
+    # Scenarios are evaluated in blocks so the scenarios x lines matrices stay bounded
+    block = max(1, MATRIX_CELLS // max(len(lines), 1))
+    for first in range(0, count, block):
+        rows = slice(first, first + block)
+        cost = (
+            lines.fragrance_cost * fragrance_factors[rows][:, fragrance_index]
+            + lines.additive_cost * group_factors[rows, 0:1]
+            + lines.alcohol_cost * group_factors[rows, 1:2]
+            + lines.bottle_cost * group_factors[rows, 2:3]
+        ) * quantity
+        revenue = lines.revenue * price_factors[rows][:, recipe_index]
+        margin = revenue.sum(axis=1) - cost.sum(axis=1)
+
+        for row, scenario in enumerate(scenarios[rows]):
+            results.append({
+                "name": scenario.name,
+                "revenue": round(float(revenue[row].sum()), 2),
+                "cost": round(float(cost[row].sum()), 2),
+                "margin": round(float(margin[row]), 2),
+                "margin_delta": round(float(margin[row] - baseline_margin.sum()), 2),
+                "by_recipe": _group(recipe_index, recipe_keys, revenue[row], cost[row], baseline_margin, "recipe_id", recipe_names),
+                "by_fragrance": _group(fragrance_index, fragrance_keys, revenue[row], cost[row], baseline_margin, "fragrance_id", fragrance_names),
+                "by_month": _group(lines.month_index, lines.months, revenue[row], cost[row], baseline_margin, "month"),
+            })
+
+    return {
+        "start_date": start.isoformat(),
+        "months": months,
+        "sale_items": len(lines),
+        "baseline": {
+            "revenue": round(float(lines.revenue.sum()), 2),
+            "cost": round(float(baseline_cost.sum()), 2),
+            "margin": round(float(baseline_margin.sum()), 2),
+        },
+        "scenarios": results,
+    }
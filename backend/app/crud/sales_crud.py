@@ -1,23 +1,74 @@
-from sqlalchemy.orm import Session
-from typing import List, Optional
+import re
+import threading
+from datetime import date as date_cls, timedelta
+from sqlalchemy import bindparam, func, literal, select, text
+from sqlalchemy.exc import IntegrityError, OperationalError
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlalchemy.orm import Session, joinedload, selectinload
+from typing import Dict, List, Optional, Tuple
 from ..models import sales_model, inventory_model
 from ..schemas import sales_schema
+from .. import metrics
+from ..pagination import Keyset
+from ..repository import Repository
+from . import alcohol_costing_crud, costing_crud, inventory_ledger_crud
+from .inventory_ledger_crud import STOCK_COLUMNS, OutOfStockError, deduct_stock
+
+# List orders (primary key) for skip/limit and keyset cursor pagination
+CUSTOMER_KEYSET = Keyset(sales_model.Customer.id)
+RECIPE_KEYSET = Keyset(sales_model.Recipe.id)
+SALE_KEYSET = Keyset(sales_model.Sale.id)
+
+# Batch reads of customers (the POS renders several at once)
+customers = Repository(sales_model.Customer, CUSTOMER_KEYSET, unique_name=None)
 
 # CRUD operations for Customer
 
+DEFAULT_COUNTRY_CODE = "57"  # Colombia
+
+def normalize_whatsapp(whatsapp: Optional[str]) -> Optional[str]:
+    """
+    Normalize a WhatsApp number to digits with country code, so "+57 300-123 4567",
+    "(300) 123 4567" and "573001234567" all become "573001234567".
+    Returns None when there are no digits.
+    """
+    if not whatsapp:
+        return None
+    digits = re.sub(r"\D", "", whatsapp)
+    if digits.startswith("00"):
+        digits = digits[2:]  # International dialing prefix
+    if len(digits) == 10 and digits.startswith("3"):
+        digits = DEFAULT_COUNTRY_CODE + digits  # Local mobile number
+    return digits or None
+
+def _commit_customer(db: Session, whatsapp: Optional[str]) -> None:
+    """
+    Commit a customer write, turning a duplicate WhatsApp into a readable ValueError.
+    """
+    try:
+        db.commit()
+    except IntegrityError:
+        db.rollback()
+        existing = get_customer_by_whatsapp(db, whatsapp) if whatsapp else None
+        if existing is None:
+            raise
+        raise ValueError(f"WhatsApp '{whatsapp}' is already registered to customer {existing.id} ({existing.name})")
+
 def create_customer(db: Session, customer: sales_schema.CustomerCreate) -> sales_model.Customer:
     """
     Create a new customer in the database.
+    Raises ValueError if another customer already has the same WhatsApp number.
     """
     db_customer = sales_model.Customer(
         name=customer.name,
         whatsapp=customer.whatsapp,
+        whatsapp_normalized=normalize_whatsapp(customer.whatsapp),
         email=customer.email,
         notes=customer.notes
     )
     
     db.add(db_customer)
-    db.commit()
+    _commit_customer(db, customer.whatsapp)
     db.refresh(db_customer)
     return db_customer
 
@@ -27,15 +78,73 @@ def get_customer(db: Session, customer_id: int) -> Optional[sales_model.Customer
     """
     return db.query(sales_model.Customer).filter(sales_model.Customer.id == customer_id).first()
 
-def get_customers(db: Session, skip: int = 0, limit: int = 100) -> List[sales_model.Customer]:
+def get_customers(db: Session, skip: int = 0, limit: int = 100, cursor: Optional[list] = None) -> List[sales_model.Customer]:
+    """
+    Get a list of customers with pagination (skip/limit or a keyset cursor).
+    """
+    return CUSTOMER_KEYSET.paginate(db.query(sales_model.Customer), skip, limit, cursor)
+
+def get_customers_by_ids(db: Session, ids: List[int]) -> List[Optional[sales_model.Customer]]:
     """
-    Get a list of customers with pagination.
+    Get the customers with these ids in one query, in the same order, with None for missing ids.
     """
-    return db.query(sales_model.Customer).offset(skip).limit(limit).all()
+    return customers.get_many(db, ids)
+
+def get_customer_by_whatsapp(db: Session, whatsapp: str) -> Optional[sales_model.Customer]:
+    """
+    Get a customer by WhatsApp number, however it is formatted (single unique index seek).
+    """
+    whatsapp_normalized = normalize_whatsapp(whatsapp)
+    if whatsapp_normalized is None:
+        return None
+    return db.query(sales_model.Customer).filter(
+        sales_model.Customer.whatsapp_normalized == whatsapp_normalized
+    ).first()
+
+def backfill_customer_whatsapp(db: Session) -> dict:
+    """
+    Compute whatsapp_normalized for customers that do not have it yet.
+    When several existing customers share a number, the oldest one keeps the key and
+    the others are reported as duplicates (left unset) so they can be merged by hand.
+    Does not commit.
+    """
+    taken = {
+        key: customer_id for customer_id, key in db.query(
+            sales_model.Customer.id, sales_model.Customer.whatsapp_normalized
+        ).filter(sales_model.Customer.whatsapp_normalized.isnot(None))
+    }
+    pending = db.query(sales_model.Customer.id, sales_model.Customer.whatsapp).filter(
+        sales_model.Customer.whatsapp_normalized.is_(None),
+        sales_model.Customer.whatsapp.isnot(None)
+    ).order_by(sales_model.Customer.id).all()
+
+    updates = []
+    duplicates = []
+    for customer_id, whatsapp in pending:
+        key = normalize_whatsapp(whatsapp)
+        if key is None:
+            continue
+        if key in taken:
+            duplicates.append({"customer_id": customer_id, "duplicate_of": taken[key], "whatsapp": whatsapp})
+            continue
+        taken[key] = customer_id
+        updates.append({"customer_id": customer_id, "key": key})
+
+    if updates:
+        customers = sales_model.Customer.__table__
+        db.execute(
+            customers.update().where(customers.c.id == bindparam("customer_id")).values(
+                whatsapp_normalized=bindparam("key"),
+                updated_at=customers.c.updated_at  # A backfill is not a customer edit
+            ),
+            updates
+        )
+    return {"updated": len(updates), "duplicates": duplicates}
 
 def update_customer(db: Session, customer_id: int, customer_update: sales_schema.CustomerUpdate) -> Optional[sales_model.Customer]:
     """
     Update an existing customer.
+    Raises ValueError if the new WhatsApp number belongs to another customer.
     """
     db_customer = get_customer(db, customer_id)
     if not db_customer:
@@ -43,10 +152,12 @@ def update_customer(db: Session, customer_id: int, customer_update: sales_schema
     
     # Update only the fields that are provided
     update_data = customer_update.model_dump(exclude_unset=True)
+    if "whatsapp" in update_data:
+        update_data["whatsapp_normalized"] = normalize_whatsapp(update_data["whatsapp"])
     for field, value in update_data.items():
         setattr(db_customer, field, value)
     
-    db.commit()
+    _commit_customer(db, update_data.get("whatsapp"))
     db.refresh(db_customer)
     return db_customer
 
@@ -62,14 +173,91 @@ def delete_customer(db: Session, customer_id: int) -> bool:
     db.commit()
     return True
 
-def search_customers(db: Session, search_term: str) -> List[sales_model.Customer]:
+# bm25 column weights for customers_fts: name, email, notes, whatsapp, phone digits
+_CUSTOMER_SEARCH_RANKING = "bm25(customers_fts, 10.0, 2.0, 1.0, 5.0, 5.0)"
+
+def _customer_search_query(search_term: str) -> str:
     """
-    Search customers by name or WhatsApp.
+    Build an FTS5 MATCH expression where every word of the search term is a prefix,
+    so "mar gon" finds "María González" while the cashier is still typing.
     """
-    return db.query(sales_model.Customer).filter(
-        (sales_model.Customer.name.ilike(f"%{search_term}%")) |
-        (sales_model.Customer.whatsapp.ilike(f"%{search_term}%"))
-    ).all()
+    words = re.findall(r"\w+", search_term)
+    return " ".join(f'"{word}"*' for word in words)
+
+def search_customers(db: Session, search_term: str, limit: int = 20) -> List[sales_model.Customer]:
+    """
+    Search customers by name, email, notes or WhatsApp, best matches first.
+    Uses the customers_fts full-text index (see migrations.py) with prefix matching.
+    """
+    match = _customer_search_query(search_term)
+    if not match:
+        return []
+    try:
+        return db.query(sales_model.Customer).from_statement(text(
+            "SELECT customers.* FROM customers_fts "
+            "JOIN customers ON customers.id = customers_fts.rowid "
+            f"WHERE customers_fts MATCH :match ORDER BY {_CUSTOMER_SEARCH_RANKING} LIMIT :limit"
+        )).params(match=match, limit=limit).all()
+    except OperationalError:
+        # SQLite without FTS5: the index was never created
+        db.rollback()
+        return db.query(sales_model.Customer).filter(
+            (sales_model.Customer.name.ilike(f"%{search_term}%")) |
+            (sales_model.Customer.whatsapp.ilike(f"%{search_term}%"))
+        ).limit(limit).all()
+
+# Recipe price matrix
+#
+# The recipe catalogue is tiny and almost never changes, but checkout looks a recipe
+# up for every perfume line. We keep an in-process matrix of the active recipes keyed
+# by (size_ml, fragrance_type, bottle_type). It is loaded with a single query the first
+# time it is needed and dropped whenever a recipe write commits. The version counter
+# makes sure a load that raced with a write never publishes stale data.
+
+RecipeSpecs = Tuple[int, str, str]
+
+_recipe_matrix_lock = threading.Lock()
+_recipe_matrix: Optional[Dict[RecipeSpecs, sales_schema.Recipe]] = None
+_recipe_matrix_version = 0
+
+def invalidate_recipe_price_matrix() -> None:
+    """
+    Drop the cached recipe price matrix. Called after every committed recipe write.
+    """
+    global _recipe_matrix, _recipe_matrix_version
+    with _recipe_matrix_lock:
+        _recipe_matrix = None
+        _recipe_matrix_version += 1
+
+def get_recipe_price_matrix(db: Session) -> Dict[RecipeSpecs, sales_schema.Recipe]:
+    """
+    Return the active recipes keyed by (size_ml, fragrance_type, bottle_type),
+    loading them from the database only if the matrix is not cached yet.
+    """
+    global _recipe_matrix
+    matrix = _recipe_matrix
+    if matrix is not None:
+        metrics.cache_hit("recipe_price_matrix")
+        return matrix
+
+    metrics.cache_miss("recipe_price_matrix")
+    version = _recipe_matrix_version
+    recipes = db.query(sales_model.Recipe).filter(
+        sales_model.Recipe.is_active == "true"
+    ).order_by(sales_model.Recipe.id).all()
+
+    matrix = {}
+    for recipe in recipes:
+        # Keep the lowest id per specs, same as the previous .first() lookup
+        matrix.setdefault(
+            (recipe.size_ml, recipe.fragrance_type, recipe.bottle_type),
+            sales_schema.Recipe.model_validate(recipe)
+        )
+
+    with _recipe_matrix_lock:
+        if version == _recipe_matrix_version:
+            _recipe_matrix = matrix
+    return matrix
 
 # CRUD operations for Recipe
 
@@ -91,9 +279,13 @@ def create_recipe(db: Session, recipe: sales_schema.RecipeCreate) -> sales_model
         estimated_cost=recipe.estimated_cost,
         is_active=recipe.is_active
     )
+    if db_recipe.estimated_cost is None:
+        db_recipe.estimated_cost = calculate_recipe_cost(db, db_recipe)
     
     db.add(db_recipe)
     db.commit()
+    invalidate_recipe_price_matrix()
+    costing_crud.invalidate_cost_tables()
     db.refresh(db_recipe)
     return db_recipe
 
@@ -103,25 +295,25 @@ def get_recipe(db: Session, recipe_id: int) -> Optional[sales_model.Recipe]:
     """
     return db.query(sales_model.Recipe).filter(sales_model.Recipe.id == recipe_id).first()
 
-def get_recipes(db: Session, skip: int = 0, limit: int = 100, active_only: bool = True) -> List[sales_model.Recipe]:
+def get_recipes(db: Session, skip: int = 0, limit: int = 100, active_only: bool = True, cursor: Optional[list] = None) -> List[sales_model.Recipe]:
     """
-    Get a list of recipes with pagination. By default, only active recipes.
+    Get a list of recipes with pagination (skip/limit or a keyset cursor). By default, only active recipes.
     """
     query = db.query(sales_model.Recipe)
     if active_only:
         query = query.filter(sales_model.Recipe.is_active == "true")
-    return query.offset(skip).limit(limit).all()
+    return RECIPE_KEYSET.paginate(query, skip, limit, cursor)
 
-def get_recipe_by_specs(db: Session, size_ml: int, fragrance_type: str, bottle_type: str) -> Optional[sales_model.Recipe]:
+def get_recipe_by_specs(db: Session, size_ml: int, fragrance_type: str, bottle_type: str) -> Optional[sales_schema.Recipe]:
     """
-    Get a recipe by its specifications (size, fragrance type, bottle type).
+    Get an active recipe by its specifications (size, fragrance type, bottle type).
+    Served from the recipe price matrix, so it does not query the database once the matrix is warm.
     """
-    return db.query(sales_model.Recipe).filter(
-        sales_model.Recipe.size_ml == size_ml,
-        sales_model.Recipe.fragrance_type == fragrance_type,
-        sales_model.Recipe.bottle_type == bottle_type,
-        sales_model.Recipe.is_active == "true"
-    ).first()
+    return get_recipe_price_matrix(db).get((size_ml, fragrance_type, bottle_type))
+
+RECIPE_INGREDIENT_FIELDS = {
+    "size_ml", "bottle_type", "fragrance_grams", "fijador_drops", "potencializador_drops", "concentrado_drops"
+}
 
 def update_recipe(db: Session, recipe_id: int, recipe_update: sales_schema.RecipeUpdate) -> Optional[sales_model.Recipe]:
     """
@@ -135,8 +327,15 @@ def update_recipe(db: Session, recipe_id: int, recipe_update: sales_schema.Recip
     update_data = recipe_update.model_dump(exclude_unset=True)
     for field, value in update_data.items():
         setattr(db_recipe, field, value)
+    # Re-cost only when what goes into the recipe changed, or no cost is stored yet
+    if "estimated_cost" not in update_data and (
+        RECIPE_INGREDIENT_FIELDS.intersection(update_data) or db_recipe.estimated_cost is None
+    ):
+        db_recipe.estimated_cost = calculate_recipe_cost(db, db_recipe)
     
     db.commit()
+    invalidate_recipe_price_matrix()
+    costing_crud.invalidate_cost_tables()
     db.refresh(db_recipe)
     return db_recipe
 
@@ -151,28 +350,58 @@ def delete_recipe(db: Session, recipe_id: int) -> bool:
     # Instead of deleting, we deactivate the recipe
     db_recipe.is_active = "false"
     db.commit()
+    invalidate_recipe_price_matrix()
     return True
 
 def calculate_recipe_cost(db: Session, recipe: sales_model.Recipe) -> float:
     """
-    Calculate the estimated cost of a recipe based on current ingredient prices.
-    This is a placeholder function - you'll need to implement based on your additive costs.
+    Calculate the estimated cost of one unit of a recipe from current ingredient prices:
+    fragrance grams (at the average fragrance cost), additive drops and alcohol.
+    The bottle is costed per sale item, since it is chosen at checkout.
     """
-    # TODO: Implement actual cost calculation based on:
-    # - fragrance_grams * fragrance_cost_per_gram
-    # - fijador_drops * fijador_cost_per_drop
-    # - potencializador_drops * potencializador_cost_per_drop
-    # - concentrado_drops * concentrado_cost_per_drop
-    
-    # For now, return a placeholder cost
-    estimated_cost = recipe.fragrance_grams * 0.5  # Placeholder: $0.5 per gram of fragrance
-    return round(estimated_cost, 2)
+    return costing_crud.recipe_estimated_cost(db, recipe)
+
+# Inventory deduction (conditional UPDATEs and ledger writes live in inventory_ledger_crud)
+
+def _add_requirement(requirements: Dict[str, Dict[int, float]], kind: str, item_id: Optional[int], quantity: float) -> None:
+    if item_id is not None and quantity > 0:
+        requirements[kind][item_id] = requirements[kind].get(item_id, 0) + quantity
 
 # CRUD operations for Sale
 
+EXTRA_FRAGRANCE_PRICE_PER_GRAM = 500  # Price list: each extra gram of fragrance in a perfume
+
+def _consume_alcohol(db: Session, alcohol_lines: List[Tuple[sales_model.SaleItem, float]]) -> bool:
+    """
+    Draw the alcohol of a sale's perfume lines from the batches of the alcohol in stock,
+    without committing. Lines were stamped at the cached cost per ml; when the batches
+    consumed cost something else (a FIFO sale spanning two batches), the difference is
+    spread over the lines by volume. Returns whether the current cost per ml moved, or
+    another alcohol type now has the most volume and becomes the default, in which case
+    the cost tables must be dropped after commit.
+    """
+    alcohol_ml = sum(line_ml for _, line_ml in alcohol_lines)
+    state = alcohol_costing_crud.get_default_state(db) if alcohol_ml > 0 else None
+    if state is None:
+        return False
+
+    stamped_cost_per_ml = costing_crud.get_cost_tables(db).alcohol_cost_per_ml
+    cost_before = alcohol_costing_crud.current_cost_per_ml(state)
+    cost = alcohol_costing_crud.consume(db, state.name, alcohol_ml)
+    difference = cost - alcohol_ml * stamped_cost_per_ml
+    if abs(difference) >= 0.01:
+        for item, line_ml in alcohol_lines:
+            item.item_cost = round(item.item_cost + difference * line_ml / alcohol_ml, 2)
+            item.profit_margin = round(item.line_total - item.item_cost, 2)
+    if alcohol_costing_crud.current_cost_per_ml(state) != cost_before:
+        return True
+    db.flush()  # So the lookup ranks the types by their volume after this sale
+    return alcohol_costing_crud.get_default_state(db).id != state.id
+
 def create_sale(db: Session, sale: sales_schema.SaleCreateSimple) -> sales_model.Sale:
     """
-    Create a new sale with items, calculating prices automatically.
+    Create a new sale with items, calculating prices automatically and taking
+    the items out of inventory. Raises OutOfStockError if stock is insufficient.
     """
     # Create the main sale record
     db_sale = sales_model.Sale(
@@ -188,6 +417,9 @@ def create_sale(db: Session, sale: sales_schema.SaleCreateSimple) -> sales_model
     
     # Process sale items
     total_subtotal = 0.0
+    db_sale_items = []
+    requirements = {kind: {} for kind in STOCK_COLUMNS}
+    alcohol_lines = []  # (sale item, alcohol ml of the whole line)
     for item_data in sale.sale_items:
         # Calculate price based on product type
         if item_data.product_type == "perfume":
@@ -204,11 +436,9 @@ def create_sale(db: Session, sale: sales_schema.SaleCreateSimple) -> sales_model
                 if item_data.has_pheromones:
                     unit_price += recipe.pheromone_addition_price
                 
-                # Add extra fragrance cost if specified
+                # Add extra fragrance price if specified
                 if item_data.extra_fragrance_grams > 0:
-                    # TODO: Get actual fragrance cost from inventory
-                    extra_cost = item_data.extra_fragrance_grams * 500  # Placeholder: $500 per gram
-                    unit_price += extra_cost
+                    unit_price += item_data.extra_fragrance_grams * EXTRA_FRAGRANCE_PRICE_PER_GRAM
                 
                 line_total = unit_price * item_data.quantity
                 
@@ -235,11 +465,18 @@ def create_sale(db: Session, sale: sales_schema.SaleCreateSimple) -> sales_model
                     }
                 )
             else:
-                # No recipe found, use provided price
+                # No recipe found, use provided price. The fragrance and bottle are still
+                # taken out of stock below, so the line records them too
                 line_total = item_data.unit_price * item_data.quantity
                 db_sale_item = sales_model.SaleItem(
                     sale_id=db_sale.id,
                     product_type=item_data.product_type,
+                    fragrance_id=item_data.fragrance_id,
+                    bottle_id=item_data.bottle_id,
+                    size_ml=item_data.size_ml,
+                    fragrance_type=item_data.fragrance_type,
+                    has_pheromones=item_data.has_pheromones,
+                    extra_fragrance_grams=item_data.extra_fragrance_grams,
                     item_name=item_data.item_name,
                     quantity=item_data.quantity,
                     unit_price=item_data.unit_price,
@@ -261,8 +498,26 @@ def create_sale(db: Session, sale: sales_schema.SaleCreateSimple) -> sales_model
             )
         
         db.add(db_sale_item)
+        db_sale_items.append(db_sale_item)
         total_subtotal += line_total
+
+        # Stock consumed by this line
+        if item_data.product_type == "perfume":
+            grams_per_unit = (recipe.fragrance_grams if recipe else 0) + item_data.extra_fragrance_grams
+            _add_requirement(requirements, "fragrance", item_data.fragrance_id, grams_per_unit * item_data.quantity)
+            _add_requirement(requirements, "bottle", item_data.bottle_id, item_data.quantity)
+            if recipe:
+                drops = [[getattr(recipe, column) for column in costing_crud.RECIPE_DROP_ADDITIVES]]
+                line_ml = float(costing_crud.alcohol_volume_ml([recipe.size_ml], [recipe.fragrance_grams], drops)[0]) * item_data.quantity
+                alcohol_lines.append((db_sale_item, line_ml))
+        else:
+            _add_requirement(requirements, "finished_product", item_data.finished_product_id, item_data.quantity)
+            _add_requirement(requirements, "humidifier", item_data.humidifier_id, item_data.quantity)
+            _add_requirement(requirements, "humidifier_essence", item_data.humidifier_essence_id, item_data.quantity)
     
+    # Cost and margin of every line, at current ingredient costs
+    costing_crud.stamp_item_costs(db, db_sale_items)
+
     # Calculate totals
     db_sale.subtotal = total_subtotal - sale.discount_amount
     
@@ -273,55 +528,261 @@ def create_sale(db: Session, sale: sales_schema.SaleCreateSimple) -> sales_model
     
     db_sale.total_amount = db_sale.subtotal + db_sale.surcharge_amount
     
+    db.flush()
+    _add_sale_to_rollups(db, db_sale.id)
+    deduct_stock(db, requirements)
+    inventory_ledger_crud.record_movements(db, [
+        {"item_type": kind, "item_id": item_id, "movement_type": "sale", "quantity": -quantity, "sale_id": db_sale.id}
+        for kind, quantities in requirements.items()
+        for item_id, quantity in quantities.items()
+    ])
+
+    alcohol_cost_changed = _consume_alcohol(db, alcohol_lines)
+    
     db.commit()
+    if alcohol_cost_changed:
+        costing_crud.invalidate_cost_tables()
     db.refresh(db_sale)
     return db_sale
 
+def _query_sales_with_details(db: Session):
+    """
+    Base query for sales that eager-loads everything the Sale schema serializes.
+    The customer comes in the same SELECT (many-to-one JOIN) and the items in a
+    single extra SELECT ... WHERE sale_id IN (...), so any page of sales costs
+    two queries instead of 1 + 2N lazy loads.
+    """
+    return db.query(sales_model.Sale).options(
+        joinedload(sales_model.Sale.customer),
+        selectinload(sales_model.Sale.sale_items)
+    )
+
 def get_sale(db: Session, sale_id: int) -> Optional[sales_model.Sale]:
     """
     Get a single sale by ID with all related data.
     """
-    return db.query(sales_model.Sale).filter(sales_model.Sale.id == sale_id).first()
+    return _query_sales_with_details(db).filter(sales_model.Sale.id == sale_id).first()
 
-def get_sales(db: Session, skip: int = 0, limit: int = 100) -> List[sales_model.Sale]:
+def get_sales(db: Session, skip: int = 0, limit: int = 100, cursor: Optional[list] = None) -> List[sales_model.Sale]:
     """
-    Get a list of sales with pagination.
+    Get a list of sales with pagination (skip/limit or a keyset cursor).
     """
-    return db.query(sales_model.Sale).offset(skip).limit(limit).all()
+    return SALE_KEYSET.paginate(_query_sales_with_details(db), skip, limit, cursor)
 
 def get_sales_by_date_range(db: Session, start_date: str, end_date: str) -> List[sales_model.Sale]:
     """
     Get sales within a date range.
     """
-    return db.query(sales_model.Sale).filter(
+    return _query_sales_with_details(db).filter(
         sales_model.Sale.sale_date >= start_date,
         sales_model.Sale.sale_date <= end_date
     ).all()
 
+def date_range_bounds(start_date: str, end_date: str) -> Tuple[str, str]:
+    """
+    Turn inclusive YYYY-MM-DD dates into a half-open [start, end) timestamp range.
+    Raises ValueError for malformed dates or an end before the start.
+    """
+    start = date_cls.fromisoformat(start_date)
+    end = date_cls.fromisoformat(end_date)
+    if end < start:
+        raise ValueError("end_date must not be before start_date")
+    return f"{start.isoformat()} 00:00:00", f"{(end + timedelta(days=1)).isoformat()} 00:00:00"
+
+SALES_EXPORT_COLUMNS = [
+    "sale_id", "sale_date", "customer_id", "customer_name", "payment_method",
+    "subtotal", "discount_amount", "surcharge_amount", "total_amount",
+    "item_id", "product_type", "item_name", "quantity", "unit_price", "line_total",
+    "fragrance_id", "bottle_id", "recipe_id", "size_ml", "fragrance_type", "has_pheromones",
+    "extra_fragrance_grams", "finished_product_id", "humidifier_id", "humidifier_essence_id",
+    "item_cost", "profit_margin",
+]
+
+def iter_sales_export_rows(db: Session, start_date: str, end_date: str, batch_size: int = 1000):
+    """
+    Yield one flat dict per sale item (sales without items yield one row with empty item
+    fields) for every sale in an inclusive date range, ordered by sale id.
+
+    Sales are walked in keyset chunks of batch_size (id > last id seen) and read as plain
+    rows, so memory stays constant no matter how large the range is.
+    """
+    range_start, range_end = date_range_bounds(start_date, end_date)
+    sale = sales_model.Sale.__table__
+    item = sales_model.SaleItem.__table__
+    customer = sales_model.Customer.__table__
+    columns = [
+        sale.c.id.label("sale_id"), sale.c.sale_date, sale.c.customer_id,
+        customer.c.name.label("customer_name"), sale.c.payment_method,
+        sale.c.subtotal, sale.c.discount_amount, sale.c.surcharge_amount, sale.c.total_amount,
+        item.c.id.label("item_id"), item.c.product_type, item.c.item_name, item.c.quantity,
+        item.c.unit_price, item.c.line_total, item.c.fragrance_id, item.c.bottle_id,
+        item.c.recipe_id, item.c.size_ml, item.c.fragrance_type, item.c.has_pheromones,
+        item.c.extra_fragrance_grams, item.c.finished_product_id, item.c.humidifier_id,
+        item.c.humidifier_essence_id, item.c.item_cost, item.c.profit_margin,
+    ]
+
+    last_sale_id = 0
+    while True:
+        chunk = select(sale.c.id).where(
+            sale.c.sale_date >= range_start,
+            sale.c.sale_date < range_end,
+            sale.c.id > last_sale_id
+        ).order_by(sale.c.id).limit(batch_size)
+        rows = db.execute(
+            select(*columns)
+            .select_from(sale.outerjoin(item, item.c.sale_id == sale.c.id).outerjoin(customer, customer.c.id == sale.c.customer_id))
+            .where(sale.c.id.in_(chunk.scalar_subquery()))
+            .order_by(sale.c.id, item.c.id)
+        ).mappings().all()
+        if not rows:
+            return
+        for row in rows:
+            yield dict(row)
+        last_sale_id = rows[-1]["sale_id"]
+        # Keep the read transaction short so an export never pins the WAL
+        db.rollback()
+
+# Sales rollups
+#
+# Reports read pre-aggregated hour and day buckets from sales_rollups instead of
+# scanning sales. create_sale adds every new sale to its buckets in the same
+# transaction, and rebuild_sales_rollups regenerates the whole table from history.
+
+SUMMARY_BUCKET_FORMATS = {
+    "day": "%Y-%m-%d",
+    "hour": "%Y-%m-%d %H:00",
+}
+
+def _rollup_source(granularity: str):
+    """
+    SELECT producing sales_rollups rows for the given granularity, grouped from sales.
+    """
+    bucket = func.strftime(SUMMARY_BUCKET_FORMATS[granularity], sales_model.Sale.sale_date)
+    return select(
+        literal(granularity),
+        bucket,
+        sales_model.Sale.payment_method,
+        func.count(sales_model.Sale.id),
+        func.coalesce(func.sum(sales_model.Sale.total_amount), 0.0),
+        func.coalesce(func.sum(sales_model.Sale.discount_amount), 0.0),
+        func.coalesce(func.sum(sales_model.Sale.surcharge_amount), 0.0)
+    ).group_by(bucket, sales_model.Sale.payment_method)
+
+_ROLLUP_COLUMNS = ["granularity", "bucket", "payment_method", "sale_count", "revenue", "discount_amount", "surcharge_amount"]
+
+def _add_sale_to_rollups(db: Session, sale_id: int) -> None:
+    """
+    Add a flushed sale to its hour and day buckets (upsert), without committing.
+    The bucket is derived from the stored sale_date, so it matches a full rebuild.
+    """
+    rollup = sales_model.SalesRollup
+    for granularity in SUMMARY_BUCKET_FORMATS:
+        stmt = sqlite_insert(rollup).from_select(
+            _ROLLUP_COLUMNS,
+            _rollup_source(granularity).where(sales_model.Sale.id == sale_id)
+        )
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["granularity", "bucket", "payment_method"],
+            set_={
+                "sale_count": rollup.sale_count + stmt.excluded.sale_count,
+                "revenue": rollup.revenue + stmt.excluded.revenue,
+                "discount_amount": rollup.discount_amount + stmt.excluded.discount_amount,
+                "surcharge_amount": rollup.surcharge_amount + stmt.excluded.surcharge_amount,
+            }
+        )
+        db.execute(stmt)
+
+def rebuild_sales_rollups(db: Session) -> int:
+    """
+    Regenerate every rollup bucket from the sales table, without committing.
+    Returns the number of rollup rows.
+    """
+    db.query(sales_model.SalesRollup).delete(synchronize_session=False)
+    for granularity in SUMMARY_BUCKET_FORMATS:
+        db.execute(sales_model.SalesRollup.__table__.insert().from_select(
+            _ROLLUP_COLUMNS, _rollup_source(granularity)
+        ))
+    return db.query(sales_model.SalesRollup).count()
+
+def ensure_sales_rollups(db: Session) -> None:
+    """
+    Build the rollups once for databases that already had sales before the table existed.
+    Does not commit.
+    """
+    has_rollups = db.query(sales_model.SalesRollup.id).first() is not None
+    if not has_rollups and db.query(sales_model.Sale.id).first() is not None:
+        rebuild_sales_rollups(db)
+
+def get_sales_summary(db: Session, start_date: str, end_date: str, bucket: str = "day") -> dict:
+    """
+    Get a sales summary for an inclusive date range, bucketed by day or hour.
+    Reads the pre-aggregated sales_rollups buckets, so the cost depends on the
+    number of buckets in the range and not on the number of sales.
+    """
+    if bucket not in SUMMARY_BUCKET_FORMATS:
+        raise ValueError(f"Unsupported bucket '{bucket}', expected one of: {', '.join(SUMMARY_BUCKET_FORMATS)}")
+    start = date_cls.fromisoformat(start_date)
+    end = date_cls.fromisoformat(end_date)
+    if end < start:
+        raise ValueError("end_date must not be before start_date")
+
+    # Bucket keys start with YYYY-MM-DD, so plain string bounds select whole days
+    rollup = sales_model.SalesRollup
+    rows = db.query(
+        rollup.bucket,
+        rollup.payment_method,
+        rollup.sale_count,
+        rollup.revenue,
+        rollup.discount_amount,
+        rollup.surcharge_amount
+    ).filter(
+        rollup.granularity == bucket,
+        rollup.bucket >= start.isoformat(),
+        rollup.bucket < (end + timedelta(days=1)).isoformat()
+    ).order_by(rollup.bucket, rollup.payment_method).all()
+
+    buckets = {}
+    totals = {
+        "total_sales": 0,
+        "total_revenue": 0.0,
+        "total_discount": 0.0,
+        "total_surcharge": 0.0,
+        "payment_methods": {}
+    }
+    for bucket_value, method, count, revenue, discount, surcharge in rows:
+        entry = buckets.setdefault(bucket_value, {
+            "bucket": bucket_value,
+            "total_sales": 0,
+            "total_revenue": 0.0,
+            "total_discount": 0.0,
+            "total_surcharge": 0.0,
+            "payment_methods": {}
+        })
+        for target in (entry, totals):
+            target["total_sales"] += count
+            target["total_revenue"] += revenue
+            target["total_discount"] += discount
+            target["total_surcharge"] += surcharge
+            method_totals = target["payment_methods"].setdefault(method, {"count": 0, "amount": 0.0})
+            method_totals["count"] += count
+            method_totals["amount"] += revenue
+
+    return {
+        "start_date": start_date,
+        "end_date": end_date,
+        "bucket": bucket,
+        **totals,
+        "buckets": list(buckets.values())
+    }
+
 def get_daily_sales_summary(db: Session, date: str) -> dict:
     """
     Get daily sales summary.
     """
-    sales = db.query(sales_model.Sale).filter(
-        sales_model.Sale.sale_date >= f"{date} 00:00:00",
-        sales_model.Sale.sale_date <= f"{date} 23:59:59"
-    ).all()
-    
-    total_sales = len(sales)
-    total_revenue = sum(sale.total_amount for sale in sales)
-    
-    # Payment methods breakdown
-    payment_methods = {}
-    for sale in sales:
-        method = sale.payment_method
-        if method not in payment_methods:
-            payment_methods[method] = {"count": 0, "amount": 0.0}
-        payment_methods[method]["count"] += 1
-        payment_methods[method]["amount"] += sale.total_amount
-    
+    summary = get_sales_summary(db, start_date=date, end_date=date, bucket="day")
     return {
         "date": date,
-        "total_sales": total_sales,
-        "total_revenue": total_revenue,
-        "payment_methods": payment_methods
-    } 
\ No newline at end of file
+        "total_sales": summary["total_sales"],
+        "total_revenue": summary["total_revenue"],
+        "payment_methods": summary["payment_methods"]
+    }
@@ -1,4 +1,4 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware # Import CORSMiddleware
 
 # Database imports
@@ -10,10 +10,14 @@ from .database import engine, Base # Import Base and engine
 from .models import inventory_model
 from .models import sales_model  # Import sales models
 
-# Create database tables if they don't exist
-# This is suitable for development. For production, consider using Alembic migrations.
+# Create database tables if they don't exist, then bring existing tables up to date.
+# create_all never alters existing tables, so columns and indexes added later ship
+# as versioned migrations in migrations.py.
 Base.metadata.create_all(bind=engine)
 
+from .migrations import run_migrations
+run_migrations(engine)
+
 # Import Routers
 from .routers import inventory_router # Import the inventory router
 from .routes import sales_routes  # Import the sales routes
@@ -35,6 +39,20 @@ app = FastAPI(
     # ]
 )
 
+# Query count, DB time and slowest statement per request, and the slow-query log
+from .query_stats import QueryStatsMiddleware, RESPONSE_HEADERS, instrument_engine
+instrument_engine(engine)
+app.add_middleware(QueryStatsMiddleware)
+
+# Prometheus metrics (GET /metrics): per-route counts and latency, pool waits, busy errors, caches
+from . import metrics
+metrics.instrument_engine(engine)
+app.add_middleware(metrics.MetricsMiddleware)
+
+# Cursors that do not fit the list they are used on are client errors
+from .pagination import InvalidCursor, NEXT_CURSOR_HEADER, invalid_cursor_handler
+app.add_exception_handler(InvalidCursor, invalid_cursor_handler)
+
 # Include routers from other modules
 app.include_router(inventory_router.router) # Register inventory routes
 app.include_router(sales_routes.router, prefix="/sales", tags=["sales"])  # Register sales routes
@@ -52,12 +70,20 @@ app.add_middleware(
     allow_credentials=True, # Allows cookies to be included in requests
     allow_methods=["*"],    # Allows all methods (GET, POST, PUT, etc.)
     allow_headers=["*"],    # Allows all headers
+    expose_headers=[NEXT_CURSOR_HEADER, *RESPONSE_HEADERS], # Lets the frontend read the next-page cursor and query stats
 )
 
 @app.get("/")
 async def root():
     return {"message": "Welcome to Gallery Essence CRM API"}
 
+@app.get("/metrics", include_in_schema=False)
+def read_metrics():
+    """
+    Metrics in the Prometheus text format, for scraping.
+    """
+    return Response(content=metrics.render(), media_type=metrics.CONTENT_TYPE)
+
 # Placeholder for future routers and application logic
 # from .routers import users, products, sales
 # app.include_router(users.router)
@@ -0,0 +1,252 @@
+"""
+Prometheus metrics, served as text at GET /metrics.
+
+Collectors are sharded per thread: every thread updates its own counters with plain
+Python arithmetic and no lock, and a scrape adds the shards up. The only lock is
+taken once per thread and collector, when the thread's shard is created. That keeps
+the request and checkout paths free of contention; see
+scripts/benchmark_metrics_overhead.py for the cost with metrics on and off.
+
+Exported:
+- perfum_crm_http_requests_total{method,route,status}
+- perfum_crm_http_request_duration_seconds{method,route} (histogram)
+- perfum_crm_http_requests_in_flight
+- perfum_crm_db_pool_checkout_wait_seconds (histogram, QueuePool only)
+- perfum_crm_sqlite_busy_errors_total ("database is locked" / "busy" after the busy timeout)
+- perfum_crm_cache_requests_total{cache,result}, perfum_crm_cache_hit_ratio{cache},
+  perfum_crm_cache_evictions_total{cache} and perfum_crm_cache_entries{cache}
+
+PERFUM_CRM_METRICS=0 turns collection off; /metrics then reports zeros.
+"""
+
+import os
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, List, Sequence, Tuple
+
+from sqlalchemy import event
+
+ENABLED = os.getenv("PERFUM_CRM_METRICS", "1").lower() not in ("0", "false", "no")
+
+# Seconds; request latencies of this app are mostly a few milliseconds
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+POOL_WAIT_BUCKETS = (0.0001, 0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+class _Sharded:
+    """
+    Base of the collectors: one shard (a dict of label values -> value) per thread.
+    """
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self._local = threading.local()
+        self._shards: List[dict] = []
+        self._shards_lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def _shard(self) -> dict:
+        try:
+            return self._local.shard
+        except AttributeError:
+            shard = self._local.shard = {}
+            with self._shards_lock:
+                self._shards.append(shard)
+            return shard
+
+    def _snapshots(self) -> List[dict]:
+        # dict.copy() is atomic under the GIL, so a shard being written is never torn
+        with self._shards_lock:
+            shards = list(self._shards)
+        return [shard.copy() for shard in shards]
+
+    def _labels(self, values: Tuple, extra: str = "") -> str:
+        pairs = [f'{name}="{_escape(value)}"' for name, value in zip(self.label_names, values)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+class Counter(_Sharded):
+    kind = "counter"
+
+    def inc(self, labels: Tuple = (), amount: float = 1.0) -> None:
+        if ENABLED:
+            shard = self._shard()
+            shard[labels] = shard.get(labels, 0.0) + amount
+
+    def totals(self) -> Dict[Tuple, float]:
+        totals: Dict[Tuple, float] = {}
+        for shard in self._snapshots():
+            for labels, value in shard.items():
+                totals[labels] = totals.get(labels, 0.0) + value
+        return totals
+
+    def samples(self) -> List[str]:
+        totals = self.totals()
+        if not totals and not self.label_names:
+            totals = {(): 0.0}  # Unlabeled counters are reported from zero
+        return [f"{self.name}{self._labels(labels)} {value:g}" for labels, value in sorted(totals.items())]
+
+class Gauge(_Sharded):
+    """
+    A value that goes up and down (in-flight requests). Shards hold deltas.
+    """
+    kind = "gauge"
+
+    def add(self, amount: float, labels: Tuple = ()) -> None:
+        if ENABLED:
+            shard = self._shard()
+            shard[labels] = shard.get(labels, 0.0) + amount
+
+    def samples(self) -> List[str]:
+        totals: Dict[Tuple, float] = {}
+        for shard in self._snapshots():
+            for labels, value in shard.items():
+                totals[labels] = totals.get(labels, 0.0) + value
+        if not totals and not self.label_names:
+            totals = {(): 0.0}
+        return [f"{self.name}{self._labels(labels)} {value:g}" for labels, value in sorted(totals.items())]
+
+class Histogram(_Sharded):
+    kind = "histogram"
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = (), buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, documentation, label_names)
+        self.buckets = tuple(buckets)
+
+    def observe(self, value: float, labels: Tuple = ()) -> None:
+        if ENABLED:
+            shard = self._shard()
+            entry = shard.get(labels)
+            if entry is None:
+                # Per-bucket counts (not cumulative), then +Inf, then the sum
+                entry = shard[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+            entry[bisect_left(self.buckets, value)] += 1
+            entry[-1] += value
+
+    def samples(self) -> List[str]:
+        merged: Dict[Tuple, list] = {}
+        for shard in self._snapshots():
+            for labels, entry in shard.items():
+                entry = list(entry)
+                total = merged.get(labels)
+                merged[labels] = entry if total is None else [a + b for a, b in zip(total, entry)]
+        lines = []
+        for labels, entry in sorted(merged.items()):
+            cumulative = 0
+            for bound, count in zip((*self.buckets, float("inf")), entry):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else f"{bound:g}"
+                bucket_label = f'le="{le}"'
+                lines.append(f"{self.name}_bucket{self._labels(labels, bucket_label)} {cumulative}")
+            lines.append(f"{self.name}_sum{self._labels(labels)} {entry[-1]:g}")
+            lines.append(f"{self.name}_count{self._labels(labels)} {cumulative}")
+        return lines
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+REGISTRY: List[_Sharded] = []
+
+REQUESTS = Counter("perfum_crm_http_requests_total", "HTTP requests served.", ("method", "route", "status"))
+REQUEST_DURATION = Histogram(
+    "perfum_crm_http_request_duration_seconds", "HTTP request latency, first byte received to last byte sent.", ("method", "route")
+)
+IN_FLIGHT = Gauge("perfum_crm_http_requests_in_flight", "HTTP requests being served.")
+POOL_CHECKOUT_WAIT = Histogram(
+    "perfum_crm_db_pool_checkout_wait_seconds", "Time spent waiting for a pooled database connection.", buckets=POOL_WAIT_BUCKETS
+)
+SQLITE_BUSY = Counter(
+    "perfum_crm_sqlite_busy_errors_total", "Statements that failed with SQLITE_BUSY / database is locked after the busy timeout."
+)
+CACHE_REQUESTS = Counter("perfum_crm_cache_requests_total", "In-process cache lookups.", ("cache", "result"))
+CACHE_EVICTIONS = Counter("perfum_crm_cache_evictions_total", "Entries dropped from in-process caches to make room.", ("cache",))
+
+def cache_hit(cache: str, count: int = 1) -> None:
+    CACHE_REQUESTS.inc((cache, "hit"), count)
+
+def cache_miss(cache: str, count: int = 1) -> None:
+    CACHE_REQUESTS.inc((cache, "miss"), count)
+
+def cache_evicted(cache: str, count: int = 1) -> None:
+    CACHE_EVICTIONS.inc((cache,), count)
+
+def _cache_hit_ratios() -> List[str]:
+    totals = CACHE_REQUESTS.totals()
+    lines = []
+    for cache in sorted({labels[0] for labels in totals}):
+        hits = totals.get((cache, "hit"), 0.0)
+        lookups = hits + totals.get((cache, "miss"), 0.0)
+        lines.append(f'perfum_crm_cache_hit_ratio{{cache="{_escape(cache)}"}} {hits / lookups if lookups else 0:g}')
+    return lines
+
+# Extra gauges computed at scrape time: name -> (help, callback returning sample lines)
+SCRAPE_GAUGES: Dict[str, Tuple[str, Callable[[], List[str]]]] = {
+    "perfum_crm_cache_hit_ratio": ("Share of in-process cache lookups served from the cache.", _cache_hit_ratios),
+}
+
+def render() -> str:
+    """
+    All metrics in the Prometheus text exposition format.
+    """
+    lines = []
+    for collector in REGISTRY:
+        lines.append(f"# HELP {collector.name} {collector.documentation}")
+        lines.append(f"# TYPE {collector.name} {collector.kind}")
+        lines.extend(collector.samples())
+    for name, (documentation, samples) in SCRAPE_GAUGES.items():
+        lines.append(f"# HELP {name} {documentation}")
+        lines.append(f"# TYPE {name} gauge")
+        lines.extend(samples())
+    return "\n".join(lines) + "\n"
+
+def observe_pool_checkout_wait(seconds: float) -> None:
+    POOL_CHECKOUT_WAIT.observe(seconds)
+
+def instrument_engine(engine) -> None:
+    """
+    Count SQLite busy errors on `engine`. Pool checkout waits are reported by
+    database.TimedQueuePool through observe_pool_checkout_wait.
+    """
+    @event.listens_for(engine, "handle_error")
+    def count_busy(context):
+        message = str(context.original_exception).lower()
+        if "database is locked" in message or "database is busy" in message:
+            SQLITE_BUSY.inc()
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording the count, latency and status of each HTTP request by
+    route template (/inventory/fragrances/{item_id}), so ids never become labels.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        IN_FLIGHT.add(1)
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            IN_FLIGHT.add(-1)
+            route = scope.get("route")
+            route_label = getattr(route, "path", None) or "unmatched"
+            REQUESTS.inc((scope["method"], route_label, str(status)))
+            REQUEST_DURATION.observe(time.perf_counter() - started, (scope["method"], route_label))
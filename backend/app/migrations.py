@@ -0,0 +1,201 @@
+"""
+Versioned schema migrations for the SQLite database.
+
+Base.metadata.create_all only creates missing tables. It never adds columns or
+indexes to tables that already exist in perfum_crm.db. Every change to an existing
+table is therefore also registered here as a numbered migration. Migrations run
+once, in order, at startup, and the last applied version is stored in the
+database itself (PRAGMA user_version).
+
+Migrations must be safe on a fresh database too, where create_all has already
+built the latest schema, so they use IF NOT EXISTS / existence checks.
+
+Each migration runs in one transaction together with its version bump, so a
+migration that fails leaves neither partial changes nor a new version behind.
+Migrations and the helpers they call must therefore not commit. A migration
+whose step is optional raises MigrationSkipped when it cannot apply it; the
+version is then bumped without its changes and the skip is logged.
+"""
+
+import logging
+from typing import Callable, List, Tuple
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+class MigrationSkipped(Exception):
+    """
+    Raised by a migration whose only step is optional and cannot be applied on this
+    database. The message says what is missing and what the app does without it.
+    """
+
+def _backfill_sales_rollups(db: Session) -> None:
+    from .crud import sales_crud
+    sales_crud.ensure_sales_rollups(db)
+
+def _add_sales_indexes(db: Session) -> None:
+    # Names match what the models declare, so create_all and this migration agree
+    for statement in (
+        "CREATE INDEX IF NOT EXISTS ix_sales_sale_date_payment_method ON sales (sale_date, payment_method)",
+        "CREATE INDEX IF NOT EXISTS ix_sales_customer_id_sale_date ON sales (customer_id, sale_date)",
+        "CREATE INDEX IF NOT EXISTS ix_sale_items_sale_id ON sale_items (sale_id)",
+        "CREATE INDEX IF NOT EXISTS ix_sale_items_recipe_id ON sale_items (recipe_id)",
+        "CREATE INDEX IF NOT EXISTS ix_sale_items_fragrance_id ON sale_items (fragrance_id)",
+    ):
+        db.execute(text(statement))
+    db.execute(text("ANALYZE"))  # Refresh planner statistics for the new indexes
+
+# Digits-only WhatsApp, plus its last 10 digits so numbers match with or without country code
+_CUSTOMER_PHONE_DIGITS = (
+    "replace(replace(replace(replace(replace(replace(coalesce({row}.whatsapp, ''), "
+    "'+', ''), ' ', ''), '-', ''), '(', ''), ')', ''), '.', '')"
+)
+_CUSTOMER_FTS_VALUES = (
+    "{row}.name, {row}.email, {row}.notes, {row}.whatsapp, "
+    f"{_CUSTOMER_PHONE_DIGITS} || ' ' || substr({_CUSTOMER_PHONE_DIGITS}, -10)"
+)
+
+def _add_customer_search_index(db: Session) -> None:
+    # Full-text index for customer type-ahead, kept in sync by triggers. Row ids are customer ids.
+    # Optional: customer search falls back to LIKE without it. Any other error fails the migration.
+    try:
+        db.execute(text(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS customers_fts USING fts5("
+            "name, email, notes, whatsapp, phone, "
+            "tokenize = 'unicode61 remove_diacritics 2', prefix = '2 3')"
+        ))
+    except OperationalError as e:
+        if "no such module: fts5" not in str(e.orig):
+            raise
+        raise MigrationSkipped("SQLite was built without FTS5; customer search will fall back to LIKE") from e
+    db.execute(text(
+        "CREATE TRIGGER IF NOT EXISTS customers_fts_insert AFTER INSERT ON customers BEGIN "
+        "INSERT INTO customers_fts (rowid, name, email, notes, whatsapp, phone) "
+        f"VALUES (new.id, {_CUSTOMER_FTS_VALUES.format(row='new')}); END"
+    ))
+    db.execute(text(
+        "CREATE TRIGGER IF NOT EXISTS customers_fts_delete AFTER DELETE ON customers BEGIN "
+        "DELETE FROM customers_fts WHERE rowid = old.id; END"
+    ))
+    db.execute(text(
+        "CREATE TRIGGER IF NOT EXISTS customers_fts_update AFTER UPDATE ON customers BEGIN "
+        "DELETE FROM customers_fts WHERE rowid = old.id; "
+        "INSERT INTO customers_fts (rowid, name, email, notes, whatsapp, phone) "
+        f"VALUES (new.id, {_CUSTOMER_FTS_VALUES.format(row='new')}); END"
+    ))
+    db.execute(text("DELETE FROM customers_fts"))
+    db.execute(text(
+        "INSERT INTO customers_fts (rowid, name, email, notes, whatsapp, phone) "
+        f"SELECT customers.id, {_CUSTOMER_FTS_VALUES.format(row='customers')} FROM customers"
+    ))
+
+def _add_customer_whatsapp_key(db: Session) -> None:
+    from .crud import sales_crud
+    columns = {row[1] for row in db.execute(text("PRAGMA table_info(customers)"))}
+    if "whatsapp_normalized" not in columns:
+        db.execute(text("ALTER TABLE customers ADD COLUMN whatsapp_normalized VARCHAR"))
+    result = sales_crud.backfill_customer_whatsapp(db)
+    for duplicate in result["duplicates"]:
+        logger.warning(
+            "Customer %s has the same WhatsApp as customer %s (%s); left without a normalized key",
+            duplicate["customer_id"], duplicate["duplicate_of"], duplicate["whatsapp"]
+        )
+    db.execute(text(
+        "CREATE UNIQUE INDEX IF NOT EXISTS ix_customers_whatsapp_normalized ON customers (whatsapp_normalized)"
+    ))
+
+def _start_inventory_ledger(db: Session) -> None:
+    from .crud import inventory_ledger_crud
+    # Existing stock has no history; open the ledger with it, then snapshot it
+    if db.execute(text("SELECT 1 FROM inventory_movements LIMIT 1")).first() is None:
+        inventory_ledger_crud.record_opening_balances(db)
+    inventory_ledger_crud.write_balance_snapshots(db)
+
+def _add_alcohol_batch_costing(db: Session) -> None:
+    from .crud import alcohol_costing_crud
+    columns = {row[1] for row in db.execute(text("PRAGMA table_info(alcohols)"))}
+    if "remaining_volume_ml" not in columns:
+        db.execute(text("ALTER TABLE alcohols ADD COLUMN remaining_volume_ml FLOAT NOT NULL DEFAULT 0"))
+        # Consumption was never tracked, so existing batches are taken as full
+        db.execute(text("UPDATE alcohols SET remaining_volume_ml = purchase_unit_volume_ml"))
+    alcohol_costing_crud.rebuild_all_states(db)
+
+# Tables served through the read cache (app/cache.py), and entries kept in its log
+_CACHED_INVENTORY_TABLES = (
+    "fragrances", "bottles", "alcohols", "additives", "humidifiers", "humidifier_essences", "finished_products",
+)
+_CACHE_INVALIDATIONS_KEPT = 10000
+
+def _add_cache_invalidation_log(db: Session) -> None:
+    # cache_invalidations itself is created by create_all. Every update or delete of a
+    # cached row, by any code path or process, is logged in the writing transaction.
+    # Inserts need no entry: misses are never cached.
+    for table in _CACHED_INVENTORY_TABLES:
+        for operation in ("UPDATE", "DELETE"):
+            db.execute(text(
+                f"CREATE TRIGGER IF NOT EXISTS {table}_cache_{operation.lower()} AFTER {operation} ON {table} BEGIN "
+                f"INSERT INTO cache_invalidations (table_name, item_id) VALUES ('{table}', old.id); END"
+            ))
+    # Keep the log short: every 1000th entry drops those older than the last _CACHE_INVALIDATIONS_KEPT
+    db.execute(text(
+        "CREATE TRIGGER IF NOT EXISTS cache_invalidations_prune AFTER INSERT ON cache_invalidations "
+        "WHEN new.id % 1000 = 0 BEGIN "
+        f"DELETE FROM cache_invalidations WHERE id <= new.id - {_CACHE_INVALIDATIONS_KEPT}; END"
+    ))
+
+def _add_alcohol_list_index(db: Session) -> None:
+    # Same name as the model declares, so create_all and this migration agree
+    db.execute(text("CREATE INDEX IF NOT EXISTS ix_alcohols_purchase_date_id ON alcohols (purchase_date, id)"))
+    db.execute(text("ANALYZE alcohols"))
+
+# (version, description, migration). Append only; never renumber or edit shipped entries.
+MIGRATIONS: List[Tuple[int, str, Callable[[Session], None]]] = [
+    (1, "Backfill sales rollups", _backfill_sales_rollups),
+    (2, "Indexes for sales and sale_items hot columns", _add_sales_indexes),
+    (3, "Full-text search index for customers", _add_customer_search_index),
+    (4, "Normalized WhatsApp key for customers", _add_customer_whatsapp_key),
+    (5, "Inventory movement ledger opening balances", _start_inventory_ledger),
+    (6, "Alcohol batch remaining volume and cost states", _add_alcohol_batch_costing),
+    (7, "Invalidation log for the inventory read cache", _add_cache_invalidation_log),
+    (8, "Index for the alcohol batch list order", _add_alcohol_list_index),
+]
+
+def get_schema_version(db: Session) -> int:
+    return db.execute(text("PRAGMA user_version")).scalar()
+
+def run_migrations(engine: Engine) -> int:
+    """
+    Apply every migration newer than the database's schema version, each in its own
+    transaction with its version bump. Returns the schema version after migrating.
+    """
+    with Session(bind=engine) as db:
+        current = get_schema_version(db)
+        for version, description, migration in MIGRATIONS:
+            if version <= current:
+                continue
+            # pysqlite only opens a transaction before INSERT/UPDATE/DELETE, so DDL and
+            # PRAGMA user_version would otherwise each commit on their own
+            db.execute(text("BEGIN IMMEDIATE"))
+            skipped = None
+            try:
+                migration(db)
+                db.flush()
+            except MigrationSkipped as e:
+                # Drop whatever the migration did before giving up; only the version is bumped
+                skipped = e
+                db.rollback()
+                db.execute(text("BEGIN IMMEDIATE"))
+            except Exception:
+                db.rollback()
+                raise
+            db.execute(text(f"PRAGMA user_version = {int(version)}"))
+            db.commit()
+            if skipped is not None:
+                logger.warning("Skipped optional migration %s (%s): %s", version, description, skipped)
+            else:
+                logger.info("Applied migration %s: %s", version, description)
+            current = version
+        return current
@@ -3,10 +3,10 @@
 
 # Import all models from inventory_model.py to make them available
 # when the 'models' package is imported, and for SQLAlchemy's Base to discover them.
-from .inventory_model import Base, Fragrance, Bottle, Alcohol, Additive, Humidifier, HumidifierEssence, FinishedProduct
+from .inventory_model import Base, Fragrance, Bottle, Alcohol, AlcoholCostState, Additive, Humidifier, HumidifierEssence, FinishedProduct, InventoryMovement, InventoryBalanceSnapshot, ImportJob, ImportRejectedRow
 
 # Import sales models from sales_model.py (step by step implementation)
-from .sales_model import Customer, Recipe, Sale, SaleItem
+from .sales_model import Customer, Recipe, Sale, SaleItem, SalesRollup
 
 # If you have other model files in the future, import them here as well.
 # For example:
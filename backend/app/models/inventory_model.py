@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Float, DateTime, Text
+from sqlalchemy import Column, Integer, String, Float, DateTime, Text, ForeignKey, Index
 from sqlalchemy.sql import func # For server-side default timestamps
 from ..database import Base # Assuming database.py is one level up in an 'app' directory
 
@@ -56,8 +56,8 @@ class Alcohol(Base):
     
     cost_per_ml = Column(Float, nullable=False) # Calculated for this purchase: purchase_unit_cost / purchase_unit_volume_ml
     
-    # Optional: track stock for THIS SPECIFIC BATCH/PURCHASE if needed
-    # current_stock_ml_of_batch = Column(Float, nullable=True, default=0.0) 
+    # Volume of THIS SPECIFIC BATCH not consumed yet (starts at purchase_unit_volume_ml)
+    remaining_volume_ml = Column(Float, nullable=False, default=0.0)
 
     stock_notes = Column(Text, nullable=True) # General notes, e.g., lot number, or overall stock if not tracking by batch
 
@@ -65,9 +65,33 @@ class Alcohol(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now()) # Record creation time
     updated_at = Column(DateTime(timezone=True), onupdate=func.now()) # Record update time
 
+    # The list order (newest purchase first, then id), so keyset pages are index seeks.
+    # Existing databases get it through app/migrations.py.
+    __table_args__ = (
+        Index("ix_alcohols_purchase_date_id", "purchase_date", "id"),
+    )
+
     def __repr__(self):
         return f"<AlcoholPurchase(name='{self.name}', date='{self.purchase_date}', cost_per_ml={self.cost_per_ml})>"
 
+class AlcoholCostState(Base):
+    __tablename__ = "alcohol_cost_states"
+
+    # Running totals over all batches of one alcohol type, updated incrementally when
+    # batches are bought or consumed, so the current cost is a single-row lookup.
+    id = Column(Integer, primary_key=True, index=True)
+    name = Column(String, unique=True, index=True, nullable=False) # Alcohol type, same as Alcohol.name
+    remaining_volume_ml = Column(Float, nullable=False, default=0.0) # Sum of the batches' remaining volume
+    remaining_value = Column(Float, nullable=False, default=0.0) # Cost of that volume (FIFO or average valued)
+    average_cost_per_ml = Column(Float, nullable=False, default=0.0) # Moving weighted average
+    fifo_batch_id = Column(Integer, nullable=True) # Oldest batch with volume left, consumed next
+    fifo_cost_per_ml = Column(Float, nullable=False, default=0.0) # cost_per_ml of that batch
+
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    def __repr__(self):
+        return f"<AlcoholCostState(name='{self.name}', remaining_ml={self.remaining_volume_ml:g}, average={self.average_cost_per_ml:g})>"
+
 class Additive(Base):
     __tablename__ = "additives"
 
@@ -154,4 +178,101 @@ class FinishedProduct(Base):
     def __repr__(self):
         return f"<FinishedProduct(name='{self.name}', type='{self.product_type}', stock_units={self.stock_units})>"
 
+class InventoryMovement(Base):
+    __tablename__ = "inventory_movements"
+
+    # Append-only ledger of every stock change. Rows are never updated or deleted.
+    id = Column(Integer, primary_key=True, index=True)
+    item_type = Column(String, nullable=False) # "fragrance", "bottle", "finished_product", "humidifier", "humidifier_essence"
+    item_id = Column(Integer, nullable=False) # No FK: the history outlives deleted items
+    movement_type = Column(String, nullable=False) # "purchase", "sale", "adjustment", "waste"
+    quantity = Column(Float, nullable=False) # Signed change in the item's stock unit (grams or units)
+    sale_id = Column(Integer, ForeignKey("sales.id"), nullable=True) # Set for "sale" movements
+    notes = Column(Text, nullable=True)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_inventory_movements_item", "item_type", "item_id", "id"),
+    )
+
+    def __repr__(self):
+        return f"<InventoryMovement({self.movement_type} {self.item_type}#{self.item_id}: {self.quantity:+g})>"
+
+class InventoryBalanceSnapshot(Base):
+    __tablename__ = "inventory_balance_snapshots"
+
+    # Stock of one item after all movements up to last_movement_id. Point-in-time
+    # queries start from the latest snapshot and add only the movements after it.
+    id = Column(Integer, primary_key=True, index=True)
+    item_type = Column(String, nullable=False)
+    item_id = Column(Integer, nullable=False)
+    balance = Column(Float, nullable=False)
+    last_movement_id = Column(Integer, nullable=False)
+    taken_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        Index("ix_inventory_balance_snapshots_item", "item_type", "item_id", "taken_at"),
+    )
+
+    def __repr__(self):
+        return f"<InventoryBalanceSnapshot({self.item_type}#{self.item_id}={self.balance:g} at '{self.taken_at}')>"
+
+class CacheInvalidation(Base):
+    __tablename__ = "cache_invalidations"
+
+    # Ids of inventory rows updated or deleted, by any connection or process. Written
+    # by triggers (migration 7) and read by the in-process read caches (app/cache.py),
+    # which drop those rows. The id is the log position; only recent entries are kept.
+    id = Column(Integer, primary_key=True)
+    table_name = Column(String, nullable=False)
+    item_id = Column(Integer, nullable=False)
+
+    def __repr__(self):
+        return f"<CacheInvalidation({self.id}: {self.table_name}#{self.item_id})>"
+
+class ImportJob(Base):
+    __tablename__ = "import_jobs"
+
+    # One supplier catalogue import. rows_processed only moves forward when a chunk
+    # commits, so an interrupted import resumes after the last committed chunk.
+    id = Column(Integer, primary_key=True, index=True)
+    kind = Column(String, nullable=False) # "fragrance", "bottle" or "additive"
+    filename = Column(String, nullable=True)
+    file_sha256 = Column(String, nullable=False) # Identifies the file when the import is run again
+    chunk_size = Column(Integer, nullable=False)
+    status = Column(String, nullable=False, default="running") # "running", "failed", "completed"
+    rows_processed = Column(Integer, nullable=False, default=0) # Data rows committed (or rejected) so far
+    created_count = Column(Integer, nullable=False, default=0)
+    updated_count = Column(Integer, nullable=False, default=0)
+    rejected_count = Column(Integer, nullable=False, default=0)
+    error = Column(Text, nullable=True) # Why the last run stopped, when it failed
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now())
+
+    __table_args__ = (
+        Index("ix_import_jobs_kind_file_sha256", "kind", "file_sha256"),
+    )
+
+    def __repr__(self):
+        return f"<ImportJob({self.kind} '{self.filename}': {self.status}, {self.rows_processed} rows)>"
+
+class ImportRejectedRow(Base):
+    __tablename__ = "import_rejected_rows"
+
+    # Rows of an import that failed validation; kept so a large import can be fixed and re-sent
+    id = Column(Integer, primary_key=True, index=True)
+    job_id = Column(Integer, ForeignKey("import_jobs.id"), nullable=False)
+    row_number = Column(Integer, nullable=False) # 1-based data row of the file, header excluded
+    key = Column(String, nullable=True) # internal_name or name, when the row had one
+    error = Column(Text, nullable=False)
+
+    __table_args__ = (
+        Index("ix_import_rejected_rows_job_id", "job_id", "id"),
+    )
+
+    def __repr__(self):
+        return f"<ImportRejectedRow(job={self.job_id}, row={self.row_number})>"
+
 # End of inventory models for now 
\ No newline at end of file
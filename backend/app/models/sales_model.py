@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, DateTime, Text, Float, Boolean, ForeignKey, JSON
+from sqlalchemy import Column, Integer, String, DateTime, Text, Float, Boolean, ForeignKey, JSON, UniqueConstraint, Index
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from ..database import Base
@@ -9,6 +9,9 @@ class Customer(Base):
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String, nullable=False, index=True)
     whatsapp = Column(String, nullable=True, index=True)
+    # Digits-only WhatsApp with country code (e.g. "573001234567"), set on every write.
+    # Unique so the same number cannot be registered twice.
+    whatsapp_normalized = Column(String, nullable=True, unique=True, index=True)
     email = Column(String, nullable=True)
     notes = Column(Text, nullable=True)
     
@@ -86,6 +89,14 @@ class Sale(Base):
     customer = relationship("Customer", back_populates="sales")
     sale_items = relationship("SaleItem", back_populates="sale", cascade="all, delete-orphan")
 
+    # Composite indexes for date-range reports and customer history. Their leading
+    # columns also serve plain sale_date and customer_id lookups.
+    # Existing databases get these through app/migrations.py.
+    __table_args__ = (
+        Index("ix_sales_sale_date_payment_method", "sale_date", "payment_method"),
+        Index("ix_sales_customer_id_sale_date", "customer_id", "sale_date"),
+    )
+
     def __repr__(self):
         return f"<Sale(id={self.id}, total=${self.total_amount}, date='{self.sale_date}')>"
 
@@ -93,15 +104,15 @@ class SaleItem(Base):
     __tablename__ = "sale_items"
 
     id = Column(Integer, primary_key=True, index=True)
-    sale_id = Column(Integer, ForeignKey("sales.id"), nullable=False)
+    sale_id = Column(Integer, ForeignKey("sales.id"), nullable=False, index=True)
     
     # Product information
     product_type = Column(String, nullable=False)  # "perfume", "finished_product", "humidifier", "essence", "individual_item"
     
     # For perfumes (custom made)
-    fragrance_id = Column(Integer, ForeignKey("fragrances.id"), nullable=True)
+    fragrance_id = Column(Integer, ForeignKey("fragrances.id"), nullable=True, index=True)
     bottle_id = Column(Integer, ForeignKey("bottles.id"), nullable=True)
-    recipe_id = Column(Integer, ForeignKey("recipes.id"), nullable=True)
+    recipe_id = Column(Integer, ForeignKey("recipes.id"), nullable=True, index=True)
     size_ml = Column(Integer, nullable=True)  # 30, 50, 100
     fragrance_type = Column(String, nullable=True)  # "tradicional", "nicho"
     has_pheromones = Column(Boolean, default=False)
@@ -131,4 +142,27 @@ class SaleItem(Base):
     sale = relationship("Sale", back_populates="sale_items")
 
     def __repr__(self):
-        return f"<SaleItem(name='{self.item_name}', qty={self.quantity}, price=${self.unit_price})>" 
\ No newline at end of file
+        return f"<SaleItem(name='{self.item_name}', qty={self.quantity}, price=${self.unit_price})>" 
+
+class SalesRollup(Base):
+    __tablename__ = "sales_rollups"
+
+    id = Column(Integer, primary_key=True, index=True)
+
+    # Bucket this row aggregates
+    granularity = Column(String, nullable=False)  # "hour", "day"
+    bucket = Column(String, nullable=False)  # "2025-01-31" for days, "2025-01-31 14:00" for hours
+    payment_method = Column(String, nullable=False)
+
+    # Running totals, maintained by create_sale and rebuilt by rebuild_sales_rollups
+    sale_count = Column(Integer, nullable=False, default=0)
+    revenue = Column(Float, nullable=False, default=0.0)  # Sum of total_amount
+    discount_amount = Column(Float, nullable=False, default=0.0)
+    surcharge_amount = Column(Float, nullable=False, default=0.0)
+
+    __table_args__ = (
+        UniqueConstraint("granularity", "bucket", "payment_method", name="uq_sales_rollups_bucket"),
+    )
+
+    def __repr__(self):
+        return f"<SalesRollup({self.granularity}='{self.bucket}', method='{self.payment_method}', revenue=${self.revenue})>"
\ No newline at end of file
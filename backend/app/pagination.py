@@ -0,0 +1,160 @@
+"""
+Keyset (cursor) pagination shared by the CRUD layer and the routers.
+
+List endpoints keep skip/limit (OFFSET) and also accept an opaque `cursor`. The
+cursor encodes the (sort key, id) of the last row on the previous page, and the
+next page is read with WHERE (sort key, id) > cursor. That is an index seek, so
+page 5000 costs the same as page 1, and rows inserted meanwhile never shift a page.
+The cursor for the next page is returned in the X-Next-Cursor response header.
+"""
+
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, List, Optional, Sequence
+
+from fastapi import HTTPException, Query, Request, Response
+from fastapi.responses import JSONResponse
+from sqlalchemy import DateTime, String, and_, func, literal, or_, select
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+class InvalidCursor(ValueError):
+    """
+    Raised for a malformed cursor or one taken from a different list; answered with a 400.
+    """
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    payload = json.dumps([value.isoformat() if isinstance(value, datetime) else value for value in values])
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+def decode_cursor(cursor: str) -> list:
+    """
+    Decode a cursor produced by encode_cursor. Raises InvalidCursor if it is malformed.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+    except (binascii.Error, UnicodeError, json.JSONDecodeError) as e:
+        raise InvalidCursor(f"Invalid cursor: {e}")
+    if not isinstance(values, list):
+        raise InvalidCursor("Invalid cursor")
+    return values
+
+def cursor_param(
+    cursor: Optional[str] = Query(None, description="Opaque cursor from the X-Next-Cursor header of the previous page")
+) -> Optional[list]:
+    """
+    FastAPI dependency that decodes the `cursor` query parameter (400 if it is malformed).
+    """
+    if cursor is None:
+        return None
+    try:
+        return decode_cursor(cursor)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+async def invalid_cursor_handler(request: Request, exc: InvalidCursor) -> JSONResponse:
+    """
+    Exception handler registered in main.py for cursors rejected by a Keyset.
+    """
+    return JSONResponse(status_code=400, content={"detail": str(exc)})
+
+def _is_whole_second(column, value) -> bool:
+    """
+    SQLite keeps datetimes as text: SQLAlchemy writes "2025-01-31 10:00:00.000000", but
+    CURRENT_TIMESTAMP defaults and raw inserts write "2025-01-31 10:00:00". A whole
+    second can be stored either way, and the two sort apart as text.
+    """
+    return isinstance(column.type, DateTime) and isinstance(value, datetime) and not value.microsecond
+
+class Keyset:
+    """
+    A stable list order (an optional sort column, then the primary key) that can be
+    paginated with OFFSET or with a keyset cursor.
+    """
+
+    def __init__(self, id_column, sort_column=None, descending: bool = False):
+        self.id_column = id_column
+        self.sort_column = sort_column
+        self.descending = descending
+        self.columns = [sort_column, id_column] if sort_column is not None else [id_column]
+
+    def _cursor_values(self, cursor: list) -> list:
+        """
+        The cursor's values as the list's column types. A cursor is client input, so
+        one of another length or with values of other types (null, a string for an id)
+        is rejected rather than compared.
+        """
+        if len(cursor) != len(self.columns):
+            raise InvalidCursor("Cursor does not belong to this list")
+        values = []
+        for column, value in zip(self.columns, cursor):
+            if isinstance(column.type, DateTime) and isinstance(value, str):
+                try:
+                    value = datetime.fromisoformat(value)
+                except ValueError:
+                    raise InvalidCursor("Cursor does not belong to this list")
+            expected = column.type.python_type
+            # bool is an int subclass, and JSON numbers may decode as either int or float
+            if isinstance(value, bool) or not isinstance(value, (int, float) if expected in (int, float) else expected):
+                raise InvalidCursor("Cursor does not belong to this list")
+            if expected is int and isinstance(value, float):
+                if not value.is_integer():
+                    raise InvalidCursor("Cursor does not belong to this list")
+                value = int(value)
+            values.append(value)
+        return values
+
+    def _seek_value(self, column, value, row_id):
+        """
+        What to compare `column` against to continue after the row `row_id`. A whole
+        second can be stored in either of two forms (see _is_whole_second), so the
+        cursor's value alone cannot place the row between them; the row's own stored
+        text can. If the row was deleted since, fall back to the form that sorts first
+        in this direction, which may repeat a row on the next page but never skips one.
+        """
+        if not _is_whole_second(column, value):
+            return value
+        stored = select(column).where(self.id_column == row_id).correlate(None).scalar_subquery()
+        first = value if self.descending else literal(value.isoformat(sep=" "), String)
+        return func.coalesce(stored, first)
+
+    def _after(self, values: list):
+        values = [self._seek_value(column, value, values[-1]) for column, value in zip(self.columns, values)]
+        # (a, b) > (x, y)  <=>  a > x OR (a = x AND b > y); reversed for descending order
+        condition = None
+        for column, value in reversed(list(zip(self.columns, values))):
+            past = column < value if self.descending else column > value
+            condition = past if condition is None else or_(past, and_(column == value, condition))
+        # Implied by the above, but a plain bound on the leading column is what lets the
+        # planner seek into the index instead of scanning it
+        leading = self.columns[0]
+        return and_(leading <= values[0] if self.descending else leading >= values[0], condition)
+
+    def paginate(self, query, skip: int = 0, limit: int = 100, cursor: Optional[list] = None) -> List[Any]:
+        """
+        Order the query and return one page, from the cursor if given, else from skip.
+        """
+        if cursor is not None:
+            query = query.filter(self._after(self._cursor_values(cursor)))
+            skip = 0
+        order = [column.desc() if self.descending else column.asc() for column in self.columns]
+        return query.order_by(*order).offset(skip).limit(limit).all()
+
+    def next_cursor(self, items: Sequence[Any], limit: int) -> Optional[str]:
+        """
+        Cursor for the page after `items`, or None if this was the last page.
+        """
+        if not items or len(items) < limit:
+            return None
+        last = items[-1]
+        if isinstance(last, dict):  # Column-projected rows
+            return encode_cursor([last[column.key] for column in self.columns])
+        return encode_cursor([getattr(last, column.key) for column in self.columns])
+
+def set_next_cursor(response: Response, keyset: Keyset, items: Sequence[Any], limit: int) -> None:
+    next_cursor = keyset.next_cursor(items, limit)
+    if next_cursor is not None:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
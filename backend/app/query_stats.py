@@ -0,0 +1,189 @@
+"""
+Per-request SQL statistics and the slow-query log.
+
+instrument_engine() times every statement with SQLAlchemy cursor events. While a
+request is being served (QueryStatsMiddleware), its statements are added up in a
+QueryStats held in a context variable, which FastAPI's threadpool copies into sync
+endpoints. When the request ends one structured line is logged to "app.query_stats":
+
+    {"method": "GET", "path": "/sales/sales/", "status": 200, "duration_ms": 12.4,
+     "queries": 3, "db_ms": 4.1, "slowest_ms": 2.9, "slowest_statement": "SELECT ..."}
+
+Clients opt in to the same numbers as X-DB-* response headers with the request
+header "X-Query-Stats: 1", or for every request with PERFUM_CRM_QUERY_STATS_HEADERS=1.
+
+Statements slower than PERFUM_CRM_SLOW_QUERY_MS (default 200) are logged to
+"app.query_stats.slow" with their parameters and EXPLAIN QUERY PLAN, from requests
+and scripts alike. PERFUM_CRM_SLOW_QUERY_LOG=<file> also writes them to that file.
+"""
+
+import json
+import logging
+import os
+import re
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from sqlalchemy import event
+
+logger = logging.getLogger(__name__)
+slow_query_logger = logging.getLogger(f"{__name__}.slow")
+
+SLOW_QUERY_MS = float(os.getenv("PERFUM_CRM_SLOW_QUERY_MS", "200"))
+HEADERS_ALWAYS = os.getenv("PERFUM_CRM_QUERY_STATS_HEADERS", "0").lower() in ("1", "true", "yes")
+SLOW_QUERY_LOG = os.getenv("PERFUM_CRM_SLOW_QUERY_LOG")
+
+OPT_IN_HEADER = b"x-query-stats"
+QUERY_COUNT_HEADER = "X-DB-Query-Count"
+DB_TIME_HEADER = "X-DB-Time-Ms"
+SLOWEST_MS_HEADER = "X-DB-Slowest-Ms"
+SLOWEST_STATEMENT_HEADER = "X-DB-Slowest-Statement"
+RESPONSE_HEADERS = [QUERY_COUNT_HEADER, DB_TIME_HEADER, SLOWEST_MS_HEADER, SLOWEST_STATEMENT_HEADER]
+
+MAX_HEADER_STATEMENT = 200  # Characters of the slowest statement sent in its header
+EXPLAINABLE = re.compile(r"^\s*(SELECT|INSERT|UPDATE|DELETE|WITH)\b", re.IGNORECASE)
+
+if SLOW_QUERY_LOG:
+    _file_handler = logging.FileHandler(SLOW_QUERY_LOG)
+    _file_handler.setFormatter(logging.Formatter("%(asctime)s %(message)s"))
+    slow_query_logger.addHandler(_file_handler)
+    slow_query_logger.setLevel(logging.WARNING)
+
+class QueryStats:
+    """
+    Statements run while serving one request.
+    """
+
+    __slots__ = ("count", "total_ms", "slowest_ms", "slowest_statement")
+
+    def __init__(self):
+        self.count = 0
+        self.total_ms = 0.0
+        self.slowest_ms = 0.0
+        self.slowest_statement: Optional[str] = None
+
+    def add(self, statement: str, elapsed_ms: float) -> None:
+        self.count += 1
+        self.total_ms += elapsed_ms
+        if elapsed_ms >= self.slowest_ms:
+            self.slowest_ms = elapsed_ms
+            self.slowest_statement = statement
+
+    def headers(self) -> list:
+        statement = " ".join((self.slowest_statement or "").split())[:MAX_HEADER_STATEMENT]
+        return [
+            (QUERY_COUNT_HEADER.encode(), str(self.count).encode()),
+            (DB_TIME_HEADER.encode(), f"{self.total_ms:.2f}".encode()),
+            (SLOWEST_MS_HEADER.encode(), f"{self.slowest_ms:.2f}".encode()),
+            (SLOWEST_STATEMENT_HEADER.encode(), statement.encode("ascii", "replace")),
+        ]
+
+_current_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+def current_stats() -> Optional[QueryStats]:
+    """
+    Statistics of the request being served, or None outside a request.
+    """
+    return _current_stats.get()
+
+def _explain(cursor, statement: str, parameters) -> str:
+    if not EXPLAINABLE.match(statement):
+        return "(not explainable)"
+    if isinstance(parameters, list):  # executemany: the plan of the first row
+        parameters = parameters[0] if parameters else ()
+    explain_cursor = cursor.connection.cursor()
+    try:
+        explain_cursor.execute(f"EXPLAIN QUERY PLAN {statement}", parameters or ())
+        return "\n".join(f"{row[0]}|{row[1]}|{row[3]}" for row in explain_cursor.fetchall())
+    except Exception as e:  # The plan is a diagnostic; never fail the statement over it
+        return f"(EXPLAIN failed: {e})"
+    finally:
+        explain_cursor.close()
+
+def instrument_engine(engine) -> None:
+    """
+    Time every statement run on `engine`, for request statistics and the slow-query log.
+    Statements that raise (a duplicate name's IntegrityError) are counted too.
+    """
+    explain = engine.dialect.name == "sqlite"
+
+    def record(cursor, statement, parameters, context, executemany, failed=False):
+        # The start time lives on the statement's own execution context, so a statement
+        # that raises leaves nothing behind on the pooled connection
+        started = getattr(context, "query_started", None)
+        if started is None:
+            return
+        del context.query_started
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        stats = _current_stats.get()
+        if stats is not None:
+            stats.add(statement, elapsed_ms)
+        if elapsed_ms >= SLOW_QUERY_MS:
+            slow_query_logger.warning(
+                "Slow query (%.1f ms%s): %s\nParameters: %r\nPlan:\n%s",
+                elapsed_ms, ", failed" if failed else "", statement,
+                parameters if not executemany else f"{len(parameters)} rows",
+                _explain(cursor, statement, parameters) if explain and cursor is not None else "(not available)"
+            )
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def start_timer(conn, cursor, statement, parameters, context, executemany):
+        if context is not None:
+            context.query_started = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def stop_timer(conn, cursor, statement, parameters, context, executemany):
+        record(cursor, statement, parameters, context, executemany)
+
+    @event.listens_for(engine, "handle_error")
+    def stop_timer_on_error(exception_context):
+        context = exception_context.execution_context
+        if context is not None and exception_context.statement is not None:
+            record(context.cursor, exception_context.statement, exception_context.parameters,
+                   context, context.executemany, failed=True)
+
+class QueryStatsMiddleware:
+    """
+    ASGI middleware that collects the QueryStats of each HTTP request, logs them, and
+    adds them as X-DB-* headers when the client asked for them. Statements run while a
+    streaming body is sent are logged but cannot be in the headers, sent before them.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats()
+        token = _current_stats.set(stats)
+        started = time.perf_counter()
+        wants_headers = HEADERS_ALWAYS or dict(scope["headers"]).get(OPT_IN_HEADER, b"").lower() in (b"1", b"true", b"yes")
+        status = 500
+
+        async def send_with_stats(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if wants_headers:
+                    message = {**message, "headers": [*message.get("headers", []), *stats.headers()]}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_stats)
+        finally:
+            _current_stats.reset(token)
+            if logger.isEnabledFor(logging.INFO):
+                logger.info(json.dumps({
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "status": status,
+                    "duration_ms": round((time.perf_counter() - started) * 1000, 2),
+                    "queries": stats.count,
+                    "db_ms": round(stats.total_ms, 2),
+                    "slowest_ms": round(stats.slowest_ms, 2),
+                    "slowest_statement": stats.slowest_statement,
+                }))
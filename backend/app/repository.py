@@ -0,0 +1,286 @@
+"""
+Generic single-table repository shared by the CRUD layer and the routers.
+
+A Repository wraps one model with the operations every inventory resource needs:
+get / get_many / list / project for reads, and create / update / update_many /
+delete / delete_many for writes. Writes are single INSERT, UPDATE or DELETE ...
+RETURNING statements (chunked for batches), and name uniqueness is left to the
+unique constraints. Resource-specific behaviour, such as stock ledger entries or
+alcohol cost state, is added by subclassing the _write_* hooks.
+
+Every operation runs through _instrumented, which logs its duration, and every
+committed write through _committed, which runs the on_change callbacks (cache
+invalidation). Both are the single place to extend for caching and metrics.
+
+Repositories created with cached=True read get / get_many through a ReadCache
+(app/cache.py); the table needs the invalidation triggers of migration 7.
+"""
+
+import functools
+import logging
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+from fastapi import Depends, HTTPException, Query
+from pydantic import BaseModel
+from sqlalchemy import delete, insert, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+
+from .cache import CACHE_SIZE, ReadCache, log_position
+from .pagination import Keyset
+
+logger = logging.getLogger(__name__)
+
+CHUNK_IDS = 500  # Ids per IN (...) list, well under SQLite's bound parameter limit
+MAX_GET_IDS = 1000  # Ids per batch GET or DELETE request
+
+class DuplicateNameError(ValueError):
+    """
+    Raised when a create or update would give an item the unique name (internal_name
+    for fragrances) of another item. The transaction is rolled back; routers answer 400.
+    """
+    def __init__(self, name: str):
+        self.name = name
+        super().__init__(f"'{name}' already exists")
+
+def ids_param(
+    ids: Optional[List[str]] = Query(
+        None, description="Comma-separated ids (or the parameter repeated)"
+    )
+) -> Optional[List[int]]:
+    """
+    FastAPI dependency that parses the `ids` query parameter of batch GETs and DELETEs
+    (400 if malformed).
+    """
+    if ids is None:
+        return None
+    try:
+        parsed = [int(part) for value in ids for part in value.split(",") if part.strip()]
+    except ValueError:
+        raise HTTPException(status_code=400, detail="ids must be comma-separated integers")
+    if not parsed:
+        raise HTTPException(status_code=400, detail="ids must not be empty")
+    if len(parsed) > MAX_GET_IDS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_GET_IDS} ids per request")
+    return parsed
+
+def required_ids_param(ids: Optional[List[int]] = Depends(ids_param)) -> List[int]:
+    """
+    ids_param for endpoints that need ids (batch DELETE); 400 if there are none.
+    """
+    if ids is None:
+        raise HTTPException(status_code=400, detail="ids is required")
+    return ids
+
+def _chunks(ids: Sequence[int], size: int = CHUNK_IDS) -> Iterable[Sequence[int]]:
+    for start in range(0, len(ids), size):
+        yield ids[start:start + size]
+
+def _instrumented(method: Callable) -> Callable:
+    @functools.wraps(method)
+    def timed(self: "Repository", *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            return method(self, *args, **kwargs)
+        finally:
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("%s.%s took %.2f ms", self.model.__name__, method.__name__,
+                             (time.perf_counter() - started) * 1000)
+    return timed
+
+class Repository:
+    """
+    CRUD for one model. `unique_name` is the column with a unique constraint that
+    duplicates are reported on (None if names may repeat); `filters` are the columns
+    list() and project() accept equality filters on. `cached` puts a read cache in
+    front of get() and get_many().
+    """
+
+    def __init__(self, model, keyset: Keyset, unique_name: Optional[str] = "name",
+                 filters: Sequence[str] = (), on_change: Sequence[Callable[[], None]] = (),
+                 cached: bool = False):
+        self.model = model
+        self.keyset = keyset
+        self.unique_name = unique_name
+        self.filters = tuple(filters)
+        self.on_change = tuple(on_change)
+        self.cache = ReadCache(model) if cached and CACHE_SIZE > 0 else None
+
+    # Reads
+
+    @_instrumented
+    def get(self, db: Session, item_id: int):
+        if self.cache is None:
+            return db.get(self.model, item_id)
+        return self.get_many(db, [item_id])[0]
+
+    @_instrumented
+    def get_many(self, db: Session, ids: Sequence[int]) -> List[Optional[Any]]:
+        """
+        The items with these ids, in the same order, with None for missing ids.
+        Cached items are served from the cache; the rest take one IN (...) query per
+        CHUNK_IDS distinct ids.
+        """
+        if self.cache is None:
+            found: Dict[int, Any] = {}
+            for chunk in _chunks(list(dict.fromkeys(ids))):
+                found.update((item.id, item) for item in db.scalars(select(self.model).where(self.model.id.in_(chunk))))
+            return [found.get(item_id) for item_id in ids]
+
+        found = self.cache.lookup(db, ids)
+        missing = [item_id for item_id in dict.fromkeys(ids) if item_id not in found]
+        generation = self.cache.generation
+        for chunk in _chunks(missing):
+            rows = db.execute(select(self.model, log_position()).where(self.model.id.in_(chunk))).all()
+            loaded = [item for item, _ in rows]
+            if loaded:
+                self.cache.store(generation, rows[0][1], loaded)
+            found.update((item.id, item) for item in loaded)
+        return [found.get(item_id) for item_id in ids]
+
+    @_instrumented
+    def get_by_name(self, db: Session, name: str):
+        column = getattr(self.model, self.unique_name)
+        return db.scalars(select(self.model).where(column == name)).first()
+
+    def _filtered(self, query, filters: Dict[str, Any]):
+        for name, value in filters.items():
+            if name not in self.filters:
+                raise ValueError(f"Cannot filter {self.model.__tablename__} by '{name}'")
+            if value is not None:  # An unset query parameter does not filter
+                query = query.filter(getattr(self.model, name) == value)
+        return query
+
+    @_instrumented
+    def list(self, db: Session, skip: int = 0, limit: int = 100, cursor: Optional[list] = None, **filters) -> List[Any]:
+        """
+        One page in keyset order (skip/limit or a keyset cursor), optionally filtered.
+        """
+        return self.keyset.paginate(self._filtered(db.query(self.model), filters), skip, limit, cursor)
+
+    @_instrumented
+    def project(self, db: Session, fields: Sequence[str], skip: int = 0, limit: int = 100,
+                cursor: Optional[list] = None, **filters) -> List[Dict[str, Any]]:
+        """
+        Like list(), but reads only the given columns and returns plain dicts. The keyset
+        columns are always read too, so the page can be continued with a cursor.
+        """
+        table_columns = self.model.__table__.c
+        unknown = [field for field in fields if field not in table_columns]
+        if unknown:
+            raise ValueError(f"Unknown {self.model.__tablename__} field(s): {', '.join(unknown)}")
+        names = list(dict.fromkeys([*fields, *(column.key for column in self.keyset.columns)]))
+        query = self._filtered(db.query(*(getattr(self.model, name) for name in names)), filters)
+        return [row._asdict() for row in self.keyset.paginate(query, skip, limit, cursor)]
+
+    # Writes
+
+    @contextmanager
+    def _unique(self, db: Session, values: dict):
+        name = values.get(self.unique_name) if self.unique_name else None
+        try:
+            yield
+        except IntegrityError as e:
+            db.rollback()
+            if name is not None and "UNIQUE constraint failed" in str(e.orig):
+                raise DuplicateNameError(name) from e
+            raise
+
+    def _committed(self, db: Session, ids: Iterable[int] = ()) -> None:
+        # The written rows were loaded by RETURNING: keep them loaded through this commit
+        # instead of expiring them, which would cost a SELECT per response to read the
+        # same values back (and fail for deleted rows)
+        expire_on_commit = db.expire_on_commit
+        db.expire_on_commit = False
+        try:
+            db.commit()
+        finally:
+            db.expire_on_commit = expire_on_commit
+        if self.cache is not None and ids:
+            self.cache.invalidate(ids)
+        for callback in self.on_change:
+            callback()
+
+    def _write_insert(self, db: Session, item: BaseModel):
+        return db.scalar(insert(self.model).values(**item.model_dump()).returning(self.model))
+
+    def _write_update(self, db: Session, ids: Sequence[int], values: dict) -> List[Any]:
+        rows = []
+        for chunk in _chunks(ids):
+            rows.extend(db.scalars(
+                update(self.model).where(self.model.id.in_(chunk)).values(**values).returning(self.model)
+            ))
+        return rows
+
+    def _write_delete(self, db: Session, ids: Sequence[int]) -> List[Any]:
+        rows = []
+        for chunk in _chunks(ids):
+            rows.extend(db.scalars(delete(self.model).where(self.model.id.in_(chunk)).returning(self.model)))
+        return rows
+
+    @staticmethod
+    def _in_request_order(ids: Sequence[int], rows: List[Any]) -> List[Any]:
+        # RETURNING rows come back in no set order
+        position = {item_id: index for index, item_id in enumerate(ids)}
+        return sorted(rows, key=lambda row: position[row.id])
+
+    @_instrumented
+    def create(self, db: Session, item: BaseModel):
+        """
+        Insert an item and return it. Raises DuplicateNameError if its name is taken.
+        """
+        with self._unique(db, item.model_dump()):
+            row = self._write_insert(db, item)
+        self._committed(db)
+        return row
+
+    @_instrumented
+    def update(self, db: Session, item_id: int, item_update: BaseModel):
+        """
+        Apply the fields set in `item_update` and return the item, or None if there is
+        no such item. Raises DuplicateNameError if the new name is taken.
+        """
+        rows = self.update_many(db, [item_id], item_update)
+        return rows[0] if rows else None
+
+    @_instrumented
+    def update_many(self, db: Session, ids: Sequence[int], item_update: BaseModel) -> List[Any]:
+        """
+        Apply the same fields to every item in `ids` and return the updated items, in
+        request order; missing ids are skipped. Nothing is written if none exist.
+        """
+        ids = list(dict.fromkeys(ids))
+        values = item_update.model_dump(exclude_unset=True)
+        if not values:
+            return [row for row in self.get_many(db, ids) if row is not None]
+        with self._unique(db, values):
+            rows = self._write_update(db, ids, values)
+        if not rows:
+            db.rollback()
+            return []
+        self._committed(db, ids)
+        return self._in_request_order(ids, rows)
+
+    @_instrumented
+    def delete(self, db: Session, item_id: int):
+        """
+        Delete an item and return it as it was, or None if there is no such item.
+        """
+        rows = self.delete_many(db, [item_id])
+        return rows[0] if rows else None
+
+    @_instrumented
+    def delete_many(self, db: Session, ids: Sequence[int]) -> List[Any]:
+        """
+        Delete every item in `ids` and return the deleted items, in request order;
+        missing ids are skipped.
+        """
+        ids = list(dict.fromkeys(ids))
+        rows = self._write_delete(db, ids)
+        if not rows:
+            db.rollback()
+            return []
+        self._committed(db, ids)
+        return self._in_request_order(ids, rows)
@@ -1,10 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Body, Depends, HTTPException, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from typing import List, Optional # Kept for future use, e.g., for listing items
+import os
+import tempfile
+from datetime import datetime
+from typing import Any, Dict, List, Optional
 
 from ..schemas import inventory_schema
-from ..crud import inventory_crud
+from ..crud import alcohol_costing_crud, catalogue_import_crud, inventory_bulk_crud, inventory_crud, inventory_ledger_crud
 from ..database import get_db # Dependency to get DB session
+from ..repository import DuplicateNameError, ids_param, required_ids_param
+from ..pagination import cursor_param, set_next_cursor
 
 router = APIRouter(
     prefix="/inventory", # All routes in this router will start with /inventory
@@ -12,500 +18,803 @@ router = APIRouter(
     responses={404: {"description": "Not found"}}, # Default response for 404
 )
 
-# Endpoint to create a new fragrance
+# --- Item Endpoints ---
+#
+# Every inventory resource has the same endpoints, backed by its repository
+# (inventory_crud.REPOSITORIES): create, list, read, update and delete one item, plus
+# batch get (GET on the collection with ?ids=), batch update (PATCH on the collection
+# with {ids, values}), batch delete (DELETE on the collection with ?ids=, at most
+# repository.MAX_GET_IDS), column-projected lists (/columns/, only the columns named
+# in `fields` plus the list order) and bulk upserts (/bulk, where existing items only
+# get the fields a row sends). Lists are paginated with skip/limit or with the
+# X-Next-Cursor header of the previous page as `cursor`. The helpers below hold what
+# the endpoints of every resource share.
+
+def _name_label(repository) -> str:
+    return repository.unique_name.replace("_", " ")
+
+def _create_item(repository, label: str, item, db: Session):
+    try:
+        return repository.create(db, item)
+    except DuplicateNameError as e:
+        raise HTTPException(status_code=400, detail=f"{label} with {_name_label(repository)} '{e.name}' already exists.")
+
+def _read_items(repository, response: Response, skip: int, limit: int, cursor: Optional[list],
+                ids: Optional[List[int]], db: Session, **filters):
+    if ids is not None:
+        return repository.get_many(db, ids)
+    items = repository.list(db, skip=skip, limit=limit, cursor=cursor, **filters)
+    set_next_cursor(response, repository.keyset, items, limit)
+    return items
+
+def _read_item_columns(repository, response: Response, fields: List[str], skip: int, limit: int,
+                       cursor: Optional[list], db: Session, **filters):
+    try:
+        rows = repository.project(db, fields, skip=skip, limit=limit, cursor=cursor, **filters)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    set_next_cursor(response, repository.keyset, rows, limit)
+    return rows
+
+def _update_items(repository, label: str, batch, db: Session):
+    try:
+        return repository.update_many(db, batch.ids, batch.values)
+    except DuplicateNameError as e:
+        raise HTTPException(status_code=400, detail=f"Another {label.lower()} with {_name_label(repository)} '{e.name}' already exists.")
+
+def _read_item(repository, label: str, item_id: int, db: Session):
+    item = repository.get(db, item_id)
+    if item is None:
+        raise HTTPException(status_code=404, detail=f"{label} with ID {item_id} not found")
+    return item
+
+def _update_item(repository, label: str, item_id: int, item_update, db: Session):
+    try:
+        item = repository.update(db, item_id, item_update)
+    except DuplicateNameError as e:
+        raise HTTPException(status_code=400, detail=f"Another {label.lower()} with {_name_label(repository)} '{e.name}' already exists.")
+    if item is None:
+        raise HTTPException(status_code=404, detail=f"{label} with ID {item_id} not found for update")
+    return item
+
+def _delete_item(repository, label: str, item_id: int, db: Session):
+    item = repository.delete(db, item_id)
+    if item is None:
+        raise HTTPException(status_code=404, detail=f"{label} with ID {item_id} not found for deletion")
+    return item # Returns the deleted item as confirmation
+
+def _bulk_upsert(kind: str, rows: List[Any], db: Session):
+    try:
+        return inventory_bulk_crud.bulk_upsert(db, kind=kind, rows=rows)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+# --- Fragrance Endpoints ---
+
 @router.post("/fragrances/", response_model=inventory_schema.Fragrance, status_code=201)
-def create_new_fragrance(
-    fragrance: inventory_schema.FragranceCreate, 
+def create_new_fragrance(fragrance: inventory_schema.FragranceCreate, db: Session = Depends(get_db)):
+    """
+    Create a new fragrance. The internal name must be unique; a taken one is rejected with a
+    400.
+    """
+    return _create_item(inventory_crud.fragrances, "Fragrance", fragrance, db)
+
+@router.get("/fragrances/", response_model=List[Optional[inventory_schema.Fragrance]])
+def read_fragrances(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[list] = Depends(cursor_param),
+    ids: Optional[List[int]] = Depends(ids_param),
     db: Session = Depends(get_db)
 ):
     """
-    Create a new fragrance.
-
-    - **internal_name**: Internal name for the fragrance (required)
-    - **inspiration_name**: Optional name of the original perfume inspiration
-    - **house**: Optional perfume house of the inspiration
-    - **description**: Optional description
-    - **supplier_name**: Optional supplier name
-    - **cost_per_g**: Cost per gram (required)
-    - **stock_g**: Current stock in grams (defaults to 0.0)
-    - **min_stock_g**: Optional minimum stock in grams (defaults to 0.0)
-    """
-    # Optional: Check if fragrance with the same internal_name already exists.
-    # This would require a get_fragrance_by_internal_name function in inventory_crud.py.
-    existing_fragrance = inventory_crud.get_fragrance_by_internal_name(db, internal_name=fragrance.internal_name)
-    if existing_fragrance:
-        raise HTTPException(status_code=400, detail=f"Fragrance with internal name '{fragrance.internal_name}' already exists.")
-    
-    created_fragrance = inventory_crud.create_fragrance(db=db, fragrance=fragrance)
-    return created_fragrance
-
-@router.get("/fragrances/", response_model=List[inventory_schema.Fragrance])
-def read_fragrances(
-    skip: int = 0, 
-    limit: int = 100, 
+    Retrieve a list of fragrances. With `ids` (e.g. ?ids=3,1,7), returns exactly those
+    fragrances in that order, with null for ids that do not exist; the other parameters are
+    ignored.
+    """
+    return _read_items(inventory_crud.fragrances, response, skip, limit, cursor, ids, db)
+
+@router.get("/fragrances/columns/", response_model=List[Dict[str, Any]])
+def read_fragrance_columns(
+    response: Response,
+    fields: List[str] = Query(..., min_length=1),
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[list] = Depends(cursor_param),
     db: Session = Depends(get_db)
 ):
     """
-    Retrieve a list of fragrances with pagination.
-    - **skip**: Number of items to skip (for pagination).
-    - **limit**: Maximum number of items to return (for pagination).
+    Like the fragrances list, but only the columns named in `fields` (repeat the parameter).
     """
-    fragrances = inventory_crud.get_fragrances(db, skip=skip, limit=limit)
-    return fragrances
+    return _read_item_columns(inventory_crud.fragrances, response, fields, skip, limit, cursor, db)
+
+@router.patch("/fragrances/", response_model=List[inventory_schema.Fragrance])
+def update_fragrances(batch: inventory_schema.BatchUpdate[inventory_schema.FragranceUpdate], db: Session = Depends(get_db)):
+    """
+    Set the same fields on every fragrance in `ids`. Returns the updated fragrances in
+    request order; ids that do not exist are skipped.
+    """
+    return _update_items(inventory_crud.fragrances, "Fragrance", batch, db)
+
+@router.delete("/fragrances/", response_model=List[inventory_schema.Fragrance])
+def delete_fragrances(ids: List[int] = Depends(required_ids_param), db: Session = Depends(get_db)):
+    """
+    Delete every fragrance in `ids`. Returns the deleted fragrances in request order; ids
+    that do not exist are skipped.
+    """
+    return inventory_crud.fragrances.delete_many(db, ids)
+
+@router.post("/fragrances/bulk", response_model=inventory_schema.BulkUpsertResult)
+def bulk_upsert_fragrances(rows: List[Any] = Body(...), db: Session = Depends(get_db)):
+    """
+    Create or update many fragrances in one request, committed once. Each row has the fields
+    of a single create; rows are matched on their internal name. Invalid rows are reported
+    in `results` and skipped.
+    """
+    return _bulk_upsert("fragrance", rows, db)
 
 @router.get("/fragrances/{fragrance_id}", response_model=inventory_schema.Fragrance)
 def read_fragrance(fragrance_id: int, db: Session = Depends(get_db)):
     """
     Retrieve a specific fragrance by its ID.
-    - **fragrance_id**: The ID of the fragrance to retrieve.
     """
-    db_fragrance = inventory_crud.get_fragrance(db, fragrance_id=fragrance_id)
-    if db_fragrance is None:
-        raise HTTPException(status_code=404, detail=f"Fragrance with ID {fragrance_id} not found")
-    return db_fragrance
+    return _read_item(inventory_crud.fragrances, "Fragrance", fragrance_id, db)
 
 @router.put("/fragrances/{fragrance_id}", response_model=inventory_schema.Fragrance)
-def update_existing_fragrance(
-    fragrance_id: int, 
-    fragrance_update: inventory_schema.FragranceUpdate, 
-    db: Session = Depends(get_db)
-):
+def update_existing_fragrance(fragrance_id: int, fragrance_update: inventory_schema.FragranceUpdate, db: Session = Depends(get_db)):
     """
-    Update an existing fragrance by its ID.
-
-    - **fragrance_id**: The ID of the fragrance to update.
-    - **Request body**: Fragrance fields to update (all optional).
+    Update an existing fragrance by its ID. Only the fields sent are changed.
     """
-    updated_fragrance = inventory_crud.update_fragrance(db, fragrance_id=fragrance_id, fragrance_update=fragrance_update)
-    if updated_fragrance is None:
-        raise HTTPException(status_code=404, detail=f"Fragrance with ID {fragrance_id} not found for update")
-    return updated_fragrance
+    return _update_item(inventory_crud.fragrances, "Fragrance", fragrance_id, fragrance_update, db)
 
 @router.delete("/fragrances/{fragrance_id}", response_model=inventory_schema.Fragrance)
 def delete_existing_fragrance(fragrance_id: int, db: Session = Depends(get_db)):
     """
     Delete a fragrance by its ID.
-    - **fragrance_id**: The ID of the fragrance to delete.
     """
-    deleted_fragrance = inventory_crud.delete_fragrance(db, fragrance_id=fragrance_id)
-    if deleted_fragrance is None:
-        raise HTTPException(status_code=404, detail=f"Fragrance with ID {fragrance_id} not found for deletion")
-    return deleted_fragrance # Returns the deleted item as confirmation
+    return _delete_item(inventory_crud.fragrances, "Fragrance", fragrance_id, db)
 
 # --- Bottle Endpoints ---
 
 @router.post("/bottles/", response_model=inventory_schema.Bottle, status_code=201)
 def create_new_bottle(bottle: inventory_schema.BottleCreate, db: Session = Depends(get_db)):
     """
-    Create a new bottle type.
+    Create a new bottle. The name must be unique; a taken one is rejected with a 400.
+    """
+    return _create_item(inventory_crud.bottles, "Bottle", bottle, db)
+
+@router.get("/bottles/", response_model=List[Optional[inventory_schema.Bottle]])
+def read_bottles(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[list] = Depends(cursor_param),
+    ids: Optional[List[int]] = Depends(ids_param),
+    db: Session = Depends(get_db)
+):
+    """
+    Retrieve a list of bottles. With `ids` (e.g. ?ids=3,1,7), returns exactly those bottles
+    in that order, with null for ids that do not exist; the other parameters are ignored.
+    """
+    return _read_items(inventory_crud.bottles, response, skip, limit, cursor, ids, db)
 
-    - **name**: Name of the bottle (required, unique)
-    - **capacity_ml**: Capacity in milliliters (required)
-    - **bottle_type**: e.g., "Generic", "Replica", "Original" (optional)
-    - **color**: e.g., "Transparent", "Amber" (optional)
-    - **supplier_name**: Optional supplier name
-    - **cost_per_unit**: Cost per bottle (required)
-    - **stock_units**: Current stock in units (defaults to 0)
-    - **min_stock_units**: Optional minimum stock (defaults to 0)
+@router.get("/bottles/columns/", response_model=List[Dict[str, Any]])
+def read_bottle_columns(
+    response: Response,
+    fields: List[str] = Query(..., min_length=1),
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[list] = Depends(cursor_param),
+    db: Session = Depends(get_db)
+):
+    """
+    Like the bottles list, but only the columns named in `fields` (repeat the parameter).
     """
-    existing_bottle = inventory_crud.get_bottle_by_name(db, name=bottle.name)
-    if existing_bottle:
-        raise HTTPException(status_code=400, detail=f"Bottle with name '{bottle.name}' already exists.")
-    return inventory_crud.create_bottle(db=db, bottle=bottle)
+    return _read_item_columns(inventory_crud.bottles, response, fields, skip, limit, cursor, db)
 
-@router.get("/bottles/", response_model=List[inventory_schema.Bottle])
-def read_bottles(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+@router.patch("/bottles/", response_model=List[inventory_schema.Bottle])
+def update_bottles(batch: inventory_schema.BatchUpdate[inventory_schema.BottleUpdate], db: Session = Depends(get_db)):
     """
-    Retrieve a list of bottle types with pagination.
+    Set the same fields on every bottle in `ids`. Returns the updated bottles in request
+    order; ids that do not exist are skipped.
     """
-    bottles = inventory_crud.get_bottles(db, skip=skip, limit=limit)
-    return bottles
+    return _update_items(inventory_crud.bottles, "Bottle", batch, db)
+
+@router.delete("/bottles/", response_model=List[inventory_schema.Bottle])
+def delete_bottles(ids: List[int] = Depends(required_ids_param), db: Session = Depends(get_db)):
+    """
+    Delete every bottle in `ids`. Returns the deleted bottles in request order; ids that do
+    not exist are skipped.
+    """
+    return inventory_crud.bottles.delete_many(db, ids)
+
+@router.post("/bottles/bulk", response_model=inventory_schema.BulkUpsertResult)
+def bulk_upsert_bottles(rows: List[Any] = Body(...), db: Session = Depends(get_db)):
+    """
+    Create or update many bottles in one request, committed once. Each row has the fields of
+    a single create; rows are matched on their name. Invalid rows are reported in `results`
+    and skipped.
+    """
+    return _bulk_upsert("bottle", rows, db)
 
 @router.get("/bottles/{bottle_id}", response_model=inventory_schema.Bottle)
 def read_bottle(bottle_id: int, db: Session = Depends(get_db)):
     """
-    Retrieve a specific bottle type by its ID.
+    Retrieve a specific bottle by its ID.
     """
-    db_bottle = inventory_crud.get_bottle(db, bottle_id=bottle_id)
-    if db_bottle is None:
-        raise HTTPException(status_code=404, detail=f"Bottle with ID {bottle_id} not found")
-    return db_bottle
+    return _read_item(inventory_crud.bottles, "Bottle", bottle_id, db)
 
 @router.put("/bottles/{bottle_id}", response_model=inventory_schema.Bottle)
-def update_existing_bottle(
-    bottle_id: int, 
-    bottle_update: inventory_schema.BottleUpdate, 
-    db: Session = Depends(get_db)
-):
+def update_existing_bottle(bottle_id: int, bottle_update: inventory_schema.BottleUpdate, db: Session = Depends(get_db)):
     """
-    Update an existing bottle type by its ID.
+    Update an existing bottle by its ID. Only the fields sent are changed.
     """
-    updated_bottle = inventory_crud.update_bottle(db, bottle_id=bottle_id, bottle_update=bottle_update)
-    if updated_bottle is None:
-        raise HTTPException(status_code=404, detail=f"Bottle with ID {bottle_id} not found for update")
-    return updated_bottle
+    return _update_item(inventory_crud.bottles, "Bottle", bottle_id, bottle_update, db)
 
 @router.delete("/bottles/{bottle_id}", response_model=inventory_schema.Bottle)
 def delete_existing_bottle(bottle_id: int, db: Session = Depends(get_db)):
     """
-    Delete a bottle type by its ID.
+    Delete a bottle by its ID.
     """
-    deleted_bottle = inventory_crud.delete_bottle(db, bottle_id=bottle_id)
-    if deleted_bottle is None:
-        raise HTTPException(status_code=404, detail=f"Bottle with ID {bottle_id} not found for deletion")
-    return deleted_bottle
+    return _delete_item(inventory_crud.bottles, "Bottle", bottle_id, db)
 
-# --- Alcohol Endpoints (Purchase/Batch Tracking) ---
+# --- Alcohol Purchase/Batch Endpoints ---
 
 @router.post("/alcohols/", response_model=inventory_schema.Alcohol, status_code=201)
-def create_new_alcohol_purchase(
-    alcohol: inventory_schema.AlcoholCreate, 
+def create_new_alcohol(alcohol: inventory_schema.AlcoholCreate, db: Session = Depends(get_db)):
+    """
+    Create a new alcohol purchase/batch.
+    """
+    return _create_item(inventory_crud.alcohols, "Alcohol purchase/batch", alcohol, db)
+
+@router.get("/alcohols/", response_model=List[Optional[inventory_schema.Alcohol]])
+def read_alcohols(
+    response: Response,
+    name: Optional[str] = None, # Allow filtering by alcohol type name
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[list] = Depends(cursor_param),
+    ids: Optional[List[int]] = Depends(ids_param),
     db: Session = Depends(get_db)
 ):
     """
-    Record a new alcohol purchase/batch.
-    `cost_per_ml` will be calculated from `purchase_unit_cost` and `purchase_unit_volume_ml`.
-    `purchase_date` defaults to now if not provided and model has server_default.
+    Retrieve a list of alcohol purchases/batches. With `ids` (e.g. ?ids=3,1,7), returns
+    exactly those alcohol purchases/batches in that order, with null for ids that do not
+    exist; the other parameters are ignored.
     """
-    # No unique name check needed here as 'name' is the type and can be repeated for different batches
-    return inventory_crud.create_alcohol(db=db, alcohol=alcohol)
+    return _read_items(inventory_crud.alcohols, response, skip, limit, cursor, ids, db, name=name or None)
 
-@router.get("/alcohols/", response_model=List[inventory_schema.Alcohol])
-def read_alcohol_purchases(
-    skip: int = 0, 
-    limit: int = 100, 
+@router.get("/alcohols/columns/", response_model=List[Dict[str, Any]])
+def read_alcohol_columns(
+    response: Response,
+    fields: List[str] = Query(..., min_length=1),
     name: Optional[str] = None, # Allow filtering by alcohol type name
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[list] = Depends(cursor_param),
     db: Session = Depends(get_db)
 ):
     """
-    Retrieve a list of alcohol purchase/batch records, optionally filtered by type name.
+    Like the alcohol purchases/batches list, but only the columns named in `fields` (repeat
+    the parameter).
     """
-    if name:
-        alcohols = inventory_crud.get_alcohols_by_name(db, name=name, skip=skip, limit=limit)
-    else:
-        alcohols = inventory_crud.get_alcohols(db, skip=skip, limit=limit)
-    return alcohols
+    return _read_item_columns(inventory_crud.alcohols, response, fields, skip, limit, cursor, db, name=name or None)
 
-@router.get("/alcohols/{alcohol_id}", response_model=inventory_schema.Alcohol)
-def read_single_alcohol_purchase(alcohol_id: int, db: Session = Depends(get_db)):
+@router.patch("/alcohols/", response_model=List[inventory_schema.Alcohol])
+def update_alcohols(batch: inventory_schema.BatchUpdate[inventory_schema.AlcoholUpdate], db: Session = Depends(get_db)):
     """
-    Retrieve a specific alcohol purchase/batch record by its ID.
+    Set the same fields on every alcohol purchase/batch in `ids`. Returns the updated
+    alcohol purchases/batches in request order; ids that do not exist are skipped.
     """
-    db_alcohol = inventory_crud.get_alcohol(db, alcohol_id=alcohol_id)
-    if db_alcohol is None:
-        raise HTTPException(status_code=404, detail=f"Alcohol purchase/batch with ID {alcohol_id} not found")
-    return db_alcohol
+    return _update_items(inventory_crud.alcohols, "Alcohol purchase/batch", batch, db)
 
-@router.put("/alcohols/{alcohol_id}", response_model=inventory_schema.Alcohol)
-def update_existing_alcohol_purchase(
-    alcohol_id: int, 
-    alcohol_update: inventory_schema.AlcoholUpdate, 
-    db: Session = Depends(get_db)
-):
+@router.delete("/alcohols/", response_model=List[inventory_schema.Alcohol])
+def delete_alcohols(ids: List[int] = Depends(required_ids_param), db: Session = Depends(get_db)):
     """
-    Update an existing alcohol purchase/batch record.
-    `cost_per_ml` will be recalculated if `purchase_unit_cost` or `purchase_unit_volume_ml` are changed.
+    Delete every alcohol purchase/batch in `ids`. Returns the deleted alcohol
+    purchases/batches in request order; ids that do not exist are skipped.
     """
-    updated_alcohol = inventory_crud.update_alcohol(db, alcohol_id=alcohol_id, alcohol_update=alcohol_update)
-    if updated_alcohol is None:
-        raise HTTPException(status_code=404, detail=f"Alcohol purchase/batch with ID {alcohol_id} not found for update")
-    return updated_alcohol
+    return inventory_crud.alcohols.delete_many(db, ids)
 
-@router.delete("/alcohols/{alcohol_id}", response_model=inventory_schema.Alcohol)
-def delete_existing_alcohol_purchase(alcohol_id: int, db: Session = Depends(get_db)):
+@router.post("/alcohols/bulk", response_model=inventory_schema.BulkUpsertResult)
+def bulk_upsert_alcohols(rows: List[Any] = Body(...), db: Session = Depends(get_db)):
     """
-    Delete an alcohol purchase/batch record by its ID.
+    Create or update many alcohol purchases/batches in one request, committed once. Each row
+    has the fields of a single create; every row is a new batch, never an update. Invalid
+    rows are reported in `results` and skipped.
     """
-    deleted_alcohol = inventory_crud.delete_alcohol(db, alcohol_id=alcohol_id)
-    if deleted_alcohol is None:
-        raise HTTPException(status_code=404, detail=f"Alcohol purchase/batch with ID {alcohol_id} not found for deletion")
-    return deleted_alcohol
-
-# We will add more endpoints here for other inventory items (Alcohol, Additive, etc.). 
+    return _bulk_upsert("alcohol", rows, db)
 
-@router.get("/alcohols/", response_model=List[inventory_schema.Alcohol])
-def read_alcohols(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    alcohols = inventory_crud.get_alcohols(db, skip=skip, limit=limit)
-    return alcohols
+@router.get("/alcohols/costs/", response_model=List[inventory_schema.AlcoholCostState])
+def read_alcohol_costs(db: Session = Depends(get_db)):
+    """
+    Remaining volume and current cost per ml of every alcohol type, in the configured
+    costing mode (PERFUM_CRM_ALCOHOL_COSTING: "average" or "fifo").
+    """
+    return alcohol_costing_crud.get_states(db)
 
-@router.post("/alcohols/", response_model=inventory_schema.Alcohol, status_code=201)
-def create_new_alcohol(alcohol: inventory_schema.AlcoholCreate, db: Session = Depends(get_db)):
-    return inventory_crud.create_alcohol(db=db, alcohol=alcohol)
+@router.get("/alcohols/{alcohol_id}", response_model=inventory_schema.Alcohol)
+def read_alcohol(alcohol_id: int, db: Session = Depends(get_db)):
+    """
+    Retrieve a specific alcohol purchase/batch by its ID.
+    """
+    return _read_item(inventory_crud.alcohols, "Alcohol purchase/batch", alcohol_id, db)
 
 @router.put("/alcohols/{alcohol_id}", response_model=inventory_schema.Alcohol)
 def update_existing_alcohol(alcohol_id: int, alcohol_update: inventory_schema.AlcoholUpdate, db: Session = Depends(get_db)):
-    updated_alcohol = inventory_crud.update_alcohol(db, alcohol_id=alcohol_id, alcohol_update=alcohol_update)
-    if updated_alcohol is None:
-        raise HTTPException(status_code=404, detail=f"Alcohol with ID {alcohol_id} not found for update")
-    return updated_alcohol
+    """
+    Update an existing alcohol purchase/batch by its ID. Only the fields sent are changed.
+    """
+    return _update_item(inventory_crud.alcohols, "Alcohol purchase/batch", alcohol_id, alcohol_update, db)
 
 @router.delete("/alcohols/{alcohol_id}", response_model=inventory_schema.Alcohol)
 def delete_existing_alcohol(alcohol_id: int, db: Session = Depends(get_db)):
-    deleted_alcohol = inventory_crud.delete_alcohol(db, alcohol_id=alcohol_id)
-    if deleted_alcohol is None:
-        raise HTTPException(status_code=404, detail=f"Alcohol with ID {alcohol_id} not found for deletion")
-    return deleted_alcohol
+    """
+    Delete an alcohol purchase/batch by its ID.
+    """
+    return _delete_item(inventory_crud.alcohols, "Alcohol purchase/batch", alcohol_id, db)
 
 # --- Additive Endpoints ---
 
 @router.post("/additives/", response_model=inventory_schema.Additive, status_code=201)
 def create_new_additive(additive: inventory_schema.AdditiveCreate, db: Session = Depends(get_db)):
     """
-    Create a new additive.
-    - **name**: Name of the additive (required, unique).
-    - **type**: e.g., "Enhancer", "Fixative", "Pheromone" (optional).
-    - **cost_per_application_estimate**: Estimated cost for one application (optional).
+    Create a new additive. The name must be unique; a taken one is rejected with a 400.
     """
-    existing_additive = inventory_crud.get_additive_by_name(db, name=additive.name)
-    if existing_additive:
-        raise HTTPException(status_code=400, detail=f"Additive with name '{additive.name}' already exists.")
-    return inventory_crud.create_additive(db=db, additive=additive)
+    return _create_item(inventory_crud.additives, "Additive", additive, db)
 
-@router.get("/additives/", response_model=List[inventory_schema.Additive])
+@router.get("/additives/", response_model=List[Optional[inventory_schema.Additive]])
 def read_additives(
+    response: Response,
     additive_type: Optional[str] = None, # Query parameter for filtering by type
-    skip: int = 0, 
-    limit: int = 100, 
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[list] = Depends(cursor_param),
+    ids: Optional[List[int]] = Depends(ids_param),
     db: Session = Depends(get_db)
 ):
     """
-    Retrieve a list of additives, optionally filtered by type.
+    Retrieve a list of additives. With `ids` (e.g. ?ids=3,1,7), returns exactly those
+    additives in that order, with null for ids that do not exist; the other parameters are
+    ignored.
+    """
+    return _read_items(inventory_crud.additives, response, skip, limit, cursor, ids, db, type=additive_type or None)
+
+@router.get("/additives/columns/", response_model=List[Dict[str, Any]])
+def read_additive_columns(
+    response: Response,
+    fields: List[str] = Query(..., min_length=1),
+    additive_type: Optional[str] = None, # Query parameter for filtering by type
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[list] = Depends(cursor_param),
+    db: Session = Depends(get_db)
+):
+    """
+    Like the additives list, but only the columns named in `fields` (repeat the parameter).
+    """
+    return _read_item_columns(inventory_crud.additives, response, fields, skip, limit, cursor, db, type=additive_type or None)
+
+@router.patch("/additives/", response_model=List[inventory_schema.Additive])
+def update_additives(batch: inventory_schema.BatchUpdate[inventory_schema.AdditiveUpdate], db: Session = Depends(get_db)):
+    """
+    Set the same fields on every additive in `ids`. Returns the updated additives in request
+    order; ids that do not exist are skipped.
+    """
+    return _update_items(inventory_crud.additives, "Additive", batch, db)
+
+@router.delete("/additives/", response_model=List[inventory_schema.Additive])
+def delete_additives(ids: List[int] = Depends(required_ids_param), db: Session = Depends(get_db)):
+    """
+    Delete every additive in `ids`. Returns the deleted additives in request order; ids that
+    do not exist are skipped.
     """
-    additives = inventory_crud.get_additives(db, additive_type=additive_type, skip=skip, limit=limit)
-    return additives
+    return inventory_crud.additives.delete_many(db, ids)
+
+@router.post("/additives/bulk", response_model=inventory_schema.BulkUpsertResult)
+def bulk_upsert_additives(rows: List[Any] = Body(...), db: Session = Depends(get_db)):
+    """
+    Create or update many additives in one request, committed once. Each row has the fields
+    of a single create; rows are matched on their name. Invalid rows are reported in
+    `results` and skipped.
+    """
+    return _bulk_upsert("additive", rows, db)
 
 @router.get("/additives/{additive_id}", response_model=inventory_schema.Additive)
 def read_additive(additive_id: int, db: Session = Depends(get_db)):
     """
     Retrieve a specific additive by its ID.
     """
-    db_additive = inventory_crud.get_additive(db, additive_id=additive_id)
-    if db_additive is None:
-        raise HTTPException(status_code=404, detail=f"Additive with ID {additive_id} not found")
-    return db_additive
+    return _read_item(inventory_crud.additives, "Additive", additive_id, db)
 
 @router.put("/additives/{additive_id}", response_model=inventory_schema.Additive)
-def update_existing_additive(
-    additive_id: int, 
-    additive_update: inventory_schema.AdditiveUpdate, 
-    db: Session = Depends(get_db)
-):
+def update_existing_additive(additive_id: int, additive_update: inventory_schema.AdditiveUpdate, db: Session = Depends(get_db)):
     """
-    Update an existing additive by its ID.
-    If `name` is provided, it checks for uniqueness against other additives.
+    Update an existing additive by its ID. Only the fields sent are changed.
     """
-    # Optional: If name is being updated, check for uniqueness of the new name
-    if additive_update.name is not None:
-        existing_additive_with_new_name = inventory_crud.get_additive_by_name(db, name=additive_update.name)
-        if existing_additive_with_new_name and existing_additive_with_new_name.id != additive_id:
-             raise HTTPException(status_code=400, detail=f"Another additive with name '{additive_update.name}' already exists.")
-            
-    updated_additive = inventory_crud.update_additive(db, additive_id=additive_id, additive_update=additive_update)
-    if updated_additive is None:
-        raise HTTPException(status_code=404, detail=f"Additive with ID {additive_id} not found for update")
-    return updated_additive
+    return _update_item(inventory_crud.additives, "Additive", additive_id, additive_update, db)
 
 @router.delete("/additives/{additive_id}", response_model=inventory_schema.Additive)
 def delete_existing_additive(additive_id: int, db: Session = Depends(get_db)):
     """
     Delete an additive by its ID.
     """
-    deleted_additive = inventory_crud.delete_additive(db, additive_id=additive_id)
-    if deleted_additive is None:
-        raise HTTPException(status_code=404, detail=f"Additive with ID {additive_id} not found for deletion")
-    return deleted_additive
+    return _delete_item(inventory_crud.additives, "Additive", additive_id, db)
 
 # --- Humidifier Endpoints ---
 
 @router.post("/humidifiers/", response_model=inventory_schema.Humidifier, status_code=201)
 def create_new_humidifier(humidifier: inventory_schema.HumidifierCreate, db: Session = Depends(get_db)):
     """
-    Create a new humidifier.
-    - **name**: Name of the humidifier (required, unique).
-    - **cost_per_unit**: Cost of the humidifier (required).
+    Create a new humidifier. The name must be unique; a taken one is rejected with a 400.
+    """
+    return _create_item(inventory_crud.humidifiers, "Humidifier", humidifier, db)
+
+@router.get("/humidifiers/", response_model=List[Optional[inventory_schema.Humidifier]])
+def read_humidifiers(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[list] = Depends(cursor_param),
+    ids: Optional[List[int]] = Depends(ids_param),
+    db: Session = Depends(get_db)
+):
+    """
+    Retrieve a list of humidifiers. With `ids` (e.g. ?ids=3,1,7), returns exactly those
+    humidifiers in that order, with null for ids that do not exist; the other parameters are
+    ignored.
     """
-    existing_humidifier = inventory_crud.get_humidifier_by_name(db, name=humidifier.name)
-    if existing_humidifier:
-        raise HTTPException(status_code=400, detail=f"Humidifier with name '{humidifier.name}' already exists.")
-    return inventory_crud.create_humidifier(db=db, humidifier=humidifier)
+    return _read_items(inventory_crud.humidifiers, response, skip, limit, cursor, ids, db)
 
-@router.get("/humidifiers/", response_model=List[inventory_schema.Humidifier])
-def read_humidifiers(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+@router.get("/humidifiers/columns/", response_model=List[Dict[str, Any]])
+def read_humidifier_columns(
+    response: Response,
+    fields: List[str] = Query(..., min_length=1),
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[list] = Depends(cursor_param),
+    db: Session = Depends(get_db)
+):
     """
-    Retrieve a list of humidifiers.
+    Like the humidifiers list, but only the columns named in `fields` (repeat the
+    parameter).
     """
-    humidifiers = inventory_crud.get_humidifiers(db, skip=skip, limit=limit)
-    return humidifiers
+    return _read_item_columns(inventory_crud.humidifiers, response, fields, skip, limit, cursor, db)
+
+@router.patch("/humidifiers/", response_model=List[inventory_schema.Humidifier])
+def update_humidifiers(batch: inventory_schema.BatchUpdate[inventory_schema.HumidifierUpdate], db: Session = Depends(get_db)):
+    """
+    Set the same fields on every humidifier in `ids`. Returns the updated humidifiers in
+    request order; ids that do not exist are skipped.
+    """
+    return _update_items(inventory_crud.humidifiers, "Humidifier", batch, db)
+
+@router.delete("/humidifiers/", response_model=List[inventory_schema.Humidifier])
+def delete_humidifiers(ids: List[int] = Depends(required_ids_param), db: Session = Depends(get_db)):
+    """
+    Delete every humidifier in `ids`. Returns the deleted humidifiers in request order; ids
+    that do not exist are skipped.
+    """
+    return inventory_crud.humidifiers.delete_many(db, ids)
+
+@router.post("/humidifiers/bulk", response_model=inventory_schema.BulkUpsertResult)
+def bulk_upsert_humidifiers(rows: List[Any] = Body(...), db: Session = Depends(get_db)):
+    """
+    Create or update many humidifiers in one request, committed once. Each row has the
+    fields of a single create; rows are matched on their name. Invalid rows are reported in
+    `results` and skipped.
+    """
+    return _bulk_upsert("humidifier", rows, db)
 
 @router.get("/humidifiers/{humidifier_id}", response_model=inventory_schema.Humidifier)
 def read_humidifier(humidifier_id: int, db: Session = Depends(get_db)):
     """
     Retrieve a specific humidifier by its ID.
     """
-    db_humidifier = inventory_crud.get_humidifier(db, humidifier_id=humidifier_id)
-    if db_humidifier is None:
-        raise HTTPException(status_code=404, detail=f"Humidifier with ID {humidifier_id} not found")
-    return db_humidifier
+    return _read_item(inventory_crud.humidifiers, "Humidifier", humidifier_id, db)
 
 @router.put("/humidifiers/{humidifier_id}", response_model=inventory_schema.Humidifier)
-def update_existing_humidifier(
-    humidifier_id: int, 
-    humidifier_update: inventory_schema.HumidifierUpdate, 
-    db: Session = Depends(get_db)
-):
+def update_existing_humidifier(humidifier_id: int, humidifier_update: inventory_schema.HumidifierUpdate, db: Session = Depends(get_db)):
     """
-    Update an existing humidifier by its ID.
-    If `name` is provided, it checks for uniqueness against other humidifiers.
+    Update an existing humidifier by its ID. Only the fields sent are changed.
     """
-    if humidifier_update.name is not None:
-        existing_humidifier_with_new_name = inventory_crud.get_humidifier_by_name(db, name=humidifier_update.name)
-        if existing_humidifier_with_new_name and existing_humidifier_with_new_name.id != humidifier_id:
-             raise HTTPException(status_code=400, detail=f"Another humidifier with name '{humidifier_update.name}' already exists.")
-            
-    updated_humidifier = inventory_crud.update_humidifier(db, humidifier_id=humidifier_id, humidifier_update=humidifier_update)
-    if updated_humidifier is None:
-        raise HTTPException(status_code=404, detail=f"Humidifier with ID {humidifier_id} not found for update")
-    return updated_humidifier
+    return _update_item(inventory_crud.humidifiers, "Humidifier", humidifier_id, humidifier_update, db)
 
 @router.delete("/humidifiers/{humidifier_id}", response_model=inventory_schema.Humidifier)
 def delete_existing_humidifier(humidifier_id: int, db: Session = Depends(get_db)):
     """
     Delete a humidifier by its ID.
     """
-    deleted_humidifier = inventory_crud.delete_humidifier(db, humidifier_id=humidifier_id)
-    if deleted_humidifier is None:
-        raise HTTPException(status_code=404, detail=f"Humidifier with ID {humidifier_id} not found for deletion")
-    return deleted_humidifier
+    return _delete_item(inventory_crud.humidifiers, "Humidifier", humidifier_id, db)
 
-# --- HumidifierEssence Endpoints ---
+# --- Humidifier Essence Endpoints ---
 
 @router.post("/humidifier-essences/", response_model=inventory_schema.HumidifierEssence, status_code=201)
 def create_new_humidifier_essence(hf_essence: inventory_schema.HumidifierEssenceCreate, db: Session = Depends(get_db)):
     """
-    Create a new humidifier essence.
-    - **name**: Name of the essence (required, unique).
-    - **cost_per_bottle**: Cost of the essence bottle (required).
+    Create a new humidifier essence. The name must be unique; a taken one is rejected with a
+    400.
     """
-    existing_hf_essence = inventory_crud.get_humidifier_essence_by_name(db, name=hf_essence.name)
-    if existing_hf_essence:
-        raise HTTPException(status_code=400, detail=f"Humidifier essence with name '{hf_essence.name}' already exists.")
-    return inventory_crud.create_humidifier_essence(db=db, hf_essence=hf_essence)
+    return _create_item(inventory_crud.humidifier_essences, "Humidifier essence", hf_essence, db)
 
-@router.get("/humidifier-essences/", response_model=List[inventory_schema.HumidifierEssence])
-def read_humidifier_essences(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+@router.get("/humidifier-essences/", response_model=List[Optional[inventory_schema.HumidifierEssence]])
+def read_humidifier_essences(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[list] = Depends(cursor_param),
+    ids: Optional[List[int]] = Depends(ids_param),
+    db: Session = Depends(get_db)
+):
+    """
+    Retrieve a list of humidifier essences. With `ids` (e.g. ?ids=3,1,7), returns exactly
+    those humidifier essences in that order, with null for ids that do not exist; the other
+    parameters are ignored.
+    """
+    return _read_items(inventory_crud.humidifier_essences, response, skip, limit, cursor, ids, db)
+
+@router.get("/humidifier-essences/columns/", response_model=List[Dict[str, Any]])
+def read_humidifier_essence_columns(
+    response: Response,
+    fields: List[str] = Query(..., min_length=1),
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[list] = Depends(cursor_param),
+    db: Session = Depends(get_db)
+):
+    """
+    Like the humidifier essences list, but only the columns named in `fields` (repeat the
+    parameter).
+    """
+    return _read_item_columns(inventory_crud.humidifier_essences, response, fields, skip, limit, cursor, db)
+
+@router.patch("/humidifier-essences/", response_model=List[inventory_schema.HumidifierEssence])
+def update_humidifier_essences(batch: inventory_schema.BatchUpdate[inventory_schema.HumidifierEssenceUpdate], db: Session = Depends(get_db)):
     """
-    Retrieve a list of humidifier essences.
+    Set the same fields on every humidifier essence in `ids`. Returns the updated humidifier
+    essences in request order; ids that do not exist are skipped.
     """
-    hf_essences = inventory_crud.get_humidifier_essences(db, skip=skip, limit=limit)
-    return hf_essences
+    return _update_items(inventory_crud.humidifier_essences, "Humidifier essence", batch, db)
+
+@router.delete("/humidifier-essences/", response_model=List[inventory_schema.HumidifierEssence])
+def delete_humidifier_essences(ids: List[int] = Depends(required_ids_param), db: Session = Depends(get_db)):
+    """
+    Delete every humidifier essence in `ids`. Returns the deleted humidifier essences in
+    request order; ids that do not exist are skipped.
+    """
+    return inventory_crud.humidifier_essences.delete_many(db, ids)
+
+@router.post("/humidifier-essences/bulk", response_model=inventory_schema.BulkUpsertResult)
+def bulk_upsert_humidifier_essences(rows: List[Any] = Body(...), db: Session = Depends(get_db)):
+    """
+    Create or update many humidifier essences in one request, committed once. Each row has
+    the fields of a single create; rows are matched on their name. Invalid rows are reported
+    in `results` and skipped.
+    """
+    return _bulk_upsert("humidifier_essence", rows, db)
 
 @router.get("/humidifier-essences/{hf_essence_id}", response_model=inventory_schema.HumidifierEssence)
 def read_humidifier_essence(hf_essence_id: int, db: Session = Depends(get_db)):
     """
     Retrieve a specific humidifier essence by its ID.
     """
-    db_hf_essence = inventory_crud.get_humidifier_essence(db, hf_essence_id=hf_essence_id)
-    if db_hf_essence is None:
-        raise HTTPException(status_code=404, detail=f"Humidifier essence with ID {hf_essence_id} not found")
-    return db_hf_essence
+    return _read_item(inventory_crud.humidifier_essences, "Humidifier essence", hf_essence_id, db)
 
 @router.put("/humidifier-essences/{hf_essence_id}", response_model=inventory_schema.HumidifierEssence)
-def update_existing_humidifier_essence(
-    hf_essence_id: int, 
-    hf_essence_update: inventory_schema.HumidifierEssenceUpdate, 
-    db: Session = Depends(get_db)
-):
+def update_existing_humidifier_essence(hf_essence_id: int, hf_essence_update: inventory_schema.HumidifierEssenceUpdate, db: Session = Depends(get_db)):
     """
-    Update an existing humidifier essence by its ID.
-    If `name` is provided, it checks for uniqueness against other essences.
+    Update an existing humidifier essence by its ID. Only the fields sent are changed.
     """
-    if hf_essence_update.name is not None:
-        existing_hf_essence_with_new_name = inventory_crud.get_humidifier_essence_by_name(db, name=hf_essence_update.name)
-        if existing_hf_essence_with_new_name and existing_hf_essence_with_new_name.id != hf_essence_id:
-             raise HTTPException(status_code=400, detail=f"Another humidifier essence with name '{hf_essence_update.name}' already exists.")
-            
-    updated_hf_essence = inventory_crud.update_humidifier_essence(db, hf_essence_id=hf_essence_id, hf_essence_update=hf_essence_update)
-    if updated_hf_essence is None:
-        raise HTTPException(status_code=404, detail=f"Humidifier essence with ID {hf_essence_id} not found for update")
-    return updated_hf_essence
+    return _update_item(inventory_crud.humidifier_essences, "Humidifier essence", hf_essence_id, hf_essence_update, db)
 
 @router.delete("/humidifier-essences/{hf_essence_id}", response_model=inventory_schema.HumidifierEssence)
 def delete_existing_humidifier_essence(hf_essence_id: int, db: Session = Depends(get_db)):
     """
     Delete a humidifier essence by its ID.
     """
-    deleted_hf_essence = inventory_crud.delete_humidifier_essence(db, hf_essence_id=hf_essence_id)
-    if deleted_hf_essence is None:
-        raise HTTPException(status_code=404, detail=f"Humidifier essence with ID {hf_essence_id} not found for deletion")
-    return deleted_hf_essence
+    return _delete_item(inventory_crud.humidifier_essences, "Humidifier essence", hf_essence_id, db)
 
-# --- FinishedProduct Endpoints ---
+# --- Finished Product Endpoints ---
 
 @router.post("/finished-products/", response_model=inventory_schema.FinishedProduct, status_code=201)
 def create_new_finished_product(product: inventory_schema.FinishedProductCreate, db: Session = Depends(get_db)):
     """
-    Create a new finished product (e.g., body splash, scented cream).
-    - **name**: Name of the product (required, unique).
-    - **product_type**: Type of product, e.g., "Body Splash" (required).
-    - **cost_price**: Cost to acquire or produce (required).
-    - **sale_price**: Price to sell to customer (required).
+    Create a new finished product. The name must be unique; a taken one is rejected with a
+    400.
     """
-    existing_product = inventory_crud.get_finished_product_by_name(db, name=product.name)
-    if existing_product:
-        raise HTTPException(status_code=400, detail=f"Finished product with name '{product.name}' already exists.")
-    return inventory_crud.create_finished_product(db=db, product=product)
+    return _create_item(inventory_crud.finished_products, "Finished product", product, db)
 
-@router.get("/finished-products/", response_model=List[inventory_schema.FinishedProduct])
+@router.get("/finished-products/", response_model=List[Optional[inventory_schema.FinishedProduct]])
 def read_finished_products(
-    product_type: Optional[str] = None, # Query parameter for filtering
-    skip: int = 0, 
-    limit: int = 100, 
+    response: Response,
+    product_type: Optional[str] = None,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[list] = Depends(cursor_param),
+    ids: Optional[List[int]] = Depends(ids_param),
     db: Session = Depends(get_db)
 ):
     """
-    Retrieve a list of finished products, optionally filtered by product_type.
+    Retrieve a list of finished products. With `ids` (e.g. ?ids=3,1,7), returns exactly
+    those finished products in that order, with null for ids that do not exist; the other
+    parameters are ignored.
     """
-    products = inventory_crud.get_finished_products(db, product_type=product_type, skip=skip, limit=limit)
-    return products
+    return _read_items(inventory_crud.finished_products, response, skip, limit, cursor, ids, db, product_type=product_type or None)
+
+@router.get("/finished-products/columns/", response_model=List[Dict[str, Any]])
+def read_finished_product_columns(
+    response: Response,
+    fields: List[str] = Query(..., min_length=1),
+    product_type: Optional[str] = None,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[list] = Depends(cursor_param),
+    db: Session = Depends(get_db)
+):
+    """
+    Like the finished products list, but only the columns named in `fields` (repeat the
+    parameter).
+    """
+    return _read_item_columns(inventory_crud.finished_products, response, fields, skip, limit, cursor, db, product_type=product_type or None)
+
+@router.patch("/finished-products/", response_model=List[inventory_schema.FinishedProduct])
+def update_finished_products(batch: inventory_schema.BatchUpdate[inventory_schema.FinishedProductUpdate], db: Session = Depends(get_db)):
+    """
+    Set the same fields on every finished product in `ids`. Returns the updated finished
+    products in request order; ids that do not exist are skipped.
+    """
+    return _update_items(inventory_crud.finished_products, "Finished product", batch, db)
+
+@router.delete("/finished-products/", response_model=List[inventory_schema.FinishedProduct])
+def delete_finished_products(ids: List[int] = Depends(required_ids_param), db: Session = Depends(get_db)):
+    """
+    Delete every finished product in `ids`. Returns the deleted finished products in request
+    order; ids that do not exist are skipped.
+    """
+    return inventory_crud.finished_products.delete_many(db, ids)
+
+@router.post("/finished-products/bulk", response_model=inventory_schema.BulkUpsertResult)
+def bulk_upsert_finished_products(rows: List[Any] = Body(...), db: Session = Depends(get_db)):
+    """
+    Create or update many finished products in one request, committed once. Each row has the
+    fields of a single create; rows are matched on their name. Invalid rows are reported in
+    `results` and skipped.
+    """
+    return _bulk_upsert("finished_product", rows, db)
 
 @router.get("/finished-products/{product_id}", response_model=inventory_schema.FinishedProduct)
 def read_finished_product(product_id: int, db: Session = Depends(get_db)):
     """
     Retrieve a specific finished product by its ID.
     """
-    db_product = inventory_crud.get_finished_product(db, product_id=product_id)
-    if db_product is None:
-        raise HTTPException(status_code=404, detail=f"Finished product with ID {product_id} not found")
-    return db_product
+    return _read_item(inventory_crud.finished_products, "Finished product", product_id, db)
 
 @router.put("/finished-products/{product_id}", response_model=inventory_schema.FinishedProduct)
-def update_existing_finished_product(
-    product_id: int, 
-    product_update: inventory_schema.FinishedProductUpdate, 
-    db: Session = Depends(get_db)
-):
+def update_existing_finished_product(product_id: int, product_update: inventory_schema.FinishedProductUpdate, db: Session = Depends(get_db)):
     """
-    Update an existing finished product by its ID.
-    If `name` is provided, it checks for uniqueness against other products.
+    Update an existing finished product by its ID. Only the fields sent are changed.
     """
-    if product_update.name is not None:
-        existing_product_with_new_name = inventory_crud.get_finished_product_by_name(db, name=product_update.name)
-        if existing_product_with_new_name and existing_product_with_new_name.id != product_id:
-             raise HTTPException(status_code=400, detail=f"Another finished product with name '{product_update.name}' already exists.")
-            
-    updated_product = inventory_crud.update_finished_product(db, product_id=product_id, product_update=product_update)
-    if updated_product is None:
-        raise HTTPException(status_code=404, detail=f"Finished product with ID {product_id} not found for update")
-    return updated_product
+    return _update_item(inventory_crud.finished_products, "Finished product", product_id, product_update, db)
 
 @router.delete("/finished-products/{product_id}", response_model=inventory_schema.FinishedProduct)
 def delete_existing_finished_product(product_id: int, db: Session = Depends(get_db)):
     """
     Delete a finished product by its ID.
     """
-    deleted_product = inventory_crud.delete_finished_product(db, product_id=product_id)
-    if deleted_product is None:
-        raise HTTPException(status_code=404, detail=f"Finished product with ID {product_id} not found for deletion")
-    return deleted_product
+    return _delete_item(inventory_crud.finished_products, "Finished product", product_id, db)
+
+# --- Inventory Movement Ledger Endpoints ---
+
+@router.post("/movements/", response_model=inventory_schema.InventoryMovement, status_code=201)
+def create_new_movement(movement: inventory_schema.InventoryMovementCreate, db: Session = Depends(get_db)):
+    """
+    Record a purchase, waste or stock adjustment and apply it to the item's stock.
+    - **quantity**: Signed change in grams (fragrances) or units (everything else).
+    Sales record their own movements.
+    """
+    try:
+        return inventory_ledger_crud.create_movement(
+            db, item_type=movement.item_type, item_id=movement.item_id,
+            movement_type=movement.movement_type, quantity=movement.quantity, notes=movement.notes
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    except inventory_ledger_crud.OutOfStockError as e:
+        raise HTTPException(status_code=409, detail={"message": str(e), "shortages": e.shortages})
+
+@router.get("/movements/", response_model=List[inventory_schema.InventoryMovement])
+def read_movements(
+    response: Response,
+    item_type: Optional[inventory_schema.StockItemType] = None,
+    item_id: Optional[int] = None,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[list] = Depends(cursor_param),
+    db: Session = Depends(get_db)
+):
+    """
+    Retrieve ledger movements, newest first, optionally for one item type or item.
+    Paginate with skip/limit or with the X-Next-Cursor header of the previous page as `cursor`.
+    """
+    movements = inventory_ledger_crud.get_movements(db, item_type=item_type, item_id=item_id, skip=skip, limit=limit, cursor=cursor)
+    set_next_cursor(response, inventory_ledger_crud.MOVEMENT_KEYSET, movements, limit)
+    return movements
+
+@router.get("/stock-at/", response_model=inventory_schema.StockAtTime)
+def read_stock_at(
+    item_type: inventory_schema.StockItemType,
+    item_id: int,
+    at: datetime,
+    db: Session = Depends(get_db)
+):
+    """
+    Stock of an item at a point in time (UTC), from the latest balance snapshot
+    before `at` plus the movements recorded after it.
+    """
+    return inventory_ledger_crud.get_stock_at(db, item_type=item_type, item_id=item_id, at=at)
+
+@router.post("/snapshots/")
+def create_balance_snapshots(db: Session = Depends(get_db)):
+    """
+    Snapshot the balance of every item that has moved since its last snapshot.
+    Run periodically (see scripts/snapshot_inventory.py) to keep point-in-time queries bounded.
+    """
+    return {"snapshots": inventory_ledger_crud.take_balance_snapshots(db)}
+
+# --- Supplier Catalogue Import Endpoints ---
+
+@router.post("/imports/", response_model=inventory_schema.ImportJob, status_code=201)
+async def import_supplier_catalogue(
+    request: Request,
+    kind: inventory_schema.ImportKind,
+    chunk_size: int = Query(catalogue_import_crud.DEFAULT_CHUNK_ROWS, ge=1, le=inventory_bulk_crud.MAX_BULK_ROWS),
+    filename: Optional[str] = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Import a supplier catalogue sent as the raw CSV request body (Content-Type: text/csv).
+    The header row names fields of the kind's create schema. Rows are upserted on their
+    internal_name/name in chunks of `chunk_size`, each committed on its own; rejected rows
+    are listed at /imports/{job_id}/rejected-rows/. Sending the same file again after a
+    failed import resumes it after the last committed chunk.
+    """
+    spool = tempfile.NamedTemporaryFile(prefix="catalogue-", suffix=".csv", delete=False)
+    try:
+        with spool:
+            async for block in request.stream():
+                spool.write(block)
+        return await run_in_threadpool(
+            catalogue_import_crud.import_catalogue, db, kind, spool.name, chunk_size, filename
+        )
+    finally:
+        os.remove(spool.name)
+
+@router.get("/imports/{job_id}", response_model=inventory_schema.ImportJob)
+def read_import_job(job_id: int, db: Session = Depends(get_db)):
+    """
+    Progress and counts of a catalogue import.
+    """
+    job = catalogue_import_crud.get_job(db, job_id=job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Import job with ID {job_id} not found")
+    return job
+
+@router.get("/imports/{job_id}/rejected-rows/", response_model=List[inventory_schema.ImportRejectedRow])
+def read_import_rejected_rows(
+    job_id: int,
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[list] = Depends(cursor_param),
+    db: Session = Depends(get_db)
+):
+    """
+    Rows of a catalogue import that failed validation, in file order.
+    Paginate with skip/limit or with the X-Next-Cursor header of the previous page as `cursor`.
+    """
+    rows = catalogue_import_crud.get_rejected_rows(db, job_id=job_id, skip=skip, limit=limit, cursor=cursor)
+    set_next_cursor(response, catalogue_import_crud.REJECTED_ROW_KEYSET, rows, limit)
+    return rows
 
 # End of Inventory Endpoints
\ No newline at end of file
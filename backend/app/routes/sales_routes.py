@@ -1,8 +1,15 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
-from sqlalchemy.orm import Session
-from typing import List
-from ..database import get_db
-from ..crud import sales_crud
+import csv
+import io
+import json
+import zlib
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy.orm import Session, sessionmaker
+from typing import Iterable, Iterator, List, Optional
+from ..database import get_db, get_session_factory
+from ..pagination import cursor_param, set_next_cursor
+from ..repository import ids_param
+from ..crud import repricing_crud, sales_crud
 from ..schemas import sales_schema
 
 router = APIRouter()
@@ -19,14 +26,41 @@ def create_customer(customer: sales_schema.CustomerCreate, db: Session = Depends
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Error creating customer: {str(e)}")
 
-@router.get("/customers/", response_model=List[sales_schema.Customer])
-def get_customers(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+@router.get("/customers/", response_model=List[Optional[sales_schema.Customer]])
+def get_customers(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[list] = Depends(cursor_param),
+    ids: Optional[List[int]] = Depends(ids_param),
+    db: Session = Depends(get_db)
+):
     """
     Get all customers with pagination.
-    """
-    customers = sales_crud.get_customers(db, skip=skip, limit=limit)
+    Pass the X-Next-Cursor header of a page as `cursor` to get the next one.
+    With `ids` (e.g. ?ids=3,1,7), returns exactly those customers in that order, with null
+    for ids that do not exist, read with one query; the other parameters are ignored.
+    """
+    if ids is not None:
+        return sales_crud.get_customers_by_ids(db, ids)
+    customers = sales_crud.get_customers(db, skip=skip, limit=limit, cursor=cursor)
+    set_next_cursor(response, sales_crud.CUSTOMER_KEYSET, customers, limit)
     return customers
 
+@router.get("/customers/by-whatsapp/", response_model=sales_schema.Customer)
+def get_customer_by_whatsapp(
+    whatsapp: str = Query(..., description="WhatsApp number, in any format"),
+    db: Session = Depends(get_db)
+):
+    """
+    Get the customer registered with a WhatsApp number.
+    The number is normalized first, so "+57 300-123 4567" and "3001234567" find the same customer.
+    """
+    customer = sales_crud.get_customer_by_whatsapp(db, whatsapp=whatsapp)
+    if customer is None:
+        raise HTTPException(status_code=404, detail="Customer not found")
+    return customer
+
 @router.get("/customers/{customer_id}", response_model=sales_schema.Customer)
 def get_customer(customer_id: int, db: Session = Depends(get_db)):
     """
@@ -42,7 +76,10 @@ def update_customer(customer_id: int, customer_update: sales_schema.CustomerUpda
     """
     Update an existing customer.
     """
-    customer = sales_crud.update_customer(db, customer_id=customer_id, customer_update=customer_update)
+    try:
+        customer = sales_crud.update_customer(db, customer_id=customer_id, customer_update=customer_update)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Error updating customer: {str(e)}")
     if customer is None:
         raise HTTPException(status_code=404, detail="Customer not found")
     return customer
@@ -57,11 +94,16 @@ def delete_customer(customer_id: int, db: Session = Depends(get_db)):
         raise HTTPException(status_code=404, detail="Customer not found")
 
 @router.get("/customers/search/", response_model=List[sales_schema.Customer])
-def search_customers(q: str = Query(..., description="Search term for customer name or WhatsApp"), db: Session = Depends(get_db)):
+def search_customers(
+    q: str = Query(..., description="Search term for customer name, email, notes or WhatsApp"),
+    limit: int = Query(20, ge=1, le=100, description="Maximum number of results"),
+    db: Session = Depends(get_db)
+):
     """
-    Search customers by name or WhatsApp.
+    Search customers by name, email, notes or WhatsApp, best matches first.
+    Every word is matched as a prefix, so partial input works for type-ahead.
     """
-    return sales_crud.search_customers(db, search_term=q)
+    return sales_crud.search_customers(db, search_term=q, limit=limit)
 
 # Recipe routes
 
@@ -76,11 +118,20 @@ def create_recipe(recipe: sales_schema.RecipeCreate, db: Session = Depends(get_d
         raise HTTPException(status_code=400, detail=f"Error creating recipe: {str(e)}")
 
 @router.get("/recipes/", response_model=List[sales_schema.Recipe])
-def get_recipes(skip: int = 0, limit: int = 100, active_only: bool = True, db: Session = Depends(get_db)):
+def get_recipes(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    active_only: bool = True,
+    cursor: Optional[list] = Depends(cursor_param),
+    db: Session = Depends(get_db)
+):
     """
     Get all recipes with pagination. By default, only active recipes.
+    Pass the X-Next-Cursor header of a page as `cursor` to get the next one.
     """
-    recipes = sales_crud.get_recipes(db, skip=skip, limit=limit, active_only=active_only)
+    recipes = sales_crud.get_recipes(db, skip=skip, limit=limit, active_only=active_only, cursor=cursor)
+    set_next_cursor(response, sales_crud.RECIPE_KEYSET, recipes, limit)
     return recipes
 
 @router.get("/recipes/{recipe_id}", response_model=sales_schema.Recipe)
@@ -133,18 +184,33 @@ def delete_recipe(recipe_id: int, db: Session = Depends(get_db)):
 def create_sale(sale: sales_schema.SaleCreateSimple, db: Session = Depends(get_db)):
     """
     Create a new sale with automatic price calculation.
+    Inventory is deducted in the same transaction; if any item is short the sale is
+    rejected with 409 and the list of shortages.
     """
     try:
         return sales_crud.create_sale(db=db, sale=sale)
+    except sales_crud.OutOfStockError as e:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail={"message": str(e), "shortages": e.shortages}
+        )
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Error creating sale: {str(e)}")
 
 @router.get("/sales/", response_model=List[sales_schema.Sale])
-def get_sales(skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
+def get_sales(
+    response: Response,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[list] = Depends(cursor_param),
+    db: Session = Depends(get_db)
+):
     """
     Get all sales with pagination.
+    Pass the X-Next-Cursor header of a page as `cursor` to get the next one.
     """
-    sales = sales_crud.get_sales(db, skip=skip, limit=limit)
+    sales = sales_crud.get_sales(db, skip=skip, limit=limit, cursor=cursor)
+    set_next_cursor(response, sales_crud.SALE_KEYSET, sales, limit)
     return sales
 
 @router.get("/sales/{sale_id}", response_model=sales_schema.Sale)
@@ -172,6 +238,82 @@ def get_sales_by_date_range(
     except Exception as e:
         raise HTTPException(status_code=400, detail=f"Error retrieving sales: {str(e)}")
 
+# Streaming export helpers
+
+EXPORT_FLUSH_ROWS = 500  # Rows buffered per chunk sent to the client
+EXPORT_MEDIA_TYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+def _encode_csv(rows: Iterable[dict]) -> Iterator[bytes]:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=sales_crud.SALES_EXPORT_COLUMNS)
+    writer.writeheader()
+    for count, row in enumerate(rows, start=1):
+        writer.writerow(row)
+        if count % EXPORT_FLUSH_ROWS == 0:
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+    yield buffer.getvalue().encode("utf-8")
+
+def _encode_ndjson(rows: Iterable[dict]) -> Iterator[bytes]:
+    lines = []
+    for row in rows:
+        lines.append(json.dumps(row, default=str, ensure_ascii=False))
+        if len(lines) == EXPORT_FLUSH_ROWS:
+            yield ("\n".join(lines) + "\n").encode("utf-8")
+            lines = []
+    if lines:
+        yield ("\n".join(lines) + "\n").encode("utf-8")
+
+def _gzip_chunks(chunks: Iterable[bytes]) -> Iterator[bytes]:
+    compressor = zlib.compressobj(wbits=31)  # 31 = gzip container
+    for chunk in chunks:
+        compressed = compressor.compress(chunk)
+        if compressed:
+            yield compressed
+    yield compressor.flush()
+
+@router.get("/sales/export/")
+def export_sales(
+    start_date: str = Query(..., description="Start date (YYYY-MM-DD)"),
+    end_date: str = Query(..., description="End date (YYYY-MM-DD), inclusive"),
+    format: str = Query("csv", description="Output format (csv, ndjson)"),
+    gzip: bool = Query(False, description="Compress the export with gzip"),
+    session_factory: sessionmaker = Depends(get_session_factory),
+):
+    """
+    Stream every sale in a date range with its items flattened to one row per item,
+    as CSV or NDJSON. Rows are read and sent in batches, so memory stays constant
+    however large the range is.
+    """
+    try:
+        sales_crud.date_range_bounds(start_date, end_date)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Error exporting sales: {str(e)}")
+    if format not in EXPORT_MEDIA_TYPES:
+        raise HTTPException(status_code=400, detail=f"Error exporting sales: unsupported format '{format}'")
+
+    def generate() -> Iterator[bytes]:
+        # The request-scoped session may be closed before the body is streamed,
+        # so the export opens its own session for as long as it runs.
+        with session_factory() as export_db:
+            rows = sales_crud.iter_sales_export_rows(export_db, start_date=start_date, end_date=end_date)
+            encoder = _encode_csv if format == "csv" else _encode_ndjson
+            yield from encoder(rows)
+
+    filename = f"sales_{start_date}_{end_date}.{format}"
+    body = generate()
+    media_type = EXPORT_MEDIA_TYPES[format]
+    if gzip:
+        body = _gzip_chunks(body)
+        filename += ".gz"
+        media_type = "application/gzip"
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
 @router.get("/sales/summary/daily/")
 def get_daily_sales_summary(
     date: str = Query(..., description="Date (YYYY-MM-DD)"),
@@ -184,4 +326,34 @@ def get_daily_sales_summary(
         summary = sales_crud.get_daily_sales_summary(db, date=date)
         return summary
     except Exception as e:
-        raise HTTPException(status_code=400, detail=f"Error generating summary: {str(e)}") 
\ No newline at end of file
+        raise HTTPException(status_code=400, detail=f"Error generating summary: {str(e)}") 
+
+@router.get("/sales/summary/")
+def get_sales_summary(
+    start_date: str = Query(..., description="Start date (YYYY-MM-DD)"),
+    end_date: str = Query(..., description="End date (YYYY-MM-DD), inclusive"),
+    bucket: str = Query("day", description="Bucket size (day, hour)"),
+    db: Session = Depends(get_db)
+):
+    """
+    Get a sales summary for a date range (day, week, month...) in a single request,
+    with overall totals plus per-bucket totals and payment method breakdowns.
+    """
+    try:
+        return sales_crud.get_sales_summary(db, start_date=start_date, end_date=end_date, bucket=bucket)
+    except Exception as e:
+        raise HTTPException(status_code=400, detail=f"Error generating summary: {str(e)}")
+
+# Simulation routes
+
+@router.post("/simulations/repricing/")
+def simulate_repricing(simulation: sales_schema.RepricingSimulation, db: Session = Depends(get_db)):
+    """
+    What-if repricing: margin impact of cost and price scenarios on the perfumes sold
+    in the last `months` months, per scenario and broken down by recipe, fragrance and month.
+    Nothing is written.
+    """
+    try:
+        return repricing_crud.simulate_repricing(db, scenarios=simulation.scenarios, months=simulation.months)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
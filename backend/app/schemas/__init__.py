@@ -4,11 +4,14 @@
 from .inventory_schema import (
     FragranceBase, FragranceCreate, FragranceUpdate, Fragrance,
     BottleBase, BottleCreate, BottleUpdate, Bottle,
-    AlcoholBase, AlcoholCreate, AlcoholUpdate, Alcohol,
+    AlcoholBase, AlcoholCreate, AlcoholUpdate, Alcohol, AlcoholCostState,
     AdditiveBase, AdditiveCreate, AdditiveUpdate, Additive,
     HumidifierBase, HumidifierCreate, HumidifierUpdate, Humidifier,
     HumidifierEssenceBase, HumidifierEssenceCreate, HumidifierEssenceUpdate, HumidifierEssence,
-    FinishedProductBase, FinishedProductCreate, FinishedProductUpdate, FinishedProduct
+    FinishedProductBase, FinishedProductCreate, FinishedProductUpdate, FinishedProduct,
+    InventoryMovementCreate, InventoryMovement, StockAtTime,
+    BulkRowResult, BulkUpsertResult, BatchUpdate,
+    ImportKind, ImportJob, ImportRejectedRow
 )
 
 # If you have other schema files in the future (e.g., user_schema.py),
@@ -1,5 +1,5 @@
-from pydantic import BaseModel, ConfigDict # For Pydantic V2
-from typing import Optional, List
+from pydantic import BaseModel, ConfigDict, Field # For Pydantic V2
+from typing import Generic, Optional, List, Literal, TypeVar
 from datetime import datetime
 
 # Pydantic Schemas for Fragrance Model
@@ -96,15 +96,29 @@ class AlcoholUpdate(BaseModel):
     purchase_unit_cost: Optional[float] = None
     purchase_unit_volume_ml: Optional[float] = None
     cost_per_ml: Optional[float] = None # Client might send it, or we might recalculate
+    remaining_volume_ml: Optional[float] = None # Stock count correction for this batch
     stock_notes: Optional[str] = None
 
 class Alcohol(AlcoholBase): # Schema for reading/returning alcohol data
     id: int
+    remaining_volume_ml: float = 0.0 # Volume of this batch not consumed yet
     created_at: datetime # Record creation time
     updated_at: Optional[datetime] = None # Record update time
 
     model_config = ConfigDict(from_attributes=True)
 
+class AlcoholCostState(BaseModel): # Current cost of an alcohol type across its batches
+    name: str
+    remaining_volume_ml: float
+    remaining_value: float
+    average_cost_per_ml: float
+    fifo_batch_id: Optional[int] = None
+    fifo_cost_per_ml: float
+    costing_mode: str # "fifo" or "average": which cost sales are charged
+    current_cost_per_ml: float
+
+    model_config = ConfigDict(from_attributes=True)
+
 # Pydantic Schemas for Additive Model
 
 class AdditiveBase(BaseModel):
@@ -229,4 +243,90 @@ class FinishedProduct(FinishedProductBase): # Schema for reading/returning data
 
     model_config = ConfigDict(from_attributes=True)
 
+# Pydantic Schemas for the inventory movement ledger
+
+StockItemType = Literal["fragrance", "bottle", "finished_product", "humidifier", "humidifier_essence"]
+
+class InventoryMovementCreate(BaseModel):
+    item_type: StockItemType
+    item_id: int
+    movement_type: Literal["purchase", "adjustment", "waste"] # "sale" movements are written by sales only
+    quantity: float # Signed change: positive for purchases, negative for waste
+    notes: Optional[str] = None
+
+class InventoryMovement(BaseModel):
+    id: int
+    item_type: str
+    item_id: int
+    movement_type: str
+    quantity: float
+    sale_id: Optional[int] = None
+    notes: Optional[str] = None
+    created_at: datetime
+
+    model_config = ConfigDict(from_attributes=True)
+
+class StockAtTime(BaseModel):
+    item_type: str
+    item_id: int
+    at: datetime
+    balance: float
+    snapshot_id: Optional[int] = None # Snapshot the balance started from, if any
+    movements_applied: int # Movements added on top of the snapshot
+
+# Pydantic Schemas for bulk upserts
+
+class BulkRowResult(BaseModel):
+    index: int # Position of the row in the request
+    status: Literal["created", "updated", "error"]
+    id: Optional[int] = None
+    key: Optional[str] = None # Natural key of the row (internal_name or name), when it validated
+    error: Optional[str] = None
+
+class BulkUpsertResult(BaseModel):
+    created: int
+    updated: int
+    errors: int
+    results: List[BulkRowResult] # One per row, in request order
+
+# Pydantic Schemas for batch updates
+
+MAX_BATCH_IDS = 10_000
+
+UpdateT = TypeVar("UpdateT", bound=BaseModel)
+
+class BatchUpdate(BaseModel, Generic[UpdateT]):
+    ids: List[int] = Field(..., min_length=1, max_length=MAX_BATCH_IDS)
+    values: UpdateT # Fields set on every item; unset fields are left alone
+
+# Pydantic Schemas for supplier catalogue imports
+
+ImportKind = Literal["fragrance", "bottle", "additive"]
+
+class ImportJob(BaseModel):
+    id: int
+    kind: str
+    filename: Optional[str] = None
+    file_sha256: str
+    chunk_size: int
+    status: str # "running", "failed" or "completed"
+    rows_processed: int # Data rows committed so far; a resumed import continues after them
+    created_count: int
+    updated_count: int
+    rejected_count: int
+    error: Optional[str] = None
+    created_at: datetime
+    updated_at: Optional[datetime] = None
+
+    model_config = ConfigDict(from_attributes=True)
+
+class ImportRejectedRow(BaseModel):
+    id: int
+    job_id: int
+    row_number: int # 1-based data row of the file, header excluded
+    key: Optional[str] = None
+    error: str
+
+    model_config = ConfigDict(from_attributes=True)
+
 # End of Pydantic schemas for inventory models 
\ No newline at end of file
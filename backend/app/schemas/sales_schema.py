@@ -1,5 +1,5 @@
 from pydantic import BaseModel, ConfigDict
-from typing import Optional, List
+from typing import Dict, Optional, List
 from datetime import datetime
 
 # Pydantic Schemas for Customer Model
@@ -192,4 +192,21 @@ class SaleCreateSimple(BaseModel):
     discount_amount: float = 0.0
     discount_reason: Optional[str] = None
     notes: Optional[str] = None
-    sale_items: List[SaleItemSimple] = [] 
\ No newline at end of file
+    sale_items: List[SaleItemSimple] = []
+
+# Schemas for what-if repricing simulations
+
+class RepricingScenario(BaseModel):
+    """A what-if scenario. Multipliers apply to today's costs and to the prices actually charged."""
+    name: str
+    fragrance_cost_multiplier: float = 1.0 # All fragrances, e.g. 1.15 for a 15% supplier increase
+    fragrance_cost_multipliers: Dict[int, float] = {} # Per fragrance id, overrides the above
+    additive_cost_multiplier: float = 1.0
+    alcohol_cost_multiplier: float = 1.0
+    bottle_cost_multiplier: float = 1.0
+    price_multiplier: float = 1.0 # All perfume prices
+    recipe_price_multipliers: Dict[int, float] = {} # Per recipe id, overrides the above
+
+class RepricingSimulation(BaseModel):
+    months: int = 6 # Sales of the last N months, including the current one
+    scenarios: List[RepricingScenario]
@@ -0,0 +1,32 @@
+#!/usr/bin/env python3
+"""
+Fill in the normalized WhatsApp key for customers that do not have one yet and
+list customers that share a number with an older customer.
+
+Migration 4 runs this once at startup; run it again after importing customers
+directly into the database.
+
+Run from the backend directory:
+    python -m scripts.backfill_customer_whatsapp
+"""
+
+from app.database import Base, SessionLocal, engine
+from app.crud import sales_crud
+from app.migrations import run_migrations
+from app import models  # noqa: F401 - registers every model with Base
+
+def main():
+    Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
+    with SessionLocal() as db:
+        result = sales_crud.backfill_customer_whatsapp(db)
+        db.commit()
+    print(f"Normalized WhatsApp for {result['updated']} customers")
+    for duplicate in result["duplicates"]:
+        print(
+            f"  Duplicate: customer {duplicate['customer_id']} has the same WhatsApp as "
+            f"customer {duplicate['duplicate_of']} ({duplicate['whatsapp']})"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Per-endpoint latency of the inventory create and update endpoints, and the SQL
+statements each request runs.
+
+Serves the app with uvicorn in a background thread on a throwaway database and
+sends --repeat creates (POST) and updates (PUT) to every inventory resource with
+requests, so the numbers include routing, validation and serialization.
+
+Run from the backend directory:
+    python -m scripts.benchmark_inventory_writes --repeat 200
+"""
+
+import argparse
+import os
+import socket
+import statistics
+import tempfile
+import threading
+import time
+
+import requests
+
+# kind -> (path, create payload, update payload) for the n-th item
+RESOURCES = {
+    "fragrance": ("/inventory/fragrances/",
+                  lambda n: {"internal_name": f"Fragrance {n}", "cost_per_g": 1.5, "stock_g": 100},
+                  lambda n: {"cost_per_g": 2.5, "stock_g": 90}),
+    "bottle": ("/inventory/bottles/",
+               lambda n: {"name": f"Bottle {n}", "capacity_ml": 30, "cost_per_unit": 1500, "stock_units": 10},
+               lambda n: {"cost_per_unit": 1600, "stock_units": 9}),
+    "alcohol": ("/inventory/alcohols/",
+                lambda n: {"name": "Alcohol 96%", "purchase_date": "2026-01-01T00:00:00",
+                           "purchase_unit_cost": 10000, "purchase_unit_volume_ml": 1000},
+                lambda n: {"purchase_unit_cost": 12000}),
+    "additive": ("/inventory/additives/",
+                 lambda n: {"name": f"Additive {n}", "type": "Fixative", "cost_per_application_estimate": 10},
+                 lambda n: {"cost_per_application_estimate": 12}),
+    "humidifier": ("/inventory/humidifiers/",
+                   lambda n: {"name": f"Humidifier {n}", "cost_per_unit": 20000, "stock_units": 5},
+                   lambda n: {"stock_units": 4}),
+    "humidifier_essence": ("/inventory/humidifier-essences/",
+                           lambda n: {"name": f"Essence {n}", "cost_per_bottle": 5000, "stock_units": 5},
+                           lambda n: {"stock_units": 4}),
+    "finished_product": ("/inventory/finished-products/",
+                         lambda n: {"name": f"Product {n}", "product_type": "Body Splash",
+                                    "cost_price": 4000, "sale_price": 9000, "stock_units": 5},
+                         lambda n: {"sale_price": 9500}),
+}
+
+def free_port() -> int:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+def percentile(values, fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=200, help="Requests per endpoint")
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp()
+    os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(tmp, 'inventory_writes.db')}"
+    # Imported after DATABASE_URL is set, so the app opens the throwaway database
+    import uvicorn
+    from sqlalchemy import event
+    from app.database import engine
+    from app.main import app
+
+    statements = {"count": 0}
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def count_statement(*_):
+        statements["count"] += 1
+
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+
+    base_url = f"http://127.0.0.1:{port}"
+    print(f"{'endpoint':<40} {'mean ms':>8} {'p95 ms':>8} {'statements':>11}")
+    with requests.Session() as http:
+        for kind, (path, create_payload, update_payload) in RESOURCES.items():
+            ids, create_ms, update_ms = [], [], []
+            before = statements["count"]
+            for n in range(args.repeat):
+                started = time.perf_counter()
+                response = http.post(base_url + path, json=create_payload(n))
+                create_ms.append((time.perf_counter() - started) * 1000)
+                response.raise_for_status()
+                ids.append(response.json()["id"])
+            create_statements = (statements["count"] - before) / args.repeat
+
+            before = statements["count"]
+            for n, item_id in enumerate(ids):
+                started = time.perf_counter()
+                response = http.put(f"{base_url}{path}{item_id}", json=update_payload(n))
+                update_ms.append((time.perf_counter() - started) * 1000)
+                response.raise_for_status()
+            update_statements = (statements["count"] - before) / args.repeat
+
+            for method, latencies, count in (("POST", create_ms, create_statements), ("PUT", update_ms, update_statements)):
+                endpoint = f"{method} {path}" + ("{id}" if method == "PUT" else "")
+                print(f"{endpoint:<40} {statistics.mean(latencies):>8.2f} {percentile(latencies, 0.95):>8.2f} {count:>11.1f}")
+
+    server.should_exit = True
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Overhead of the Prometheus metrics (app/metrics.py) on the checkout path.
+
+1. Collector cost: nanoseconds per counter increment and histogram observation,
+   from one thread and from --concurrency threads at once.
+2. End to end: the API is served by uvicorn twice, with PERFUM_CRM_METRICS=1 and
+   PERFUM_CRM_METRICS=0, each on a throwaway database, and --concurrency clients
+   send --requests checkouts (POST /sales/sales/) to each. Latency percentiles and
+   throughput are printed side by side.
+
+Run from the backend directory:
+    python -m scripts.benchmark_metrics_overhead --requests 2000 --concurrency 8
+"""
+
+import argparse
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from app import metrics
+
+SALE = {"sale_items": [{
+    "product_type": "perfume", "item_name": "Perfume", "unit_price": 20000,
+    "size_ml": 30, "fragrance_type": "nicho", "fragrance_id": 1, "bottle_id": 1,
+}]}
+
+def free_port() -> int:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+def percentile(values, fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+def collector_cost(operations: int, threads: int) -> float:
+    """
+    Nanoseconds per (counter increment + histogram observation), each thread doing `operations`.
+    """
+    counter = metrics.Counter("benchmark_requests_total", "Benchmark counter.", ("route",))
+    histogram = metrics.Histogram("benchmark_duration_seconds", "Benchmark histogram.", ("route",))
+    labels = ("/sales/sales/",)
+
+    def work():
+        for _ in range(operations):
+            counter.inc(labels)
+            histogram.observe(0.004, labels)
+
+    started = time.perf_counter()
+    workers = [threading.Thread(target=work) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return (time.perf_counter() - started) * 1e9 / (operations * threads)
+
+def serve(metrics_enabled: bool, database: str, port: int) -> subprocess.Popen:
+    env = {**os.environ, "DATABASE_URL": f"sqlite:///{database}", "PERFUM_CRM_METRICS": "1" if metrics_enabled else "0",
+           "PERFUM_CRM_SLOW_QUERY_MS": os.getenv("PERFUM_CRM_SLOW_QUERY_MS", "60000")}  # Lock waits are expected here
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--log-level", "warning"], env=env
+    )
+    deadline = time.time() + 30
+    while time.time() < deadline:
+        try:
+            requests.get(f"http://127.0.0.1:{port}/", timeout=1)
+            return server
+        except requests.ConnectionError:
+            time.sleep(0.1)
+    server.kill()
+    raise RuntimeError("uvicorn did not start")
+
+def run_checkouts(base_url: str, count: int, concurrency: int) -> dict:
+    with requests.Session() as http:
+        http.post(f"{base_url}/sales/recipes/", json={
+            "name": "Perfume 30ml", "size_ml": 30, "fragrance_type": "nicho", "bottle_type": "generico",
+            "fragrance_grams": 13, "fijador_drops": 15, "potencializador_drops": 1, "concentrado_drops": 3, "base_price": 20000,
+        }).raise_for_status()
+        http.post(f"{base_url}/inventory/fragrances/", json={
+            "internal_name": "Benchmark", "cost_per_g": 1.0, "stock_g": 13 * (count + 100)
+        }).raise_for_status()
+        http.post(f"{base_url}/inventory/bottles/", json={
+            "name": "Benchmark 30ml", "capacity_ml": 30, "cost_per_unit": 1.0, "stock_units": count + 100
+        }).raise_for_status()
+
+    local = threading.local()
+
+    def checkout(_):
+        http = getattr(local, "http", None)
+        if http is None:
+            http = local.http = requests.Session()
+        started = time.perf_counter()
+        http.post(f"{base_url}/sales/sales/", json=SALE).raise_for_status()
+        return (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        latencies = list(pool.map(checkout, range(count)))
+    elapsed = time.perf_counter() - started
+    return {
+        "mean": statistics.mean(latencies),
+        "p50": percentile(latencies, 0.50),
+        "p95": percentile(latencies, 0.95),
+        "p99": percentile(latencies, 0.99),
+        "throughput": count / elapsed,
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000, help="Checkouts per run")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent clients (and collector threads)")
+    parser.add_argument("--operations", type=int, default=200_000, help="Collector updates per thread")
+    args = parser.parse_args()
+
+    print("Collector cost (counter increment + histogram observation)")
+    print(f"  1 thread:  {collector_cost(args.operations, 1):8.0f} ns")
+    print(f"  {args.concurrency} threads: {collector_cost(args.operations, args.concurrency):8.0f} ns")
+
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for enabled in (False, True):
+            port = free_port()
+            server = serve(enabled, os.path.join(tmp, f"metrics_{int(enabled)}.db"), port)
+            try:
+                results[enabled] = run_checkouts(f"http://127.0.0.1:{port}", args.requests, args.concurrency)
+            finally:
+                server.terminate()
+                server.wait()
+
+    off, on = results[False], results[True]
+    print(f"\nCheckout, {args.requests} requests, {args.concurrency} clients")
+    print(f"{'':<14} {'metrics off':>12} {'metrics on':>12} {'overhead':>10}")
+    for key, unit in (("mean", "ms"), ("p50", "ms"), ("p95", "ms"), ("p99", "ms"), ("throughput", "req/s")):
+        change = (on[key] - off[key]) / off[key] * 100
+        print(f"{key + ' (' + unit + ')':<14} {off[key]:>12.2f} {on[key]:>12.2f} {change:>9.1f}%")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+"""
+Compare OFFSET and keyset (cursor) pagination latency on page 1 and on a deep page.
+
+Builds a throwaway database with enough fragrances, alcohol batches and sales for
+the deep page, then times the CRUD list functions the endpoints use, once with
+skip/limit and once with the cursor that the previous page's X-Next-Cursor header
+would carry. Alcohol batches are listed by (purchase_date, id), newest first, so
+they cover a composite sort key as well as the id-ordered lists.
+
+Run from the backend directory:
+    python -m scripts.benchmark_pagination --page 5000 --limit 100
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from app.database import Base, create_db_engine
+from app import models  # noqa: F401 - registers every model with Base
+from app.crud import inventory_crud, sales_crud
+from app.pagination import encode_cursor
+
+def build_database(engine, rows: int) -> None:
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(
+            text("INSERT INTO fragrances (internal_name, cost_per_g, stock_g) VALUES (:name, 1.5, 500)"),
+            [{"name": f"Fragrance {n:07}"} for n in range(rows)]
+        )
+        # A few batches per day, so some share a purchase_date and the id breaks ties
+        conn.execute(
+            text(
+                "INSERT INTO alcohols (name, purchase_date, purchase_unit_cost, purchase_unit_volume_ml, cost_per_ml, "
+                "remaining_volume_ml) VALUES ('Alcohol 96%', datetime('2000-01-01', :offset), 80000, 10000, 8, 10000)"
+            ),
+            [{"offset": f"+{n // 3} days"} for n in range(rows)]
+        )
+        conn.execute(
+            text(
+                "INSERT INTO sales (sale_date, payment_method, subtotal, surcharge_amount, total_amount, "
+                "discount_amount, card_surcharge_applied) VALUES (CURRENT_TIMESTAMP, 'Efectivo', 30000, 0, 30000, 0, 0)"
+            ),
+            [{}] * rows
+        )
+        conn.execute(text(
+            "INSERT INTO sale_items (sale_id, product_type, item_name, quantity, unit_price, line_total) "
+            "SELECT id, 'perfume', 'Perfume', 1, 30000, 30000 FROM sales"
+        ))
+
+def timed(function, repeat: int) -> float:
+    started = time.perf_counter()
+    for _ in range(repeat):
+        function()
+    return (time.perf_counter() - started) * 1000 / repeat
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--page", type=int, default=5000, help="Deep page number to compare with page 1")
+    parser.add_argument("--limit", type=int, default=100, help="Page size")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+    rows = args.page * args.limit
+
+    lists = {
+        "fragrances": (inventory_crud.get_fragrances, inventory_crud.FRAGRANCE_KEYSET),
+        "alcohols": (inventory_crud.get_alcohols, inventory_crud.ALCOHOL_KEYSET),
+        "sales": (sales_crud.get_sales, sales_crud.SALE_KEYSET),
+    }
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_db_engine(f"sqlite:///{os.path.join(tmp, 'pagination.db')}")
+        print(f"Generating {rows:,} fragrances, alcohol batches and sales...")
+        build_database(engine, rows)
+
+        print(f"\n{'list':<12} {'page':>6} {'offset':>12} {'cursor':>12}")
+        with Session(bind=engine) as db:
+            for name, (get_list, keyset) in lists.items():
+                for page in (1, args.page):
+                    skip = (page - 1) * args.limit
+                    cursor = None
+                    if page > 1:
+                        # The cursor the previous page would have returned
+                        previous = get_list(db, skip=skip - args.limit, limit=args.limit)
+                        cursor = [getattr(previous[-1], column.key) for column in keyset.columns]
+                        assert keyset.next_cursor(previous, args.limit) == encode_cursor(cursor)
+                        # Both ways must read the same page
+                        offset_ids = [row.id for row in get_list(db, skip=skip, limit=args.limit)]
+                        assert [row.id for row in get_list(db, limit=args.limit, cursor=cursor)] == offset_ids
+                    offset_ms = timed(lambda: get_list(db, skip=skip, limit=args.limit), args.repeat)
+                    cursor_ms = timed(lambda: get_list(db, limit=args.limit, cursor=cursor), args.repeat)
+                    db.expunge_all()
+                    print(f"{name:<12} {page:>6} {offset_ms:>10.2f}ms {cursor_ms:>10.2f}ms")
+        engine.dispose()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+"""
+Benchmark the sales hot-column indexes shipped by migration 2.
+
+Builds a throwaway SQLite database with the current schema minus those indexes,
+fills it with synthetic sales and sale items, and times the report, customer
+history and relationship-load queries. It then applies the pending migrations
+(the same path an existing perfum_crm.db takes at startup) and times them again.
+The query plans show the SCAN -> SEARCH change.
+
+Run from the backend directory:
+    python -m scripts.benchmark_sales_indexes --sales 1000000
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from sqlalchemy import create_engine, text
+
+from app.database import Base
+from app import models  # noqa: F401 - registers every model with Base
+from app.migrations import run_migrations
+
+NEW_INDEXES = [
+    "ix_sales_sale_date_payment_method",
+    "ix_sales_customer_id_sale_date",
+    "ix_sale_items_sale_id",
+    "ix_sale_items_recipe_id",
+    "ix_sale_items_fragrance_id",
+]
+PAYMENT_METHODS = ["Efectivo", "Nequi", "Daviplata", "Transfiya", "Tarjeta"]
+
+QUERIES = {
+    "sales of one day": (
+        "SELECT count(*), sum(total_amount) FROM sales "
+        "WHERE sale_date >= :day AND sale_date < :next_day"
+    ),
+    "one day, one payment method": (
+        "SELECT count(*), sum(total_amount) FROM sales "
+        "WHERE sale_date >= :day AND sale_date < :next_day AND payment_method = 'Nequi'"
+    ),
+    "customer history": (
+        "SELECT id, sale_date, total_amount FROM sales "
+        "WHERE customer_id = :customer_id ORDER BY sale_date DESC"
+    ),
+    "items of one sale": "SELECT * FROM sale_items WHERE sale_id = :sale_id",
+    "sales of one recipe": "SELECT count(*) FROM sale_items WHERE recipe_id = :recipe_id",
+}
+
+def build_database(engine, sales_count: int, customers: int, seed: int) -> None:
+    Base.metadata.create_all(bind=engine)
+    rng = random.Random(seed)
+    start = datetime(2020, 1, 1)
+    span_seconds = 5 * 365 * 24 * 3600
+    raw = engine.raw_connection()
+    try:
+        cursor = raw.cursor()
+        for name in NEW_INDEXES:
+            cursor.execute(f"DROP INDEX IF EXISTS {name}")
+        cursor.execute("PRAGMA user_version = 1")  # Pretend migration 2 has not run yet
+        cursor.execute("PRAGMA synchronous = OFF")
+        sales = []
+        items = []
+        for sale_id in range(1, sales_count + 1):
+            sale_date = start + timedelta(seconds=rng.randrange(span_seconds))
+            total = float(rng.randrange(18000, 150000, 1000))
+            sales.append((
+                sale_id, rng.randrange(1, customers + 1), sale_date.strftime("%Y-%m-%d %H:%M:%S"),
+                rng.choice(PAYMENT_METHODS), total, total
+            ))
+            items.append((sale_id, "perfume", rng.randrange(1, 200), rng.randrange(1, 12), "Perfume", total, total))
+        cursor.executemany(
+            "INSERT INTO sales (id, customer_id, sale_date, payment_method, subtotal, total_amount, "
+            "surcharge_amount, discount_amount, card_surcharge_applied) VALUES (?, ?, ?, ?, ?, ?, 0, 0, 0)",
+            sales
+        )
+        cursor.executemany(
+            "INSERT INTO sale_items (sale_id, product_type, fragrance_id, recipe_id, item_name, quantity, "
+            "unit_price, line_total) VALUES (?, ?, ?, ?, ?, 1, ?, ?)",
+            items
+        )
+        raw.commit()
+    finally:
+        raw.close()
+
+def time_queries(engine, repeat: int) -> dict:
+    params = {
+        "day": "2023-06-15", "next_day": "2023-06-16",
+        "customer_id": 42, "sale_id": 123456, "recipe_id": 7,
+    }
+    results = {}
+    with engine.connect() as conn:
+        for label, sql in QUERIES.items():
+            plan = " | ".join(row[-1] for row in conn.execute(text("EXPLAIN QUERY PLAN " + sql), params))
+            started = time.perf_counter()
+            for _ in range(repeat):
+                conn.execute(text(sql), params).fetchall()
+            elapsed_ms = (time.perf_counter() - started) * 1000 / repeat
+            results[label] = (elapsed_ms, plan)
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sales", type=int, default=1_000_000, help="Number of sales rows to generate")
+    parser.add_argument("--customers", type=int, default=5_000)
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per query (average is reported)")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'benchmark.db')}")
+        print(f"Generating {args.sales:,} sales...")
+        build_database(engine, args.sales, args.customers, args.seed)
+
+        before = time_queries(engine, args.repeat)
+        started = time.perf_counter()
+        run_migrations(engine)
+        print(f"Migrations applied in {time.perf_counter() - started:.1f}s")
+        after = time_queries(engine, args.repeat)
+        engine.dispose()
+
+    for label in QUERIES:
+        before_ms, before_plan = before[label]
+        after_ms, after_plan = after[label]
+        speedup = before_ms / after_ms if after_ms else float("inf")
+        print(f"\n{label}: {before_ms:.2f} ms -> {after_ms:.2f} ms ({speedup:.0f}x)")
+        print(f"  before: {before_plan}")
+        print(f"  after:  {after_plan}")
+
+if __name__ == "__main__":
+    main()
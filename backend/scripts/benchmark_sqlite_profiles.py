@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Concurrent read/write benchmark for the SQLite engine profiles in app/database.py.
+
+For each profile it builds a fresh database and runs writer threads that commit
+small sales (like POS checkouts) next to reader threads that run a dashboard-style
+aggregate. It reports write and read throughput, read latency percentiles, and
+how many operations failed with "database is locked".
+
+Run from the backend directory:
+    python -m scripts.benchmark_sqlite_profiles --writers 4 --readers 8 --seconds 10
+"""
+
+import argparse
+import os
+import statistics
+import tempfile
+import threading
+import time
+
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from app.database import Base, DB_PROFILES, create_db_engine
+from app import models  # noqa: F401 - registers every model with Base
+
+SEED_SALES = 50_000
+
+def seed(engine) -> None:
+    Base.metadata.create_all(bind=engine)
+    with engine.begin() as conn:
+        conn.execute(
+            text(
+                "INSERT INTO sales (sale_date, payment_method, subtotal, surcharge_amount, total_amount, "
+                "discount_amount, card_surcharge_applied) VALUES "
+                "(datetime('2024-01-01', '+' || :n || ' minutes'), 'Efectivo', 30000, 0, 30000, 0, 0)"
+            ),
+            [{"n": n} for n in range(SEED_SALES)]
+        )
+
+def run_profile(profile: str, writers: int, readers: int, seconds: float) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_db_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}", profile=profile)
+        seed(engine)
+
+        stop = threading.Event()
+        lock = threading.Lock()
+        stats = {"writes": 0, "reads": 0, "locked": 0, "read_latencies": []}
+
+        def writer():
+            while not stop.is_set():
+                try:
+                    with engine.begin() as conn:
+                        sale_id = conn.execute(text(
+                            "INSERT INTO sales (sale_date, payment_method, subtotal, surcharge_amount, "
+                            "total_amount, discount_amount, card_surcharge_applied) "
+                            "VALUES (CURRENT_TIMESTAMP, 'Nequi', 20000, 0, 20000, 0, 0) RETURNING id"
+                        )).scalar()
+                        conn.execute(text(
+                            "INSERT INTO sale_items (sale_id, product_type, item_name, quantity, unit_price, line_total) "
+                            "VALUES (:sale_id, 'perfume', 'Perfume', 1, 20000, 20000)"
+                        ), {"sale_id": sale_id})
+                    with lock:
+                        stats["writes"] += 1
+                except OperationalError:
+                    with lock:
+                        stats["locked"] += 1
+
+        def reader():
+            while not stop.is_set():
+                started = time.perf_counter()
+                try:
+                    with engine.connect() as conn:
+                        conn.execute(text(
+                            "SELECT payment_method, count(*), sum(total_amount) FROM sales "
+                            "WHERE sale_date >= '2024-01-10' AND sale_date < '2024-01-11' GROUP BY payment_method"
+                        )).fetchall()
+                    with lock:
+                        stats["reads"] += 1
+                        stats["read_latencies"].append((time.perf_counter() - started) * 1000)
+                except OperationalError:
+                    with lock:
+                        stats["locked"] += 1
+
+        threads = [threading.Thread(target=writer) for _ in range(writers)]
+        threads += [threading.Thread(target=reader) for _ in range(readers)]
+        for thread in threads:
+            thread.start()
+        time.sleep(seconds)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        engine.dispose()
+
+    latencies = sorted(stats["read_latencies"]) or [0.0]
+    return {
+        "writes_per_s": stats["writes"] / seconds,
+        "reads_per_s": stats["reads"] / seconds,
+        "read_p50_ms": statistics.median(latencies),
+        "read_p95_ms": latencies[int(len(latencies) * 0.95) - 1] if len(latencies) > 1 else latencies[0],
+        "locked_errors": stats["locked"],
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--profiles", nargs="+", default=list(DB_PROFILES), choices=list(DB_PROFILES))
+    args = parser.parse_args()
+
+    print(f"{args.writers} writers, {args.readers} readers, {args.seconds:.0f}s per profile")
+    print(f"{'profile':<8} {'writes/s':>10} {'reads/s':>10} {'read p50':>10} {'read p95':>10} {'locked':>8}")
+    for profile in args.profiles:
+        result = run_profile(profile, args.writers, args.readers, args.seconds)
+        print(
+            f"{profile:<8} {result['writes_per_s']:>10.0f} {result['reads_per_s']:>10.0f} "
+            f"{result['read_p50_ms']:>8.2f}ms {result['read_p95_ms']:>8.2f}ms {result['locked_errors']:>8}"
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,406 @@
+#!/usr/bin/env python3
+"""
+Generate a synthetic database of production size, fast, for benchmarks and load tests.
+
+Writes straight to a new SQLite file with executemany in large transactions: the
+price-list recipes, inventory (fragrances, bottles, additives, alcohol batches,
+humidifiers, essences, finished products), customers, and --sales sales with their
+items. Sales are drawn with NumPy so that they look like the shop's:
+
+- one to four items per sale, mostly perfumes (by size and type), plus finished
+  products, humidifiers and essences; some perfumes with pheromones or extra grams
+- a popularity curve over fragrances and over returning customers
+- payment methods in their usual proportions, with the card surcharge; some discounts
+- opening hours with lunch and evening peaks, busy Saturdays, quiet Sundays, and the
+  Mother's Day, Amor y Amistad and December seasons, over --days days ending today
+
+Item costs and margins come from costing_crud, as at checkout. The migrations then
+build everything derived from the rows, as they do for any database that predates
+them: sales rollups, the customer search index, ledger opening balances (the
+generated stock; past sales have no movements), alcohol cost states and planner
+statistics. The same --seed and arguments give the same rows (dated back from today).
+
+Run from the backend directory:
+    python -m scripts.generate_data perfum_crm_1m.db --sales 1000000
+"""
+
+import argparse
+import json
+import os
+import time
+from datetime import date, timedelta
+
+import numpy as np
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from app.database import Base
+from app import models  # noqa: F401 - registers every model with Base
+from app.crud import alcohol_costing_crud, costing_crud
+from app.crud.sales_crud import EXTRA_FRAGRANCE_PRICE_PER_GRAM
+from app.migrations import run_migrations
+
+CHUNK_SALES = 100_000  # Sales generated and inserted per batch, to bound memory
+
+# Price list (populate_recipes.py): name, size_ml, fragrance_type, bottle_type, grams, fijador, potencializador,
+# concentrado, price, pheromone price; then the share of perfumes sold with each recipe
+RECIPES = [
+    ("Perfume 30ml Tradicional Genérico", 30, "tradicional", "generico", 13, 15, 1, 3, 18000, 2000),
+    ("Perfume 30ml Nicho Genérico", 30, "nicho", "generico", 13, 15, 1, 3, 20000, 2000),
+    ("Perfume 50ml Tradicional Genérico", 50, "tradicional", "generico", 25, 20, 1, 5, 30000, 3000),
+    ("Perfume 50ml Nicho Genérico", 50, "nicho", "generico", 25, 20, 1, 5, 35000, 3000),
+    ("Perfume 100ml Tradicional Genérico", 100, "tradicional", "generico", 50, 30, 2, 8, 45000, 3000),
+    ("Perfume 100ml Nicho Genérico", 100, "nicho", "generico", 50, 30, 2, 8, 50000, 5000),
+    ("Perfume 100ml Tradicional Lujo", 100, "tradicional", "lujo", 50, 30, 2, 8, 50000, 3000),
+    ("Perfume 100ml Nicho Lujo", 100, "nicho", "lujo", 50, 30, 2, 8, 55000, 3000),
+]
+RECIPE_SHARES = [0.22, 0.18, 0.17, 0.15, 0.11, 0.09, 0.04, 0.04]
+
+# name, capacity_ml, bottle_type, cost_per_unit; ids follow this order
+BOTTLES = [
+    ("Genérico 30ml", 30, "generico", 1400),
+    ("Genérico 50ml", 50, "generico", 1800),
+    ("Genérico 100ml", 100, "generico", 2600),
+    ("Lujo 100ml", 100, "lujo", 7500),
+]
+ADDITIVES = [  # name, type (costing_crud.RECIPE_DROP_ADDITIVES and PHEROMONE_ADDITIVE_TYPE), cost per drop
+    ("Fijador", "Fixative", 15),
+    ("Potencializador", "Enhancer", 40),
+    ("Concentrado", "Concentrate", 60),
+    ("Feromonas", "Pheromone", 250),
+]
+ALCOHOL = "Alcohol de Perfumista 96%"
+INSPIRATIONS = [
+    ("Good Girl", "Carolina Herrera"), ("212 VIP", "Carolina Herrera"), ("Sauvage", "Dior"), ("J'adore", "Dior"),
+    ("Bleu de Chanel", "Chanel"), ("Coco Mademoiselle", "Chanel"), ("Acqua di Giò", "Giorgio Armani"),
+    ("Sì", "Giorgio Armani"), ("La Vie Est Belle", "Lancôme"), ("Invictus", "Paco Rabanne"),
+    ("1 Million", "Paco Rabanne"), ("Black Opium", "Yves Saint Laurent"), ("Eros", "Versace"),
+    ("Bright Crystal", "Versace"), ("Light Blue", "Dolce & Gabbana"), ("Baccarat Rouge 540", "Maison Francis Kurkdjian"),
+    ("Aventus", "Creed"), ("Oud Wood", "Tom Ford"), ("Santal 33", "Le Labo"), ("Le Male", "Jean Paul Gaultier"),
+]
+PRODUCT_TYPES = ["Body Splash", "Crema Perfumada", "Jabón", "Aceite Corporal", "Vela Aromática"]
+
+PAYMENT_METHODS = ["Efectivo", "Nequi", "Daviplata", "Transfiya", "Tarjeta"]
+PAYMENT_SHARES = [0.40, 0.30, 0.10, 0.05, 0.15]
+CARD_SURCHARGE = 0.05
+ITEMS_PER_SALE_SHARES = [0.68, 0.22, 0.07, 0.03]  # 1, 2, 3, 4 items
+# Line kinds: perfume, finished product, humidifier, humidifier essence
+LINE_KIND_SHARES = [0.72, 0.14, 0.05, 0.09]
+CUSTOMER_SALE_SHARE = 0.65  # Sales with a registered customer
+DISCOUNT_SHARE = 0.05
+PHEROMONE_SHARE = 0.12
+EXTRA_GRAMS_SHARE = 0.05
+
+# Opening hours 9:00-20:59, with lunch and after-work peaks
+HOUR_WEIGHTS = {9: 0.4, 10: 0.7, 11: 1.0, 12: 1.3, 13: 1.2, 14: 0.9, 15: 0.9, 16: 1.1, 17: 1.4, 18: 1.5, 19: 1.2, 20: 0.6}
+WEEKDAY_WEIGHTS = [0.9, 0.9, 1.0, 1.0, 1.2, 1.5, 0.6]  # Monday .. Sunday
+MONTH_WEIGHTS = {5: 1.4, 6: 1.2, 9: 1.3, 12: 1.8}  # Mother's Day, Father's Day, Amor y Amistad, Christmas
+
+FIRST_NAMES = ["María", "José", "Luisa", "Carlos", "Ana", "Andrés", "Camila", "Juan", "Valentina", "Santiago",
+               "Daniela", "Felipe", "Laura", "Sebastián", "Paula", "Diego", "Natalia", "Mateo", "Sofía", "Julián"]
+LAST_NAMES = ["González", "Rodríguez", "Gómez", "López", "Martínez", "García", "Pérez", "Sánchez", "Ramírez",
+              "Torres", "Díaz", "Vargas", "Rojas", "Moreno", "Castro", "Ortiz", "Jiménez", "Herrera"]
+CUSTOMER_NOTES = ["Prefiere perfumes nicho", "Cliente frecuente", "Le gustan los aromas dulces",
+                  "Compra para regalar", "Prefiere frascos de lujo"]
+
+def bottle_id(size_ml: int, bottle_type: str = "generico") -> int:
+    """
+    Id of the generated bottle for a perfume size and bottle type.
+    """
+    return next(n for n, bottle in enumerate(BOTTLES, start=1) if bottle[1] == size_ml and bottle[2] == bottle_type)
+
+def popularity(count: int, exponent: float) -> np.ndarray:
+    """
+    Zipf-like shares: the n-th most popular of `count` is picked in proportion to n ** -exponent.
+    """
+    weights = np.arange(1, count + 1, dtype=np.float64) ** -exponent
+    return weights / weights.sum()
+
+def nullable(values: np.ndarray, mask: np.ndarray) -> list:
+    """
+    Python values where `mask` is set and None elsewhere, ready to bind.
+    """
+    return np.where(mask, values.astype(object), None).tolist()
+
+def insert_catalogue(cursor, rng: np.random.Generator, fragrances: int, days: int) -> dict:
+    """
+    Recipes and inventory. Returns the names and unit prices of the products sold as
+    stocked: {kind: (names, prices)}, in id order.
+    """
+    cursor.executemany(
+        "INSERT INTO recipes (name, size_ml, fragrance_type, bottle_type, fragrance_grams, fijador_drops, "
+        "potencializador_drops, concentrado_drops, base_price, pheromone_addition_price, is_active) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 'true')",
+        RECIPES
+    )
+    cursor.executemany(
+        "INSERT INTO fragrances (internal_name, inspiration_name, house, cost_per_g, stock_g, min_stock_g) VALUES (?, ?, ?, ?, ?, 200)",
+        [
+            (f"GE-{n:04d}", *INSPIRATIONS[(n - 1) % len(INSPIRATIONS)], float(cost), float(stock))
+            for n, cost, stock in zip(range(1, fragrances + 1), rng.integers(250, 900, fragrances), rng.integers(500, 5000, fragrances))
+        ]
+    )
+    cursor.executemany(
+        "INSERT INTO bottles (name, capacity_ml, bottle_type, cost_per_unit, stock_units, min_stock_units) VALUES (?, ?, ?, ?, ?, 50)",
+        [(*bottle, int(stock)) for bottle, stock in zip(BOTTLES, rng.integers(500, 3000, len(BOTTLES)))]
+    )
+    cursor.executemany(
+        "INSERT INTO additives (name, type, cost_per_application_estimate) VALUES (?, ?, ?)", ADDITIVES
+    )
+    # A 20 l batch a month; the last two are still in stock
+    months = max(days // 30, 2)
+    first_day = date.today() - timedelta(days=days)
+    cursor.executemany(
+        "INSERT INTO alcohols (name, purchase_date, purchase_unit_cost, purchase_unit_volume_ml, cost_per_ml, remaining_volume_ml) "
+        "VALUES (?, ?, ?, 20000, ?, ?)",
+        [
+            (ALCOHOL, (first_day + timedelta(days=30 * month)).isoformat() + " 10:00:00", float(cost) * 20000, float(cost),
+             20000.0 if month >= months - 2 else 0.0)
+            for month, cost in zip(range(months), 8 + np.cumsum(rng.normal(0.05, 0.2, months)).round(2))
+        ]
+    )
+
+    humidifier_names = [f"Humidificador {n + 1}" for n in range(8)]
+    humidifier_costs = rng.integers(25, 60, len(humidifier_names)) * 1000
+    cursor.executemany(
+        "INSERT INTO humidifiers (name, cost_per_unit, stock_units, min_stock_units) VALUES (?, ?, ?, 5)",
+        [(name, float(cost), int(stock))
+         for name, cost, stock in zip(humidifier_names, humidifier_costs, rng.integers(20, 200, len(humidifier_names)))]
+    )
+    essence_names = [f"Esencia {INSPIRATIONS[n % len(INSPIRATIONS)][0]} {n + 1}" for n in range(24)]
+    essence_costs = rng.integers(4, 9, len(essence_names)) * 1000
+    cursor.executemany(
+        "INSERT INTO humidifier_essences (name, cost_per_bottle, bottle_volume_ml, stock_units, min_stock_units) VALUES (?, ?, 30, ?, 10)",
+        [(name, float(cost), int(stock))
+         for name, cost, stock in zip(essence_names, essence_costs, rng.integers(50, 500, len(essence_names)))]
+    )
+    product_types = [PRODUCT_TYPES[n % len(PRODUCT_TYPES)] for n in range(40)]
+    product_names = [f"{product_type} {n + 1}" for n, product_type in enumerate(product_types)]
+    product_costs = rng.integers(6, 25, len(product_names)) * 1000
+    product_prices = (product_costs * 2.2 / 1000).round() * 1000
+    cursor.executemany(
+        "INSERT INTO finished_products (name, product_type, cost_price, sale_price, stock_units, min_stock_units) VALUES (?, ?, ?, ?, ?, 5)",
+        [(name, product_type, float(cost), float(price), int(stock))
+         for name, product_type, cost, price, stock in zip(product_names, product_types, product_costs, product_prices,
+                                                            rng.integers(20, 300, len(product_names)))]
+    )
+    return {
+        "finished_product": (product_names, product_prices),
+        "humidifier": (humidifier_names, (humidifier_costs * 1.8 / 1000).round() * 1000),
+        "humidifier_essence": (essence_names, (essence_costs * 2.0 / 1000).round() * 1000),
+    }
+
+def insert_customers(cursor, rng: np.random.Generator, customers: int) -> None:
+    first = rng.integers(0, len(FIRST_NAMES), customers)
+    last = rng.integers(0, len(LAST_NAMES), customers)
+    mobiles = (3_000_000_000 + rng.choice(999_999_999, customers, replace=False)).tolist()
+    notes = rng.integers(0, len(CUSTOMER_NOTES), customers)
+    with_notes = rng.random(customers) < 0.1
+    cursor.executemany(
+        "INSERT INTO customers (id, name, whatsapp, whatsapp_normalized, email, notes) VALUES (?, ?, ?, ?, ?, ?)",
+        [
+            (n, f"{FIRST_NAMES[f]} {LAST_NAMES[l]}", f"+57 {str(m)[:3]} {str(m)[3:6]} {str(m)[6:]}", f"57{m}",
+             f"cliente{n}@example.com", CUSTOMER_NOTES[note] if has_notes else None)
+            for n, f, l, m, note, has_notes in zip(range(1, customers + 1), first.tolist(), last.tolist(), mobiles, notes.tolist(), with_notes.tolist())
+        ]
+    )
+
+def sale_times(rng: np.random.Generator, sales: int, days: int) -> np.ndarray:
+    """
+    Sorted sale timestamps (datetime64[s]) over the `days` days before today.
+    """
+    first_day = np.datetime64(date.today() - timedelta(days=days), "D")
+    day_dates = first_day + np.arange(days)
+    weekdays = (day_dates.astype("datetime64[D]").view("int64") - 4) % 7  # 1970-01-01 was a Thursday
+    months = day_dates.astype("datetime64[M]").astype(int) % 12 + 1
+    day_weights = (
+        np.array(WEEKDAY_WEIGHTS)[weekdays]
+        * np.array([MONTH_WEIGHTS.get(month, 1.0) for month in range(1, 13)])[months - 1]
+        * np.linspace(0.7, 1.0, days)  # The shop grows
+    )
+    day_index = rng.choice(days, sales, p=day_weights / day_weights.sum())
+    hours = np.array(list(HOUR_WEIGHTS))
+    hour_weights = np.array(list(HOUR_WEIGHTS.values()))
+    seconds = hours[rng.choice(len(hours), sales, p=hour_weights / hour_weights.sum())] * 3600 + rng.integers(0, 3600, sales)
+    return np.sort(day_dates[day_index].astype("datetime64[s]") + seconds)
+
+def insert_sales(cursor, rng: np.random.Generator, tables: costing_crud.CostTables, times: np.ndarray, first_id: int,
+                 customers: int, fragrances: int, products: dict) -> int:
+    """
+    Sales with ids from `first_id`, one per timestamp, and their items. Returns the number of items.
+    """
+    count = len(times)
+    sale_ids = np.arange(first_id, first_id + count)
+    stamps = np.char.replace(np.datetime_as_string(times, unit="s"), "T", " ").tolist()
+
+    # Items: kind and the attributes of every kind, then each line keeps those of its kind
+    per_sale = rng.choice(len(ITEMS_PER_SALE_SHARES), count, p=ITEMS_PER_SALE_SHARES) + 1
+    item_sales = np.repeat(sale_ids, per_sale)
+    lines = len(item_sales)
+    kind = rng.choice(len(LINE_KIND_SHARES), lines, p=LINE_KIND_SHARES)
+    perfume, finished, humidifier, essence = (kind == k for k in range(4))
+
+    recipe = rng.choice(len(RECIPES), lines, p=RECIPE_SHARES)
+    recipe_size = np.array([r[1] for r in RECIPES])[recipe]
+    recipe_bottle = np.array([bottle_id(r[1], r[3]) for r in RECIPES])[recipe]
+    fragrance = rng.choice(fragrances, lines, p=popularity(fragrances, 0.8)) + 1
+    pheromones = perfume & (rng.random(lines) < PHEROMONE_SHARE)
+    extra_grams = np.where(perfume & (rng.random(lines) < EXTRA_GRAMS_SHARE), rng.integers(1, 6, lines), 0).astype(np.float64)
+    product = {name: rng.integers(0, len(names), lines) for name, (names, _) in products.items()}
+    unit_prices = {name: prices for name, (_, prices) in products.items()}
+    quantity = np.where(finished & (rng.random(lines) < 0.15), 2, 1)
+    quantity = np.where(essence, rng.integers(1, 4, lines), quantity)
+
+    base_prices = np.array([r[8] for r in RECIPES], dtype=np.float64)
+    pheromone_prices = np.array([r[9] for r in RECIPES], dtype=np.float64)
+    unit_price = np.select(
+        [perfume, finished, humidifier],
+        [base_prices[recipe] + pheromones * pheromone_prices[recipe] + extra_grams * EXTRA_FRAGRANCE_PRICE_PER_GRAM,
+         unit_prices["finished_product"][product["finished_product"]],
+         unit_prices["humidifier"][product["humidifier"]]],
+        unit_prices["humidifier_essence"][product["humidifier_essence"]]
+    )
+    line_total = unit_price * quantity
+
+    # Costs as stamped at checkout
+    perfume_costs = tables.perfume_unit_costs(recipe + 1, fragrance, recipe_bottle, extra_grams, pheromones)
+    unit_cost = np.select(
+        [perfume, finished, humidifier, essence],
+        [perfume_costs] + [
+            np.array([tables.unit_costs[name].get(product_id + 1, 0.0) for product_id in range(len(unit_prices[name]))])[product[name]]
+            for name in ("finished_product", "humidifier", "humidifier_essence")
+        ]
+    )
+    item_cost = (unit_cost * quantity).round(2)
+
+    names = np.array(
+        [r[0] for r in RECIPES] + products["finished_product"][0] + products["humidifier"][0] + products["humidifier_essence"][0],
+        dtype=object
+    )
+    offsets = np.cumsum([0, len(RECIPES), len(unit_prices["finished_product"]), len(unit_prices["humidifier"])])
+    name_index = np.select(
+        [perfume, finished, humidifier],
+        [recipe, offsets[1] + product["finished_product"], offsets[2] + product["humidifier"]],
+        offsets[3] + product["humidifier_essence"]
+    )
+    recipes_used = np.array([json.dumps({
+        "fragrance_grams": r[4], "fijador_drops": r[5], "potencializador_drops": r[6], "concentrado_drops": r[7]
+    }) for r in RECIPES], dtype=object)
+
+    cursor.executemany(
+        "INSERT INTO sale_items (sale_id, product_type, fragrance_id, bottle_id, recipe_id, size_ml, fragrance_type, "
+        "has_pheromones, extra_fragrance_grams, finished_product_id, humidifier_id, humidifier_essence_id, item_name, "
+        "quantity, unit_price, line_total, recipe_used, item_cost, profit_margin) "
+        "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        zip(
+            item_sales.tolist(),
+            np.array(["perfume", "finished_product", "humidifier", "essence"], dtype=object)[kind].tolist(),
+            nullable(fragrance, perfume),
+            nullable(recipe_bottle, perfume),
+            nullable(recipe + 1, perfume),
+            nullable(recipe_size, perfume),
+            nullable(np.array([r[2] for r in RECIPES])[recipe], perfume),
+            pheromones.astype(int).tolist(),
+            extra_grams.tolist(),
+            nullable(product["finished_product"] + 1, finished),
+            nullable(product["humidifier"] + 1, humidifier),
+            nullable(product["humidifier_essence"] + 1, essence),
+            names[name_index].tolist(),
+            quantity.tolist(),
+            unit_price.tolist(),
+            line_total.tolist(),
+            nullable(recipes_used[recipe], perfume),
+            item_cost.tolist(),
+            (line_total - item_cost).round(2).tolist(),
+        )
+    )
+
+    # Sales: totals from their lines, as create_sale computes them
+    lines_total = np.bincount(item_sales - first_id, weights=line_total, minlength=count)
+    discount = np.where(rng.random(count) < DISCOUNT_SHARE, (lines_total * 0.1 / 1000).round() * 1000, 0.0)
+    subtotal = lines_total - discount
+    method = rng.choice(len(PAYMENT_METHODS), count, p=PAYMENT_SHARES)
+    card = method == PAYMENT_METHODS.index("Tarjeta")
+    surcharge = np.where(card, subtotal * CARD_SURCHARGE, 0.0)
+    # Returning customers: a few regulars make many of the purchases
+    customer = (customers * rng.random(count) ** 2.5).astype(np.int64) + 1
+    cursor.executemany(
+        "INSERT INTO sales (id, customer_id, sale_date, payment_method, card_surcharge_applied, subtotal, surcharge_amount, "
+        "total_amount, discount_amount, discount_reason, created_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+        zip(
+            sale_ids.tolist(),
+            nullable(customer, rng.random(count) < CUSTOMER_SALE_SHARE),
+            stamps,
+            np.array(PAYMENT_METHODS, dtype=object)[method].tolist(),
+            card.astype(int).tolist(),
+            subtotal.tolist(),
+            surcharge.tolist(),
+            (subtotal + surcharge).tolist(),
+            discount.tolist(),
+            nullable(np.full(count, "Cliente frecuente", dtype=object), discount > 0),
+            stamps,
+        )
+    )
+    return lines
+
+def generate(path: str, sales: int, customers: int, fragrances: int = 300, days: int = 730, seed: int = 42) -> dict:
+    """
+    Create the database at `path` (which must not exist) and fill it. Returns row counts and timings.
+    """
+    if os.path.exists(path):
+        raise FileExistsError(f"{path} already exists")
+    rng = np.random.default_rng(seed)
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(bind=engine)
+    timings = {}
+
+    started = time.perf_counter()
+    raw = engine.raw_connection()
+    try:
+        cursor = raw.cursor()
+        # A half-written file is simply generated again, so skip durability while filling it
+        cursor.execute("PRAGMA journal_mode = OFF")
+        cursor.execute("PRAGMA synchronous = OFF")
+        cursor.execute("PRAGMA cache_size = -256000")
+        products = insert_catalogue(cursor, rng, fragrances, days)
+        insert_customers(cursor, rng, customers)
+        raw.commit()
+        with Session(bind=engine) as db:
+            alcohol_costing_crud.rebuild_all_states(db)  # Item costs include the alcohol
+            db.commit()
+            tables = costing_crud.load_cost_tables(db)
+
+        times = sale_times(rng, sales, days)
+        items = 0
+        for start in range(0, sales, CHUNK_SALES):
+            items += insert_sales(cursor, rng, tables, times[start:start + CHUNK_SALES], start + 1, customers, fragrances, products)
+            raw.commit()
+    finally:
+        raw.close()
+    timings["rows_s"] = time.perf_counter() - started
+
+    started = time.perf_counter()
+    run_migrations(engine)
+    engine.dispose()
+    timings["derived_s"] = time.perf_counter() - started
+    return {"sales": sales, "sale_items": items, "customers": customers, "fragrances": fragrances, **timings}
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("database", help="SQLite file to create")
+    parser.add_argument("--sales", type=int, default=1_000_000)
+    parser.add_argument("--customers", type=int, help="Default: one per 20 sales, at least 100")
+    parser.add_argument("--fragrances", type=int, default=300)
+    parser.add_argument("--days", type=int, default=730, help="Days of sales history, ending today")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--force", action="store_true", help="Replace the file if it exists")
+    args = parser.parse_args()
+
+    if args.force and os.path.exists(args.database):
+        os.remove(args.database)
+    result = generate(args.database, args.sales, args.customers or max(100, args.sales // 20), args.fragrances, args.days, args.seed)
+    print(f"{result['sales']:,} sales, {result['sale_items']:,} items and {result['customers']:,} customers "
+          f"written in {result['rows_s']:.1f}s; rollups, search index, ledger and statistics built in {result['derived_s']:.1f}s")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Import a supplier catalogue CSV into fragrances, bottles or additives.
+
+The header row names fields of the kind's create schema (e.g. internal_name,
+cost_per_g for fragrances); items are matched on internal_name/name and updated
+with the columns the file has. Rows are committed every --chunk-size rows, and
+running the same command again after an interruption resumes the import after the
+last committed chunk. Rejected rows are printed, and written to --rejected if given.
+
+Run from the backend directory:
+    python -m scripts.import_catalogue fragrance supplier_prices.csv --chunk-size 1000
+"""
+
+import argparse
+import csv
+import os
+import sys
+import time
+
+from app.database import Base, SessionLocal, engine
+from app.crud import catalogue_import_crud
+from app.migrations import run_migrations
+from app import models  # noqa: F401 - registers every model with Base
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("kind", choices=catalogue_import_crud.IMPORT_KINDS)
+    parser.add_argument("path", help="CSV file with a header row")
+    parser.add_argument("--chunk-size", type=int, default=catalogue_import_crud.DEFAULT_CHUNK_ROWS,
+                        help="Rows upserted and committed together")
+    parser.add_argument("--rejected", help="Write the rejected rows (row number, key, error) to this CSV file")
+    parser.add_argument("--show", type=int, default=20, help="Rejected rows to print")
+    args = parser.parse_args()
+
+    Base.metadata.create_all(bind=engine)  # Creates the import tables on databases that predate them
+    run_migrations(engine)
+    started = time.perf_counter()
+    with SessionLocal() as db:
+        try:
+            job = catalogue_import_crud.import_catalogue(
+                db, args.kind, args.path, chunk_size=args.chunk_size, filename=os.path.basename(args.path)
+            )
+        except ValueError as e:
+            parser.error(str(e))
+        elapsed = time.perf_counter() - started
+        print(
+            f"Import {job.id} {job.status}: {job.rows_processed} rows, {job.created_count} created, "
+            f"{job.updated_count} updated, {job.rejected_count} rejected ({elapsed:.2f} s)"
+        )
+
+        rejected_file = open(args.rejected, "w", newline="") if args.rejected else None
+        writer = csv.writer(rejected_file) if rejected_file else None
+        if writer:
+            writer.writerow(["row_number", "key", "error"])
+        shown, cursor = 0, None
+        while True:
+            page = catalogue_import_crud.get_rejected_rows(db, job.id, limit=1000, cursor=cursor)
+            for row in page:
+                if shown < args.show:
+                    print(f"  Row {row.row_number} ({row.key or ''}): {row.error}")
+                    shown += 1
+                if writer:
+                    writer.writerow([row.row_number, row.key, row.error])
+            if len(page) < 1000:
+                break
+            cursor = [page[-1].id]
+        if rejected_file:
+            rejected_file.close()
+
+        if job.status == "failed":
+            print(f"Stopped: {job.error}. Run the same command again to resume.", file=sys.stderr)
+            sys.exit(1)
+
+if __name__ == "__main__":
+    main()
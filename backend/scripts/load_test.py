@@ -0,0 +1,230 @@
+#!/usr/bin/env python3
+"""
+Load test of the API: latency percentiles and throughput of a realistic request mix.
+
+Generates a database with --sales sales (scripts/generate_data.py), or reuses
+--database if that file exists, serves the app with uvicorn in a background
+thread, and has --concurrency clients send --requests requests. Each request is
+one of these, picked by the weights in --mix:
+
+    checkout         POST /sales/sales/ (a perfume: sale, stock, ledger, rollups)
+    customer_search  GET  /sales/customers/search/?q=<name prefix>
+    inventory_list   GET  /inventory/fragrances/?limit=50
+    daily_summary    GET  /sales/sales/summary/daily/?date=<a day with sales>
+
+The sequence of requests comes from --seed, so runs with the same arguments send
+the same requests. Per operation and overall, the count, errors, mean/p50/p95/p99
+latency and throughput are written to --output as sorted, indented JSON, with the
+configuration and git commit. Diff two of these files to compare commits.
+Checkouts draw on the generated stock, so a database reused for many runs will
+eventually answer them with 409 (out of stock), counted as errors.
+
+Run from the backend directory:
+    python -m scripts.load_test --sales 10000 --output load_test_10k.json
+    python -m scripts.load_test --sales 1000000 --database /tmp/load_1m.db --output load_test_1m.json
+"""
+
+import argparse
+import json
+import os
+import random
+import socket
+import statistics
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+import requests
+
+SIZES = [30, 50, 100]
+FRAGRANCE_TYPES = ["tradicional", "nicho"]
+
+DEFAULT_MIX = "checkout=20,customer_search=30,inventory_list=30,daily_summary=20"
+OPERATIONS = ["checkout", "customer_search", "inventory_list", "daily_summary"]
+
+def parse_mix(value: str) -> dict:
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in OPERATIONS:
+            raise argparse.ArgumentTypeError(f"Unknown operation '{name.strip()}', expected one of: {', '.join(OPERATIONS)}")
+        mix[name.strip()] = float(weight)
+    return mix
+
+def free_port() -> int:
+    with socket.socket() as probe:
+        probe.bind(("127.0.0.1", 0))
+        return probe.getsockname()[1]
+
+def percentile(values, fraction: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+def database_facts(engine) -> dict:
+    """
+    Row counts the run is against, and what the planned requests need to know.
+    """
+    from sqlalchemy import text
+
+    with engine.connect() as conn:
+        facts = {
+            "sales": conn.scalar(text("SELECT count(*) FROM sales")),
+            "customers": conn.scalar(text("SELECT count(*) FROM customers")),
+            "fragrances": conn.scalar(text("SELECT count(*) FROM fragrances")),
+        }
+        first_sale = conn.scalar(text("SELECT min(sale_date) FROM sales"))
+    facts["history_days"] = max((date.today() - date.fromisoformat(first_sale[:10])).days, 1) if first_sale else 1
+    return facts
+
+def plan_requests(count: int, mix: dict, seed: int, facts: dict) -> list:
+    """
+    The (operation, method, path, params, json body) of every request, from the seed.
+    """
+    from scripts import generate_data
+
+    rng = random.Random(seed)
+    names, weights = list(mix), list(mix.values())
+    today = date.today()
+    planned = []
+    for operation in rng.choices(names, weights, k=count):
+        if operation == "checkout":
+            size, fragrance_type = rng.choice(SIZES), rng.choice(FRAGRANCE_TYPES)
+            body = {
+                "payment_method": rng.choices(generate_data.PAYMENT_METHODS, generate_data.PAYMENT_SHARES)[0],
+                "sale_items": [{
+                    "product_type": "perfume", "item_name": f"Perfume {size}ml {fragrance_type}", "unit_price": 0,
+                    "size_ml": size, "fragrance_type": fragrance_type,
+                    "fragrance_id": rng.randrange(1, facts["fragrances"] + 1), "bottle_id": generate_data.bottle_id(size),
+                }],
+            }
+            planned.append((operation, "POST", "/sales/sales/", None, body))
+        elif operation == "customer_search":
+            term = rng.choice(generate_data.FIRST_NAMES + generate_data.LAST_NAMES)[:rng.randrange(3, 6)]
+            planned.append((operation, "GET", "/sales/customers/search/", {"q": term}, None))
+        elif operation == "inventory_list":
+            planned.append((operation, "GET", "/inventory/fragrances/", {"skip": rng.randrange(0, max(facts["fragrances"] - 50, 1)), "limit": 50}, None))
+        else:
+            day = today - timedelta(days=rng.randrange(facts["history_days"]))
+            planned.append((operation, "GET", "/sales/sales/summary/daily/", {"date": day.isoformat()}, None))
+    return planned
+
+def run_requests(base_url: str, planned: list, concurrency: int) -> tuple:
+    """
+    Send the planned requests from `concurrency` threads, one HTTP session each.
+    Returns ((operation, latency ms, ok) per request, elapsed seconds).
+    """
+    local = threading.local()
+
+    def send(request):
+        operation, method, path, params, body = request
+        http = getattr(local, "http", None)
+        if http is None:
+            http = local.http = requests.Session()
+        started = time.perf_counter()
+        try:
+            ok = http.request(method, base_url + path, params=params, json=body).ok
+        except requests.RequestException:
+            ok = False
+        return operation, (time.perf_counter() - started) * 1000, ok
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as pool:
+        results = list(pool.map(send, planned))
+    return results, time.perf_counter() - started
+
+def summarize(results: list, elapsed: float) -> dict:
+    def stats(rows):
+        latencies = [latency for _, latency, ok in rows if ok]
+        summary = {"requests": len(rows), "errors": len(rows) - len(latencies), "throughput_rps": round(len(rows) / elapsed, 1)}
+        if latencies:
+            summary.update({
+                "mean_ms": round(statistics.mean(latencies), 2),
+                "p50_ms": round(percentile(latencies, 0.50), 2),
+                "p95_ms": round(percentile(latencies, 0.95), 2),
+                "p99_ms": round(percentile(latencies, 0.99), 2),
+            })
+        return summary
+
+    operations = sorted({operation for operation, _, _ in results})
+    return {
+        "operations": {operation: stats([row for row in results if row[0] == operation]) for operation in operations},
+        "overall": stats(results),
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sales", type=int, default=10_000, help="Sales to generate in a new database")
+    parser.add_argument("--customers", type=int, help="Customers to generate (default: one per 20 sales, at least 100)")
+    parser.add_argument("--database", help="SQLite file to use, generated if it does not exist (default: a throwaway file)")
+    parser.add_argument("--requests", type=int, default=5000, help="Measured requests")
+    parser.add_argument("--warmup", type=int, default=200, help="Requests sent first and not measured")
+    parser.add_argument("--concurrency", type=int, default=8, help="Concurrent clients")
+    parser.add_argument("--mix", type=parse_mix, default=parse_mix(DEFAULT_MIX), help=f"Operation weights (default: {DEFAULT_MIX})")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default="load_test.json", help="JSON results file")
+    args = parser.parse_args()
+    customers = args.customers or max(100, args.sales // 20)
+
+    database = args.database or os.path.join(tempfile.mkdtemp(), "load_test.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{database}"
+    # Lock waits under load are expected; keep them out of the slow-query log unless asked for
+    os.environ.setdefault("PERFUM_CRM_SLOW_QUERY_MS", "60000")
+    # Imported after DATABASE_URL is set, so the app opens this database
+    from scripts import generate_data
+    if not os.path.exists(database):
+        print(f"Generating {args.sales:,} sales...")
+        generate_data.generate(database, args.sales, customers, seed=args.seed)
+    import uvicorn
+    from app.database import DEFAULT_DB_POOL, DEFAULT_DB_PROFILE, engine
+    from app.main import app
+
+    facts = database_facts(engine)
+
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.05)
+
+    base_url = f"http://127.0.0.1:{port}"
+    planned = plan_requests(args.warmup + args.requests, args.mix, args.seed, facts)
+    run_requests(base_url, planned[:args.warmup], args.concurrency)
+    print(f"Sending {args.requests:,} requests from {args.concurrency} clients...")
+    results, elapsed = run_requests(base_url, planned[args.warmup:], args.concurrency)
+    server.should_exit = True
+
+    report = {
+        "commit": git_commit(),
+        "config": {
+            "sales": facts["sales"],
+            "customers": facts["customers"],
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "mix": args.mix,
+            "seed": args.seed,
+            "db_profile": os.getenv("PERFUM_CRM_DB_PROFILE", DEFAULT_DB_PROFILE),
+            "db_pool": os.getenv("PERFUM_CRM_DB_POOL", DEFAULT_DB_POOL),
+        },
+        **summarize(results, elapsed),
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+    print(f"\n{'operation':<16} {'requests':>9} {'errors':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'req/s':>8}")
+    for name, summary in [*report["operations"].items(), ("overall", report["overall"])]:
+        print(f"{name:<16} {summary['requests']:>9} {summary['errors']:>7} {summary.get('p50_ms', 0):>8.2f} "
+              f"{summary.get('p95_ms', 0):>8.2f} {summary.get('p99_ms', 0):>8.2f} {summary['throughput_rps']:>8.1f}")
+    print(f"\nWrote {args.output}")
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,7 @@ import requests
 import random
 import datetime
 import json
+import time
 
 # --- Configuration ---
 BASE_URL = "http://localhost:8000/inventory" # Adjust if your API runs elsewhere
@@ -9,20 +10,25 @@ HEADERS = {"Content-Type": "application/json"}
 ITEM_COUNT = 50
 
 # --- Helper Function ---
-def post_data(endpoint, data, entity_name):
-    """Helper function to POST data and print status."""
+def post_bulk(endpoint, rows, entity_name):
+    """Helper function to POST a batch of rows to a bulk endpoint and print the summary."""
     url = f"{BASE_URL}{endpoint}"
     try:
-        response = requests.post(url, data=json.dumps(data, default=str), headers=HEADERS)
-        if response.status_code == 201:
-            print(f"Successfully created {entity_name}: {data.get('name', data.get('internal_name', ''))}")
-            return response.json() # Return the created object if needed
-        elif response.status_code == 400 and "already exists" in response.text:
-            print(f"Skipped {entity_name} (already exists): {data.get('name', data.get('internal_name', ''))}")
-            return None
-        else:
-            print(f"Error creating {entity_name}: {data.get('name', data.get('internal_name', ''))} - Status: {response.status_code}, Response: {response.text}")
-            return None
+        started = time.perf_counter()
+        response = requests.post(url, data=json.dumps(rows, default=str), headers=HEADERS)
+        elapsed = time.perf_counter() - started
+        if response.status_code == 200:
+            summary = response.json()
+            print(
+                f"{entity_name}: {summary['created']} created, {summary['updated']} updated, "
+                f"{summary['errors']} rejected in {elapsed:.2f} s"
+            )
+            for result in summary["results"]:
+                if result["status"] == "error":
+                    print(f"  Row {result['index']} ({result['key'] or ''}): {result['error']}")
+            return summary
+        print(f"Error creating {entity_name} - Status: {response.status_code}, Response: {response.text}")
+        return None
     except requests.exceptions.ConnectionError as e:
         print(f"Connection error while creating {entity_name}: {e}")
         print("Please ensure your FastAPI backend server is running.")
@@ -35,6 +41,7 @@ def post_data(endpoint, data, entity_name):
 
 def create_fake_fragrances(count):
     print(f"\n--- Creating {count} Fragrances ---")
+    rows = []
     for i in range(count):
         data = {
             "internal_name": f"FragInt-{i+1:03}",
@@ -46,10 +53,12 @@ def create_fake_fragrances(count):
             "stock_g": round(random.uniform(0, 1000.0), 1),
             "min_stock_g": round(random.uniform(50, 200.0), 1)
         }
-        post_data("/fragrances/", data, "Fragrance")
+        rows.append(data)
+    post_bulk("/fragrances/bulk", rows, "Fragrance")
 
 def create_fake_bottles(count):
     print(f"\n--- Creating {count} Bottles ---")
+    rows = []
     for i in range(count):
         data = {
             "name": f"BottleType-{i+1:03}",
@@ -61,10 +70,12 @@ def create_fake_bottles(count):
             "stock_units": random.randint(0, 500),
             "min_stock_units": random.randint(20, 100)
         }
-        post_data("/bottles/", data, "Bottle")
+        rows.append(data)
+    post_bulk("/bottles/bulk", rows, "Bottle")
 
 def create_fake_alcohols(count):
     print(f"\n--- Creating {count} Alcohols ---")
+    rows = []
     for i in range(count):
         # Generate a random date within the last year
         start_date = datetime.datetime.now() - datetime.timedelta(days=365)
@@ -84,10 +95,12 @@ def create_fake_alcohols(count):
             # cost_per_ml is calculated by the backend
             "stock_notes": f"Initial stock for batch {i+1}. Current volume: {purchase_unit_volume}ml"
         }
-        post_data("/alcohols/", data, "Alcohol")
+        rows.append(data)
+    post_bulk("/alcohols/bulk", rows, "Alcohol")
 
 def create_fake_additives(count):
     print(f"\n--- Creating {count} Additives ---")
+    rows = []
     for i in range(count):
         data = {
             "name": f"Additive {random.choice(['Fixative Alpha', 'UV Protector Beta', 'Colorant Gamma'])} - {i+1:03}",
@@ -98,10 +111,12 @@ def create_fake_additives(count):
             "stock_ml_or_g": round(random.uniform(10, 500), 1),
             "min_stock_ml_or_g": round(random.uniform(5, 50), 1)
         }
-        post_data("/additives/", data, "Additive")
+        rows.append(data)
+    post_bulk("/additives/bulk", rows, "Additive")
 
 def create_fake_humidifiers(count):
     print(f"\n--- Creating {count} Humidifiers ---")
+    rows = []
     for i in range(count):
         data = {
             "name": f"Humidifier Model {random.choice(['MistKing', 'AquaPure', 'ZenScent'])} - {i+1:03}",
@@ -111,10 +126,12 @@ def create_fake_humidifiers(count):
             "stock_units": random.randint(0, 50),
             "min_stock_units": random.randint(2, 10)
         }
-        post_data("/humidifiers/", data, "Humidifier")
+        rows.append(data)
+    post_bulk("/humidifiers/bulk", rows, "Humidifier")
 
 def create_fake_humidifier_essences(count):
     print(f"\n--- Creating {count} Humidifier Essences ---")
+    rows = []
     for i in range(count):
         data = {
             "name": f"H-Essence {random.choice(['Lavender Bliss', 'Ocean Breeze', 'Citrus Burst'])} - {i+1:03}",
@@ -125,10 +142,12 @@ def create_fake_humidifier_essences(count):
             "stock_units": random.randint(0, 100),
             "min_stock_units": random.randint(10, 30)
         }
-        post_data("/humidifier-essences/", data, "HumidifierEssence") # Corrected endpoint
+        rows.append(data)
+    post_bulk("/humidifier-essences/bulk", rows, "HumidifierEssence")
 
 def create_fake_finished_products(count):
     print(f"\n--- Creating {count} Finished Products ---")
+    rows = []
     product_types = ["Perfum Extract", "Eau de Parfum", "Eau de Toilette", "Room Spray", "Car Diffuser"]
     for i in range(count):
         data = {
@@ -146,12 +165,13 @@ def create_fake_finished_products(count):
             "additive_percentage": round(random.uniform(0, 5), 1),
             "total_volume_ml": random.choice([30, 50, 100]),
             "cost_price": round(random.uniform(5, 50), 2), # Placeholder cost
-            "selling_price": round(random.uniform(15, 150), 2), # Placeholder price
+            "sale_price": round(random.uniform(15, 150), 2), # Placeholder price
             "stock_units": random.randint(0, 200),
             "min_stock_units": random.randint(10, 50),
             "notes": f"Production batch {datetime.date.today().year}-{random.randint(1,100)}"
         }
-        post_data("/finished-products/", data, "FinishedProduct") # Corrected endpoint
+        rows.append(data)
+    post_bulk("/finished-products/bulk", rows, "FinishedProduct")
 
 # --- Main Execution ---
 if __name__ == "__main__":
@@ -161,6 +181,7 @@ if __name__ == "__main__":
 
     # Create entities in an order that might make sense for potential dependencies
     # (though this script currently doesn't link them actively)
+    started = time.perf_counter()
     create_fake_fragrances(ITEM_COUNT)
     create_fake_bottles(ITEM_COUNT)
     create_fake_alcohols(ITEM_COUNT)
@@ -169,7 +190,7 @@ if __name__ == "__main__":
     create_fake_humidifier_essences(ITEM_COUNT)
     create_fake_finished_products(ITEM_COUNT)
 
-    print("\nDatabase population script finished.")
+    print(f"\nDatabase population script finished in {time.perf_counter() - started:.2f} s.")
     print("Please check your database and the console output for any errors.")
     print("If you see 'Connection error', ensure your FastAPI backend is running and accessible at the BASE_URL.")
-    print("If you see 'already exists', the script attempted to create an item with a unique key that was already present.") 
\ No newline at end of file
+    print("Re-running the script updates the items it created before instead of duplicating them (alcohol batches are always added).") 
\ No newline at end of file
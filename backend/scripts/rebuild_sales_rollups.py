@@ -0,0 +1,21 @@
+#!/usr/bin/env python3
+"""
+Regenerate the hourly and daily sales rollups from the full sales history.
+
+Run from the backend directory:
+    python -m scripts.rebuild_sales_rollups
+"""
+
+from app.database import Base, SessionLocal, engine
+from app.crud import sales_crud
+from app import models  # noqa: F401 - registers every model with Base
+
+def main():
+    Base.metadata.create_all(bind=engine)  # Creates sales_rollups on databases that predate it
+    with SessionLocal() as db:
+        rows = sales_crud.rebuild_sales_rollups(db)
+        db.commit()
+    print(f"Rebuilt sales rollups: {rows} bucket rows")
+
+if __name__ == "__main__":
+    main()
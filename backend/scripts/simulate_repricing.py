@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+What-if repricing from the command line: margin impact of supplier cost increases
+and price changes on the perfumes sold in the last N months.
+
+Each --fragrance-increase adds a scenario with all fragrance costs raised by that
+percentage; --scenarios loads a JSON list of scenarios with the same fields as the
+POST /sales/simulations/repricing/ endpoint.
+
+Run from the backend directory:
+    python -m scripts.simulate_repricing --months 6 --fragrance-increase 5 10 20
+    python -m scripts.simulate_repricing --scenarios scenarios.json --by recipe
+"""
+
+import argparse
+import json
+import time
+
+from app.database import SessionLocal
+from app.crud import repricing_crud
+from app.schemas import sales_schema
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--months", type=int, default=6, help="Sales of the last N months, including the current one")
+    parser.add_argument("--fragrance-increase", type=float, nargs="*", default=[], metavar="PERCENT",
+                        help="One scenario per value, raising every fragrance cost by PERCENT")
+    parser.add_argument("--scenarios", help="JSON file with a list of scenarios")
+    parser.add_argument("--by", choices=["recipe", "fragrance", "month"], help="Also print this breakdown")
+    args = parser.parse_args()
+
+    scenarios = [
+        sales_schema.RepricingScenario(name=f"fragrances +{percent:g}%", fragrance_cost_multiplier=1 + percent / 100)
+        for percent in args.fragrance_increase
+    ]
+    if args.scenarios:
+        with open(args.scenarios) as scenarios_file:
+            scenarios += [sales_schema.RepricingScenario(**scenario) for scenario in json.load(scenarios_file)]
+    if not scenarios:
+        parser.error("give at least one --fragrance-increase or --scenarios")
+
+    started = time.perf_counter()
+    with SessionLocal() as db:
+        result = repricing_crud.simulate_repricing(db, scenarios=scenarios, months=args.months)
+    elapsed = time.perf_counter() - started
+
+    baseline = result["baseline"]
+    print(f"{result['sale_items']} perfume lines since {result['start_date']} ({elapsed:.2f} s)")
+    print(f"{'baseline':<30} revenue {baseline['revenue']:>16,.2f}  margin {baseline['margin']:>16,.2f}")
+    for scenario in result["scenarios"]:
+        print(
+            f"{scenario['name']:<30} revenue {scenario['revenue']:>16,.2f}  margin {scenario['margin']:>16,.2f}"
+            f"  delta {scenario['margin_delta']:>+16,.2f}"
+        )
+        if args.by:
+            key = f"{args.by}_id" if args.by != "month" else "month"
+            for group in scenario[f"by_{args.by}"]:
+                label = group.get("name") or group[key]
+                print(f"    {str(label):<26} margin {group['margin']:>16,.2f}  delta {group['margin_delta']:>+16,.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,23 @@
+#!/usr/bin/env python3
+"""
+Snapshot the stock balance of every inventory item that moved since its last snapshot.
+Schedule it (e.g. nightly cron) so point-in-time stock queries only replay recent movements.
+
+Run from the backend directory:
+    python -m scripts.snapshot_inventory
+"""
+
+from app.database import Base, SessionLocal, engine
+from app.crud import inventory_ledger_crud
+from app.migrations import run_migrations
+from app import models  # noqa: F401 - registers every model with Base
+
+def main():
+    Base.metadata.create_all(bind=engine)  # Creates the ledger tables on databases that predate them
+    run_migrations(engine)
+    with SessionLocal() as db:
+        snapshots = inventory_ledger_crud.take_balance_snapshots(db)
+    print(f"Took {snapshots} inventory balance snapshots")
+
+if __name__ == "__main__":
+    main()
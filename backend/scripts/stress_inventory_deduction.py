@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Concurrency stress test for the stock deduction in sales_crud.create_sale.
+
+Many threads check out perfumes that share one fragrance and one bottle, with
+more demand than stock. The script then checks the invariants:
+- stock never goes negative,
+- stock consumed equals the successful sales times the per-sale quantity,
+- every rejected checkout raised OutOfStockError and left no sale behind.
+
+Run from the backend directory:
+    python -m scripts.stress_inventory_deduction --threads 16 --checkouts 50
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import threading
+import time
+
+from sqlalchemy.orm import sessionmaker
+
+from app.database import Base, create_db_engine
+from app import models  # noqa: F401 - registers every model with Base
+from app.crud import inventory_crud, sales_crud
+from app.schemas import inventory_schema, sales_schema
+
+FRAGRANCE_GRAMS = 13.0
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--checkouts", type=int, default=50, help="Checkout attempts per thread")
+    parser.add_argument("--stock-sales", type=int, default=300, help="How many sales the fragrance stock covers")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_db_engine(f"sqlite:///{os.path.join(tmp, 'stress.db')}")
+        Base.metadata.create_all(bind=engine)
+        Session = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+        with Session() as db:
+            sales_crud.create_recipe(db, sales_schema.RecipeCreate(
+                name="Perfume 30ml Nicho Genérico", size_ml=30, fragrance_type="nicho", bottle_type="generico",
+                fragrance_grams=FRAGRANCE_GRAMS, fijador_drops=15, potencializador_drops=1,
+                concentrado_drops=3, base_price=20000
+            ))
+            fragrance_id = inventory_crud.create_fragrance(db, inventory_schema.FragranceCreate(
+                internal_name="Stress", cost_per_g=1.0, stock_g=FRAGRANCE_GRAMS * args.stock_sales
+            )).id
+            bottle_id = inventory_crud.create_bottle(db, inventory_schema.BottleCreate(
+                name="Stress 30ml", capacity_ml=30, cost_per_unit=1.0, stock_units=args.stock_sales * 2
+            )).id
+
+        sale = sales_schema.SaleCreateSimple(sale_items=[sales_schema.SaleItemSimple(
+            product_type="perfume", item_name="Perfume", unit_price=20000, size_ml=30,
+            fragrance_type="nicho", fragrance_id=fragrance_id, bottle_id=bottle_id
+        )])
+        lock = threading.Lock()
+        counts = {"sold": 0, "out_of_stock": 0, "errors": 0}
+
+        def checkout_loop():
+            for _ in range(args.checkouts):
+                with Session() as db:
+                    try:
+                        sales_crud.create_sale(db, sale)
+                        outcome = "sold"
+                    except sales_crud.OutOfStockError:
+                        outcome = "out_of_stock"
+                    except Exception as e:
+                        print(f"Unexpected error: {e}", file=sys.stderr)
+                        outcome = "errors"
+                with lock:
+                    counts[outcome] += 1
+
+        started = time.perf_counter()
+        threads = [threading.Thread(target=checkout_loop) for _ in range(args.threads)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        with Session() as db:
+            stock_g = inventory_crud.get_fragrance(db, fragrance_id).stock_g
+            stock_units = inventory_crud.get_bottle(db, bottle_id).stock_units
+            sales = db.query(models.Sale).count()
+        engine.dispose()
+
+    attempts = args.threads * args.checkouts
+    print(f"{attempts} checkouts in {elapsed:.1f}s ({attempts / elapsed:.0f}/s): {counts}")
+    print(f"Fragrance stock left: {stock_g:g} g, bottles left: {stock_units}, sales stored: {sales}")
+    checks = {
+        "no negative stock": stock_g >= 0 and stock_units >= 0,
+        "fragrance consumed matches sales": stock_g == FRAGRANCE_GRAMS * (args.stock_sales - counts["sold"]),
+        "bottles consumed match sales": stock_units == args.stock_sales * 2 - counts["sold"],
+        "only successful checkouts stored": sales == counts["sold"],
+        "stock fully sold when demand exceeds it": attempts < args.stock_sales or counts["sold"] == args.stock_sales,
+        "no unexpected errors": counts["errors"] == 0,
+    }
+    for name, passed in checks.items():
+        print(f"  [{'ok' if passed else 'FAIL'}] {name}")
+    sys.exit(0 if all(checks.values()) else 1)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""
+Shared fixtures: a fresh SQLite database per test, with the schema and migrations the
+app sets up at startup, sessions on it, and a TestClient whose requests use it.
+
+Run from the backend directory:
+    python -m pytest tests
+"""
+
+import os
+import tempfile
+
+# app.main opens DATABASE_URL when imported; keep that database out of the source tree
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(tempfile.mkdtemp(), 'perfum_crm.db')}")
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import sessionmaker
+
+from app import cache, models  # noqa: F401 - models registers every model with Base
+from app.crud import costing_crud, sales_crud
+from app.database import Base, create_db_engine, get_db, get_session_factory
+from app.migrations import run_migrations
+
+@pytest.fixture(autouse=True)
+def empty_caches():
+    # In-process caches outlive a test's database
+    cache.reset()
+    costing_crud.invalidate_cost_tables()
+    sales_crud.invalidate_recipe_price_matrix()
+    yield
+
+@pytest.fixture
+def engine(tmp_path):
+    engine = create_db_engine(f"sqlite:///{tmp_path / 'test.db'}")
+    Base.metadata.create_all(bind=engine)
+    run_migrations(engine)
+    yield engine
+    engine.dispose()
+
+@pytest.fixture
+def session_factory(engine):
+    """
+    Sessions configured like app.database.SessionLocal, on the test database.
+    """
+    return sessionmaker(autocommit=False, autoflush=False, bind=engine)
+
+@pytest.fixture
+def db(session_factory):
+    with session_factory() as session:
+        yield session
+
+@pytest.fixture
+def client(session_factory):
+    from app.main import app
+
+    def get_test_db():
+        with session_factory() as session:
+            yield session
+
+    app.dependency_overrides[get_db] = get_test_db
+    app.dependency_overrides[get_session_factory] = lambda: session_factory
+    yield TestClient(app)
+    app.dependency_overrides.clear()
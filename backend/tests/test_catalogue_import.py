@@ -0,0 +1,87 @@
+"""
+Supplier catalogue imports (app/crud/catalogue_import_crud.py): an interrupted import
+resumes after the last committed chunk, and rows that fail validation are listed on
+the job without stopping it.
+"""
+
+import pytest
+
+from app.crud import catalogue_import_crud, inventory_bulk_crud
+from app.models import inventory_model
+
+def write_catalogue(tmp_path, rows: list) -> str:
+    path = tmp_path / "catalogue.csv"
+    path.write_text("internal_name,house,cost_per_g,stock_g\n" + "".join(f"{row}\n" for row in rows), encoding="utf-8")
+    return str(path)
+
+def fragrances(db) -> dict:
+    return {fragrance.internal_name: fragrance for fragrance in db.query(inventory_model.Fragrance)}
+
+def test_interrupted_import_resumes_after_the_last_chunk(db, tmp_path, monkeypatch):
+    path = write_catalogue(tmp_path, [f"F{n},House,{n + 1},10" for n in range(10)])
+    upsert_rows = inventory_bulk_crud.upsert_rows
+    chunks, interrupt = [], {"at_chunk": 3}
+
+    def recording_upsert_rows(db, kind, rows, first_row):
+        chunks.append([row["internal_name"] for row in rows])
+        if len(chunks) == interrupt["at_chunk"]:
+            raise RuntimeError("disk full")
+        return upsert_rows(db, kind, rows, first_row)
+
+    monkeypatch.setattr(inventory_bulk_crud, "upsert_rows", recording_upsert_rows)
+    job = catalogue_import_crud.import_catalogue(db, "fragrance", path, chunk_size=3, filename="catalogue.csv")
+    assert (job.status, job.error, job.rows_processed, job.created_count) == ("failed", "disk full", 6, 6)
+    assert sorted(fragrances(db)) == [f"F{n}" for n in range(6)]
+
+    chunks.clear()
+    interrupt["at_chunk"] = None
+    resumed = catalogue_import_crud.import_catalogue(db, "fragrance", path, chunk_size=3)
+    assert resumed.id == job.id
+    assert chunks == [["F6", "F7", "F8"], ["F9"]]  # Not the committed rows again
+    assert (resumed.status, resumed.error, resumed.rows_processed, resumed.created_count) == ("completed", None, 10, 10)
+    assert fragrances(db)["F9"].cost_per_g == 10
+
+    # A completed file imported again is a new job that updates every item
+    again = catalogue_import_crud.import_catalogue(db, "fragrance", path, chunk_size=4)
+    assert again.id != job.id
+    assert (again.created_count, again.updated_count) == (0, 10)
+
+def test_rejected_rows_are_listed_in_file_order(db, tmp_path):
+    path = write_catalogue(tmp_path, [
+        "F1,House,1,10",
+        "F2,House,cheap,10",  # Row 2: cost is not a number
+        ",House,1,10",  # Row 3: no internal_name
+        "F4,House,1,10",
+        "F1,Other,2,5",  # Row 5: F1 again in the same chunk
+        "F1,Later,3,5",  # Row 6: F1 again in the next chunk, which updates it
+    ])
+    job = catalogue_import_crud.import_catalogue(db, "fragrance", path, chunk_size=5)
+    assert (job.status, job.rows_processed, job.created_count, job.updated_count, job.rejected_count) == ("completed", 6, 2, 1, 3)
+    assert fragrances(db)["F1"].house == "Later"
+
+    rejected = catalogue_import_crud.get_rejected_rows(db, job.id)
+    assert [(row.row_number, row.key) for row in rejected] == [(2, "F2"), (3, None), (5, "F1")]
+    assert "cost_per_g" in rejected[0].error
+    assert "internal_name" in rejected[1].error
+    assert rejected[2].error == "Duplicate internal_name 'F1' (first in row 1)"
+
+    page = catalogue_import_crud.get_rejected_rows(db, job.id, limit=2)
+    rest = catalogue_import_crud.get_rejected_rows(db, job.id, cursor=[page[-1].id])
+    assert [row.row_number for row in page + rest] == [2, 3, 5]
+
+def test_rejected_rows_endpoint(client, tmp_path):
+    body = "name,capacity_ml,cost_per_unit\nB30,30,1.5\nB50,fifty,2\n"
+    job = client.post("/inventory/imports/", params={"kind": "bottle", "filename": "bottles.csv"},
+                      content=body, headers={"Content-Type": "text/csv"})
+    assert job.status_code == 201
+    assert (job.json()["created_count"], job.json()["rejected_count"]) == (1, 1)
+    rows = client.get(f"/inventory/imports/{job.json()['id']}/rejected-rows/").json()
+    assert [(row["row_number"], row["key"]) for row in rows] == [(2, "B50")]
+    assert client.get("/inventory/imports/999").status_code == 404
+
+def test_unknown_kind_and_chunk_size_are_rejected(db, tmp_path):
+    path = write_catalogue(tmp_path, [])
+    with pytest.raises(ValueError, match="Unknown catalogue kind"):
+        catalogue_import_crud.import_catalogue(db, "alcohol", path)
+    with pytest.raises(ValueError, match="chunk_size"):
+        catalogue_import_crud.import_catalogue(db, "fragrance", path, chunk_size=0)
@@ -0,0 +1,154 @@
+"""
+The recipe cost engine (app/crud/costing_crud.py) and alcohol batch costing
+(app/crud/alcohol_costing_crud.py): costs worked out by hand against what the engine
+computes, stamps on sale lines, and FIFO against average consumption.
+"""
+
+from datetime import datetime
+
+import pytest
+
+from app.crud import alcohol_costing_crud, costing_crud, inventory_crud, sales_crud
+from app.models import inventory_model
+from app.schemas import inventory_schema, sales_schema
+
+ALCOHOL = "Alcohol de Perfumista 96%"
+
+# A 30 ml recipe: 13 g of fragrance and 19 drops (0.95 ml), topped up with 16.05 ml of alcohol
+RECIPE = dict(
+    name="Perfume 30ml Nicho Genérico", size_ml=30, fragrance_type="nicho", bottle_type="generico",
+    fragrance_grams=13.0, fijador_drops=15, potencializador_drops=1, concentrado_drops=3,
+    base_price=20000, pheromone_addition_price=5000
+)
+ALCOHOL_ML = 30 - 13.0 - 19 / 20
+DROPS_COST = 15 * 2.0 + 1 * 3.0 + 3 * 5.0  # Fixative, enhancer and concentrate per drop
+
+def add_alcohol(db, cost: float, volume_ml: float, day: int) -> int:
+    return inventory_crud.alcohols.create(db, inventory_schema.AlcoholCreate(
+        name=ALCOHOL, purchase_date=datetime(2024, 1, day), purchase_unit_cost=cost, purchase_unit_volume_ml=volume_ml
+    )).id
+
+@pytest.fixture
+def priced(db):
+    for name, additive_type, cost in (
+        ("Fijador", "Fixative", 2.0), ("Potencializador", "Enhancer", 3.0),
+        ("Concentrado", "Concentrate", 5.0), ("Feromonas", "Pheromone", 10.0),
+    ):
+        inventory_crud.additives.create(db, inventory_schema.AdditiveCreate(
+            name=name, type=additive_type, cost_per_application_estimate=cost
+        ))
+    fragrance = inventory_crud.fragrances.create(db, inventory_schema.FragranceCreate(
+        internal_name="Priced", cost_per_g=100.0, stock_g=1000
+    ))
+    bottle = inventory_crud.bottles.create(db, inventory_schema.BottleCreate(
+        name="Bottle 30ml", capacity_ml=30, cost_per_unit=500.0, stock_units=10
+    ))
+    recipe = sales_crud.create_recipe(db, sales_schema.RecipeCreate(**RECIPE))
+    return {"fragrance_id": fragrance.id, "bottle_id": bottle.id, "recipe_id": recipe.id}
+
+def sell(db, priced: dict, quantity: int = 1, **extras):
+    return sales_crud.create_sale(db, sales_schema.SaleCreateSimple(sale_items=[
+        sales_schema.SaleItemSimple(
+            product_type="perfume", item_name="Perfume", unit_price=0, size_ml=30, fragrance_type="nicho",
+            quantity=quantity, fragrance_id=priced["fragrance_id"], bottle_id=priced["bottle_id"], **extras
+        ),
+    ]))
+
+def test_cost_tables_price_perfume_lines():
+    tables = costing_crud.CostTables(
+        recipes=[(1, 30, 13.0, 15, 1, 3)],
+        fragrances=[(1, 100.0), (2, 200.0)],
+        bottles=[(1, 500.0)],
+        drop_costs={"fijador_drops": 2.0, "potencializador_drops": 3.0, "concentrado_drops": 5.0},
+        pheromone_cost=10.0,
+        alcohol_cost_per_ml=2.0,
+        unit_costs={},
+    )
+    base = DROPS_COST + ALCOHOL_ML * 2.0
+    costs = tables.perfume_unit_costs(
+        recipe_ids=[1, 1, 1, None],
+        fragrance_ids=[1, 2, None, 1],
+        bottle_ids=[1, None, 1, 1],
+        extra_grams=[0.0, 2.0, 0.0, 5.0],
+        has_pheromones=[False, True, False, False],
+    )
+    assert costs.tolist() == pytest.approx([
+        base + 13 * 100.0 + 500.0,
+        base + 15 * 200.0 + 10.0,  # No bottle costs nothing
+        base + 13 * 150.0 + 500.0,  # Unknown fragrance: the average fragrance
+        5 * 100.0 + 500.0,  # No recipe: only what the line adds
+    ])
+
+def test_recipe_estimated_cost(db, priced):
+    add_alcohol(db, cost=1000, volume_ml=1000, day=1)  # 1 per ml
+    recipe = sales_crud.get_recipe(db, priced["recipe_id"])
+    expected = round(DROPS_COST + ALCOHOL_ML * 1.0 + 13 * 100.0, 2)
+    assert costing_crud.recipe_estimated_cost(db, recipe) == expected
+
+def test_sale_line_is_stamped_with_its_cost_and_margin(db, priced):
+    add_alcohol(db, cost=1000, volume_ml=1000, day=1)  # 1 per ml
+    sale = sell(db, priced, quantity=2, has_pheromones=True, extra_fragrance_grams=1)
+    item = sale.sale_items[0]
+
+    unit_cost = 13 * 100.0 + 1 * 100.0 + DROPS_COST + ALCOHOL_ML * 1.0 + 10.0 + 500.0
+    unit_price = 20000 + 5000 + 1 * sales_crud.EXTRA_FRAGRANCE_PRICE_PER_GRAM
+    assert item.line_total == unit_price * 2
+    assert item.item_cost == round(unit_cost * 2, 2)
+    assert item.profit_margin == round(unit_price * 2 - unit_cost * 2, 2)
+
+def test_non_perfume_lines_are_stamped_at_unit_cost(db):
+    product = inventory_crud.finished_products.create(db, inventory_schema.FinishedProductCreate(
+        name="Body mist", product_type="body_mist", cost_price=1200.0, sale_price=3000.0, stock_units=5
+    ))
+    sale = sales_crud.create_sale(db, sales_schema.SaleCreateSimple(sale_items=[
+        sales_schema.SaleItemSimple(
+            product_type="finished_product", item_name="Body mist", unit_price=3000, quantity=3,
+            finished_product_id=product.id
+        ),
+    ]))
+    item = sale.sale_items[0]
+    assert (item.item_cost, item.profit_margin) == (3600.0, 5400.0)
+
+def test_recipe_is_costed_again_only_when_an_ingredient_changes(db, priced):
+    recipe_id = priced["recipe_id"]
+    cost = sales_crud.get_recipe(db, recipe_id).estimated_cost
+    inventory_crud.fragrances.update(db, priced["fragrance_id"], inventory_schema.FragranceUpdate(cost_per_g=200.0))
+
+    recipe = sales_crud.update_recipe(db, recipe_id, sales_schema.RecipeUpdate(base_price=21000))
+    assert recipe.estimated_cost == cost
+    recipe = sales_crud.update_recipe(db, recipe_id, sales_schema.RecipeUpdate(fragrance_grams=12.0))
+    assert recipe.estimated_cost == round(DROPS_COST + 12 * 200.0, 2)  # No alcohol in stock
+
+@pytest.mark.parametrize("mode, cost, left_average", [
+    # 150 ml out of 100 ml at 1 and 100 ml at 3: FIFO charges the batches taken...
+    ("fifo", 100 * 1.0 + 50 * 3.0, 3.0),
+    # ...average mode the moving average of both
+    ("average", 150 * 2.0, 2.0),
+])
+def test_consume_across_two_batches(db, monkeypatch, mode, cost, left_average):
+    monkeypatch.setattr(alcohol_costing_crud, "ALCOHOL_COSTING_MODE", mode)
+    first = add_alcohol(db, cost=100, volume_ml=100, day=1)
+    second = add_alcohol(db, cost=300, volume_ml=100, day=2)
+
+    assert alcohol_costing_crud.consume(db, ALCOHOL, 150) == pytest.approx(cost)
+    db.commit()
+    assert db.get(inventory_model.Alcohol, first).remaining_volume_ml == 0
+    assert db.get(inventory_model.Alcohol, second).remaining_volume_ml == 50
+    state = alcohol_costing_crud.get_default_state(db)
+    assert state.remaining_volume_ml == pytest.approx(50)
+    assert state.average_cost_per_ml == pytest.approx(left_average)
+    assert (state.fifo_batch_id, state.fifo_cost_per_ml) == (second, 3.0)
+
+def test_fifo_sale_spanning_two_batches_is_charged_what_it_took(db, priced, monkeypatch):
+    monkeypatch.setattr(alcohol_costing_crud, "ALCOHOL_COSTING_MODE", "fifo")
+    add_alcohol(db, cost=20, volume_ml=20, day=1)  # 20 ml at 1
+    add_alcohol(db, cost=300, volume_ml=100, day=2)  # At 3
+    sale = sell(db, priced, quantity=2)
+    item = sale.sale_items[0]
+
+    # Stamped with the first batch's cost, then charged the 12.1 ml taken from the second
+    alcohol_cost = 20 * 1.0 + (2 * ALCOHOL_ML - 20) * 3.0
+    assert item.item_cost == round(2 * (13 * 100.0 + DROPS_COST + 500.0) + alcohol_cost, 2)
+    assert item.profit_margin == round(item.line_total - item.item_cost, 2)
+    # The next sale is costed at the second batch
+    assert costing_crud.get_cost_tables(db).alcohol_cost_per_ml == 3.0
@@ -0,0 +1,96 @@
+"""
+Bulk upserts (app/crud/inventory_bulk_crud.py): existing items only get the fields
+their row sent, rows sending the same fields share one statement, and every stock
+change is written to the ledger.
+"""
+
+import pytest
+from sqlalchemy import event
+
+from app.crud import inventory_bulk_crud
+from app.models import inventory_model
+
+@pytest.fixture
+def upserts(engine):
+    """
+    The INSERT ... ON CONFLICT statements run while the test uses it.
+    """
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        if "ON CONFLICT" in statement:
+            statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", record)
+    yield statements
+    event.remove(engine, "before_cursor_execute", record)
+
+def fragrances(db) -> dict:
+    db.expire_all()
+    return {fragrance.internal_name: fragrance for fragrance in db.query(inventory_model.Fragrance)}
+
+def movements(db) -> list:
+    return [
+        (movement.item_id, movement.quantity, movement.notes)
+        for movement in db.query(inventory_model.InventoryMovement).order_by(inventory_model.InventoryMovement.id)
+    ]
+
+def test_existing_items_only_get_the_fields_sent(db, upserts):
+    inventory_bulk_crud.bulk_upsert(db, "fragrance", [
+        {"internal_name": f"F{n}", "house": "House", "cost_per_g": 1, "stock_g": 100} for n in range(4)
+    ])
+    upserts.clear()
+
+    summary = inventory_bulk_crud.bulk_upsert(db, "fragrance", [
+        {"internal_name": "F0", "cost_per_g": 2},
+        {"internal_name": "F1", "cost_per_g": 3, "house": "Other"},
+        {"internal_name": "F2", "house": "Third", "cost_per_g": 4},
+        {"internal_name": "F3", "cost_per_g": 5},
+        {"internal_name": "F4", "cost_per_g": 6},
+    ])
+    assert (summary["created"], summary["updated"], summary["errors"]) == (1, 4, 0)
+    # {cost_per_g} and {cost_per_g, house}, whatever order the keys came in
+    assert len(upserts) == 2
+
+    items = fragrances(db)
+    assert [(items[name].cost_per_g, items[name].house, items[name].stock_g) for name in sorted(items)] == [
+        (2, "House", 100), (3, "Other", 100), (4, "Third", 100), (5, "House", 100), (6, None, 0),
+    ]
+
+def test_stock_changes_are_written_to_the_ledger(db):
+    first = inventory_bulk_crud.bulk_upsert(db, "fragrance", [
+        {"internal_name": "F0", "cost_per_g": 1, "stock_g": 100},
+        {"internal_name": "F1", "cost_per_g": 1},
+    ])
+    ids = [result["id"] for result in first["results"]]
+    assert movements(db) == [(ids[0], 100, "Opening stock")]  # Nothing for a new item with no stock
+
+    inventory_bulk_crud.bulk_upsert(db, "fragrance", [
+        {"internal_name": "F0", "cost_per_g": 2, "stock_g": 60},
+        {"internal_name": "F1", "cost_per_g": 2, "stock_g": 25},
+    ])
+    inventory_bulk_crud.bulk_upsert(db, "fragrance", [
+        {"internal_name": "F0", "cost_per_g": 3},  # Stock not sent: unchanged, no movement
+        {"internal_name": "F1", "cost_per_g": 3, "stock_g": 25},  # Same stock: no movement
+    ])
+    assert movements(db) == [
+        (ids[0], 100, "Opening stock"), (ids[0], -40, "Bulk import"), (ids[1], 25, "Bulk import"),
+    ]
+    items = fragrances(db)
+    assert (items["F0"].stock_g, items["F1"].stock_g) == (60, 25)
+
+def test_invalid_rows_are_reported_not_written(db):
+    summary = inventory_bulk_crud.bulk_upsert(db, "bottle", [
+        {"name": "B30", "capacity_ml": 30, "cost_per_unit": 1.5, "stock_units": 10},
+        {"name": "B50", "capacity_ml": "fifty", "cost_per_unit": 2},
+        {"name": "B30", "capacity_ml": 30, "cost_per_unit": 1.6},
+        "not an object",
+    ])
+    assert [result["status"] for result in summary["results"]] == ["created", "error", "error", "error"]
+    assert summary["results"][2]["error"] == "Duplicate name 'B30' (first in row 0)"
+    assert db.query(inventory_model.Bottle).count() == 1
+    assert movements(db) == [(summary["results"][0]["id"], 10, "Opening stock")]
+
+def test_too_many_rows_are_refused(db):
+    with pytest.raises(ValueError, match="At most"):
+        inventory_bulk_crud.bulk_upsert(db, "bottle", [{}] * (inventory_bulk_crud.MAX_BULK_ROWS + 1))
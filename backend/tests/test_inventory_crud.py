@@ -0,0 +1,33 @@
+"""
+The per-resource functions of app/crud/inventory_crud.py over the repositories.
+"""
+
+import pytest
+
+from app.crud import inventory_crud
+from app.pagination import decode_cursor
+from app.repository import DuplicateNameError
+from app.schemas import inventory_schema
+
+def test_fragrance_functions_round_trip(db):
+    created = inventory_crud.create_fragrance(db, inventory_schema.FragranceCreate(internal_name="Rose", cost_per_g=2.0))
+    assert inventory_crud.get_fragrance(db, created.id).internal_name == "Rose"
+    assert inventory_crud.get_fragrance_by_internal_name(db, "Rose").id == created.id
+    with pytest.raises(DuplicateNameError):
+        inventory_crud.create_fragrance(db, inventory_schema.FragranceCreate(internal_name="Rose", cost_per_g=1.0))
+
+    updated = inventory_crud.update_fragrance(db, created.id, inventory_schema.FragranceUpdate(stock_g=50))
+    assert (updated.stock_g, updated.cost_per_g) == (50, 2.0)
+    assert inventory_crud.delete_fragrance(db, created.id).id == created.id
+    assert inventory_crud.get_fragrance(db, created.id) is None
+    assert inventory_crud.update_fragrance(db, created.id, inventory_schema.FragranceUpdate(stock_g=1)) is None
+
+def test_filtered_lists(db):
+    for name, additive_type in (("Fijador A", "Fixative"), ("Feromonas", "Pheromone"), ("Fijador B", "Fixative")):
+        inventory_crud.create_additive(db, inventory_schema.AdditiveCreate(name=name, type=additive_type))
+    assert [additive.name for additive in inventory_crud.get_additives(db, additive_type="Fixative")] == ["Fijador A", "Fijador B"]
+    assert len(inventory_crud.get_additives(db)) == 3
+
+    page = inventory_crud.get_additives(db, limit=2)
+    cursor = decode_cursor(inventory_crud.ADDITIVE_KEYSET.next_cursor(page, 2))
+    assert [additive.name for additive in inventory_crud.get_additives(db, limit=2, cursor=cursor)] == ["Fijador B"]
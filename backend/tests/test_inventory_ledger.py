@@ -0,0 +1,114 @@
+"""
+The inventory ledger (app/crud/inventory_ledger_crud.py): balance snapshots
+and point-in-time stock from them plus later movements, checked against a plain sum
+over the ledger.
+"""
+
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy import text
+
+from app.crud import inventory_ledger_crud
+
+START = datetime(2024, 3, 1, 8, 0)
+ITEMS = [("fragrance", 1), ("fragrance", 2), ("bottle", 1)]
+
+def stored(at: datetime) -> str:
+    # The format SQLite's CURRENT_TIMESTAMP writes, as the server defaults do
+    return at.strftime("%Y-%m-%d %H:%M:%S")
+
+def record(db, ledger: list, item: tuple, quantity: float, at: datetime) -> None:
+    inventory_ledger_crud.record_movements(db, [
+        {"item_type": item[0], "item_id": item[1], "movement_type": "adjustment", "quantity": quantity}
+    ])
+    db.execute(text("UPDATE inventory_movements SET created_at = :at WHERE id = (SELECT max(id) FROM inventory_movements)"),
+               {"at": stored(at)})
+    db.commit()
+    ledger.append((item, quantity, at))
+
+def snapshot(db, at: datetime) -> int:
+    count = inventory_ledger_crud.take_balance_snapshots(db)
+    db.execute(text("UPDATE inventory_balance_snapshots SET taken_at = :at WHERE taken_at > :at"), {"at": stored(at)})
+    db.commit()
+    return count
+
+def ledger_sum(ledger: list, item: tuple, at: datetime) -> float:
+    return sum(quantity for moved, quantity, moved_at in ledger if moved == item and moved_at <= at)
+
+def build_ledger(db, snapshot_hours=()) -> list:
+    """
+    Two days of hourly movements over three items, with balance snapshots taken half
+    an hour after each of `snapshot_hours`.
+    """
+    entries = []
+    for hour in range(48):
+        item = ITEMS[hour % len(ITEMS)]
+        record(db, entries, item, quantity=(hour % 7) - 2.5, at=START + timedelta(hours=hour))
+        if hour in snapshot_hours:
+            snapshot(db, START + timedelta(hours=hour, minutes=30))
+    return entries
+
+# Before the first movement, on movements and between them, and after the last one
+PROBES = [START - timedelta(hours=1)] + [
+    START + timedelta(hours=hour, minutes=minutes) for hour in range(0, 49, 5) for minutes in (0, 30)
+]
+
+def assert_matches_ledger(db, entries: list, probes: list) -> None:
+    for item in ITEMS:
+        for at in probes:
+            stock = inventory_ledger_crud.get_stock_at(db, item_type=item[0], item_id=item[1], at=at)
+            assert stock["balance"] == pytest.approx(ledger_sum(entries, item, at)), (item, at)
+
+def test_stock_at_without_snapshots_matches_the_ledger(db):
+    entries = build_ledger(db)
+    assert_matches_ledger(db, entries, PROBES)
+
+def test_stock_at_with_snapshots_matches_the_ledger(db):
+    entries = build_ledger(db, snapshot_hours=(11, 23, 47))
+    assert_matches_ledger(db, entries, PROBES)
+    stock = inventory_ledger_crud.get_stock_at(db, item_type="fragrance", item_id=1, at=START + timedelta(hours=30))
+    assert stock["snapshot_id"] is not None
+    assert stock["movements_applied"] == 3  # Hours 24, 27 and 30, not the whole history
+
+def test_aware_times_are_compared_in_utc(db):
+    entries = build_ledger(db)
+    bogota = timezone(timedelta(hours=-5))
+    naive_utc = START + timedelta(hours=10)
+    aware = naive_utc.replace(tzinfo=timezone.utc).astimezone(bogota)
+    for item in ITEMS:
+        stock = inventory_ledger_crud.get_stock_at(db, item_type=item[0], item_id=item[1], at=aware)
+        assert stock["balance"] == pytest.approx(ledger_sum(entries, item, naive_utc))
+
+def latest_snapshots(db) -> dict:
+    rows = db.execute(text(
+        "SELECT item_type, item_id, balance, last_movement_id FROM inventory_balance_snapshots ORDER BY id"
+    )).all()
+    return {(item_type, item_id): (balance, last_movement_id) for item_type, item_id, balance, last_movement_id in rows}
+
+def last_movement_id(db, item: tuple) -> int:
+    return db.execute(text("SELECT max(id) FROM inventory_movements WHERE item_type = :type AND item_id = :id"),
+                      {"type": item[0], "id": item[1]}).scalar()
+
+def test_snapshots_carry_the_ledger_balance_of_moved_items(db):
+    entries = []
+    for hour in range(9):
+        record(db, entries, ITEMS[hour % len(ITEMS)], quantity=hour - 3, at=START + timedelta(hours=hour))
+    assert inventory_ledger_crud.take_balance_snapshots(db) == 3
+    end = START + timedelta(hours=9)
+    assert latest_snapshots(db) == {item: (ledger_sum(entries, item, end), last_movement_id(db, item)) for item in ITEMS}
+
+    # Nothing moved since: nothing to write
+    assert inventory_ledger_crud.take_balance_snapshots(db) == 0
+
+    # Only the item that moved gets a new snapshot, built on its previous one
+    record(db, entries, ITEMS[1], quantity=7.5, at=end)
+    assert inventory_ledger_crud.take_balance_snapshots(db) == 1
+    assert db.execute(text("SELECT count(*) FROM inventory_balance_snapshots")).scalar() == 4
+    assert latest_snapshots(db)[ITEMS[1]] == (ledger_sum(entries, ITEMS[1], end), last_movement_id(db, ITEMS[1]))
+
+def test_writing_snapshots_leaves_the_commit_to_the_caller(db):
+    record(db, [], ITEMS[0], quantity=5, at=START)
+    assert inventory_ledger_crud.write_balance_snapshots(db) == 1
+    db.rollback()
+    assert latest_snapshots(db) == {}
@@ -0,0 +1,43 @@
+"""
+The item endpoints every inventory resource has (app/routers/inventory_router.py),
+through one resource.
+"""
+
+def create_bottle(client, name: str) -> dict:
+    response = client.post("/inventory/bottles/", json={"name": name, "capacity_ml": 30, "cost_per_unit": 1.5})
+    assert response.status_code == 201
+    return response.json()
+
+def test_single_item_endpoints(client):
+    bottle = create_bottle(client, "B30")
+    duplicate = client.post("/inventory/bottles/", json={"name": "B30", "capacity_ml": 50, "cost_per_unit": 2})
+    assert duplicate.status_code == 400
+    assert duplicate.json()["detail"] == "Bottle with name 'B30' already exists."
+
+    url = f"/inventory/bottles/{bottle['id']}"
+    assert client.get(url).json()["name"] == "B30"
+    assert client.put(url, json={"stock_units": 12}).json()["stock_units"] == 12
+    assert client.delete(url).json()["id"] == bottle["id"]
+    assert client.get(url).json()["detail"] == f"Bottle with ID {bottle['id']} not found"
+    assert client.put(url, json={"stock_units": 1}).json()["detail"] == f"Bottle with ID {bottle['id']} not found for update"
+    assert client.delete(url).status_code == 404
+
+def test_batch_endpoints(client):
+    ids = [create_bottle(client, f"B{n}")["id"] for n in range(3)]
+
+    batch = client.get("/inventory/bottles/", params={"ids": f"{ids[2]},999,{ids[0]}"}).json()
+    assert [item and item["name"] for item in batch] == ["B2", None, "B0"]
+
+    updated = client.patch("/inventory/bottles/", json={"ids": [ids[1], 999, ids[0]], "values": {"color": "Amber"}})
+    assert [item["id"] for item in updated.json()] == [ids[1], ids[0]]
+    renamed = client.patch("/inventory/bottles/", json={"ids": [ids[1]], "values": {"name": "B0"}})
+    assert renamed.json()["detail"] == "Another bottle with name 'B0' already exists."
+
+    columns = client.get("/inventory/bottles/columns/", params={"fields": ["name", "color"], "limit": 2})
+    assert columns.json() == [{"id": ids[0], "name": "B0", "color": "Amber"}, {"id": ids[1], "name": "B1", "color": "Amber"}]
+    assert "X-Next-Cursor" in columns.headers
+    assert client.get("/inventory/bottles/columns/", params={"fields": "nope"}).status_code == 400
+
+    deleted = client.delete("/inventory/bottles/", params={"ids": f"{ids[0]},999"})
+    assert [item["id"] for item in deleted.json()] == [ids[0]]
+    assert client.delete("/inventory/bottles/", params={"ids": ""}).status_code == 400
@@ -0,0 +1,79 @@
+"""
+The migration runner (app/migrations.py): each migration commits together with its
+version bump or not at all, and only optional steps are skipped.
+"""
+
+import logging
+import sqlite3
+
+import pytest
+from sqlalchemy import func, inspect, select, text
+from sqlalchemy.exc import OperationalError
+
+from app import migrations
+from app.crud import sales_crud
+from app.models import sales_model
+
+LATEST = migrations.MIGRATIONS[-1][0]
+
+def schema_version(engine) -> int:
+    with engine.connect() as connection:
+        return connection.execute(text("PRAGMA user_version")).scalar()
+
+def add_migration(monkeypatch, migration) -> None:
+    monkeypatch.setattr(migrations, "MIGRATIONS", migrations.MIGRATIONS + [(LATEST + 1, "Test migration", migration)])
+
+def test_fresh_database_is_at_the_latest_version(engine):
+    assert schema_version(engine) == LATEST
+    assert migrations.run_migrations(engine) == LATEST
+
+def test_failed_migration_leaves_no_changes_and_no_version(engine, db, monkeypatch):
+    db.add(sales_model.Sale(payment_method="Efectivo", subtotal=100, total_amount=100))
+    db.commit()
+
+    def failing(session):
+        session.execute(text("CREATE INDEX ix_sales_notes ON sales (notes)"))
+        session.execute(text("ALTER TABLE sales ADD COLUMN channel VARCHAR"))
+        sales_crud.rebuild_sales_rollups(session)
+        raise RuntimeError("halfway")
+
+    add_migration(monkeypatch, failing)
+    with pytest.raises(RuntimeError):
+        migrations.run_migrations(engine)
+
+    assert schema_version(engine) == LATEST
+    columns = inspect(engine)
+    assert "ix_sales_notes" not in {index["name"] for index in columns.get_indexes("sales")}
+    assert "channel" not in {column["name"] for column in columns.get_columns("sales")}
+    db.expire_all()
+    assert db.scalar(select(func.count()).select_from(sales_model.SalesRollup)) == 0
+
+def test_skipped_optional_migration_bumps_the_version_without_its_changes(engine, monkeypatch, caplog):
+    def optional(session):
+        session.execute(text("CREATE TABLE half_done (id INTEGER)"))
+        raise migrations.MigrationSkipped("Not available here")
+
+    add_migration(monkeypatch, optional)
+    with caplog.at_level(logging.WARNING, logger=migrations.logger.name):
+        assert migrations.run_migrations(engine) == LATEST + 1
+
+    assert schema_version(engine) == LATEST + 1
+    assert "half_done" not in inspect(engine).get_table_names()
+    assert f"Skipped optional migration {LATEST + 1} (Test migration): Not available here" in caplog.text
+
+class FailingSession:
+    """
+    Stands in for a session on a SQLite that rejects the first statement with `message`.
+    """
+
+    def __init__(self, message: str):
+        self.message = message
+
+    def execute(self, statement):
+        raise OperationalError(str(statement), {}, sqlite3.OperationalError(self.message))
+
+def test_customer_search_index_is_skipped_only_without_fts5():
+    with pytest.raises(migrations.MigrationSkipped, match="FTS5"):
+        migrations._add_customer_search_index(FailingSession("no such module: fts5"))
+    with pytest.raises(OperationalError):
+        migrations._add_customer_search_index(FailingSession("database is locked"))
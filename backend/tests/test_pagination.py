@@ -0,0 +1,107 @@
+"""
+Keyset pagination (app/pagination.py) through the list endpoints: walking every page
+with X-Next-Cursor returns each row once in list order, also across rows that share a
+sort value, and a cursor that was tampered with is answered with a 400.
+"""
+
+import base64
+import json
+
+import pytest
+from sqlalchemy import text
+
+from app.pagination import NEXT_CURSOR_HEADER, encode_cursor
+
+ALCOHOLS = "/inventory/alcohols/"
+
+def add_alcohols(db, purchase_dates: list) -> None:
+    # Raw inserts, as imports and CURRENT_TIMESTAMP defaults write dates: whole seconds
+    # without microseconds, next to rows written by SQLAlchemy with them
+    for n, purchase_date in enumerate(purchase_dates):
+        db.execute(text(
+            "INSERT INTO alcohols (name, purchase_date, purchase_unit_cost, purchase_unit_volume_ml, cost_per_ml, remaining_volume_ml) "
+            "VALUES (:name, :purchase_date, 100, 1000, 0.1, 1000)"
+        ), {"name": f"A{n}", "purchase_date": purchase_date})
+    db.commit()
+
+def walk(client, url: str, limit: int) -> list:
+    ids, cursor, pages = [], None, 0
+    while True:
+        response = client.get(url, params={"limit": limit, **({"cursor": cursor} if cursor else {})})
+        assert response.status_code == 200
+        ids += [item["id"] for item in response.json()]
+        pages += 1
+        cursor = response.headers.get(NEXT_CURSOR_HEADER)
+        if cursor is None:
+            return ids
+        assert pages < 100
+
+def list_order(client, url: str) -> list:
+    return [item["id"] for item in client.get(url, params={"limit": 1000}).json()]
+
+def test_pages_across_equal_sort_values(client, db):
+    # Eleven batches bought in the same second, then one earlier and one later
+    add_alcohols(db, ["2024-05-01 10:00:00"] * 11 + ["2024-04-01 09:00:00", "2024-06-01 12:00:00"])
+    expected = list_order(client, ALCOHOLS)
+    assert len(expected) == 13
+    for limit in (1, 2, 3, 5, 13):
+        assert walk(client, ALCOHOLS, limit) == expected
+
+def test_pages_across_datetime_values(client, db):
+    # Whole seconds stored with and without microseconds, and sub-second times
+    add_alcohols(db, [
+        "2024-05-01 10:00:00", "2024-05-01 10:00:00.000000", "2024-05-01 10:00:00.250000",
+        "2024-05-01 09:59:59.999999", "2024-05-01 10:00:01", "2024-05-01 10:00:00",
+    ])
+    client.post(ALCOHOLS, json={
+        "name": "B", "purchase_date": "2024-05-01T10:00:00", "purchase_unit_cost": 100, "purchase_unit_volume_ml": 1000
+    })
+    expected = list_order(client, ALCOHOLS)
+    assert len(expected) == 7
+    for limit in (1, 2, 3):
+        assert walk(client, ALCOHOLS, limit) == expected
+
+def test_deleted_cursor_row_skips_nothing(client, db):
+    add_alcohols(db, ["2024-05-01 10:00:00", "2024-05-01 10:00:00.000000"] * 3)
+    expected = list_order(client, ALCOHOLS)
+    for limit in (1, 2, 4):
+        first = client.get(ALCOHOLS, params={"limit": limit})
+        last_id = first.json()[-1]["id"]
+        db.execute(text("DELETE FROM alcohols WHERE id = :id"), {"id": last_id})
+        db.commit()
+        rest = client.get(ALCOHOLS, params={"limit": 1000, "cursor": first.headers[NEXT_CURSOR_HEADER]}).json()
+        seen = [item["id"] for item in first.json()] + [item["id"] for item in rest]
+        assert set(expected) - {last_id} <= set(seen)
+        expected.remove(last_id)
+
+def test_fragrance_pages_by_id(client):
+    for n in range(7):
+        client.post("/inventory/fragrances/", json={"internal_name": f"F{n}", "cost_per_g": 1})
+    assert walk(client, "/inventory/fragrances/", 3) == list_order(client, "/inventory/fragrances/")
+
+def raw_cursor(payload: str) -> str:
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+@pytest.mark.parametrize("cursor", [
+    "not base64!",
+    raw_cursor("not json"),
+    raw_cursor('{"id": 1}'),  # Not a list
+    encode_cursor([5]),  # Too short for (purchase_date, id)
+    encode_cursor(["2024-05-01T10:00:00", 5, 1]),  # Too long
+    encode_cursor(["yesterday", 5]),  # Not a datetime
+    encode_cursor(["2024-05-01T10:00:00", "5"]),  # A string for the id
+    encode_cursor(["2024-05-01T10:00:00", 5.5]),
+    encode_cursor([None, 5]),
+    encode_cursor([True, 5]),
+])
+def test_tampered_cursor_is_a_400(client, cursor):
+    response = client.get(ALCOHOLS, params={"cursor": cursor})
+    assert response.status_code == 400
+    assert "cursor" in response.json()["detail"].lower()
+
+def test_cursor_from_another_list_is_a_400(client, db):
+    add_alcohols(db, ["2024-05-01 10:00:00"] * 3)
+    cursor = client.get(ALCOHOLS, params={"limit": 1}).headers[NEXT_CURSOR_HEADER]
+    assert json.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))[1] > 0
+    assert client.get("/inventory/fragrances/", params={"cursor": cursor}).status_code == 400
+    assert client.get("/sales/sales/", params={"cursor": cursor}).status_code == 400
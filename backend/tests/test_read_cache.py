@@ -0,0 +1,121 @@
+"""
+The read cache in front of the inventory repositories (app/cache.py): hits and misses,
+LRU eviction, the TTL, and invalidation by writes from this process and from another
+connection, which stands in for another worker process.
+"""
+
+import sqlite3
+
+import pytest
+from sqlalchemy import event, select
+
+from app import cache, metrics
+from app.crud import inventory_crud
+from app.models import inventory_model
+from app.schemas import inventory_schema
+
+fragrances = inventory_crud.fragrances
+
+@pytest.fixture
+def statements(engine):
+    executed = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+
+    event.listen(engine, "before_cursor_execute", count)
+    yield executed
+    event.remove(engine, "before_cursor_execute", count)
+
+@pytest.fixture
+def fragrance_ids(db):
+    return [
+        fragrances.create(db, inventory_schema.FragranceCreate(internal_name=f"F{n}", cost_per_g=1, stock_g=100)).id
+        for n in range(3)
+    ]
+
+def cache_counts() -> tuple:
+    requests = metrics.CACHE_REQUESTS.totals()
+    return (
+        requests.get(("fragrances", "hit"), 0),
+        requests.get(("fragrances", "miss"), 0),
+        metrics.CACHE_EVICTIONS.totals().get(("fragrances",), 0),
+    )
+
+def other_process_update(engine, fragrance_id: int, stock_g: float) -> None:
+    # A plain sqlite3 connection, as another worker would write
+    connection = sqlite3.connect(engine.url.database)
+    with connection:
+        connection.execute("UPDATE fragrances SET stock_g = ? WHERE id = ?", (stock_g, fragrance_id))
+    connection.close()
+
+def test_second_read_is_a_hit(db, fragrance_ids, statements):
+    hits, misses, _ = cache_counts()
+    first = fragrances.get(db, fragrance_ids[0])
+    statements.clear()
+    db.expunge_all()
+    second = fragrances.get(db, fragrance_ids[0])
+    assert statements == []
+    assert second is not first and second.stock_g == 100
+    assert cache_counts()[:2] == (hits + 1, misses + 1)
+
+def test_batch_read_loads_only_the_misses(db, fragrance_ids, statements):
+    fragrances.get(db, fragrance_ids[0])
+    statements.clear()
+    items = fragrances.get_many(db, [fragrance_ids[1], fragrance_ids[0], 999])
+    assert [item and item.id for item in items] == [fragrance_ids[1], fragrance_ids[0], None]
+    assert len(statements) == 1
+    assert len(fragrances.cache) == 2
+
+def test_least_recently_used_is_evicted(db, fragrance_ids, monkeypatch):
+    monkeypatch.setattr(fragrances.cache, "size", 2)
+    first, second, third = fragrance_ids
+    evictions = cache_counts()[2]
+    fragrances.get(db, first)
+    fragrances.get(db, second)
+    fragrances.get(db, first)  # Now the most recently used
+    fragrances.get(db, third)
+    assert len(fragrances.cache) == 2
+    assert cache_counts()[2] == evictions + 1
+    hits = cache_counts()[0]
+    fragrances.get_many(db, [first, third])
+    assert cache_counts()[0] == hits + 2
+
+def test_expired_rows_are_read_again(db, fragrance_ids, statements, monkeypatch):
+    monkeypatch.setattr(fragrances.cache, "ttl_s", 0)
+    fragrances.get(db, fragrance_ids[0])
+    statements.clear()
+    fragrances.get(db, fragrance_ids[0])
+    assert len(statements) == 1
+
+def test_repository_writes_invalidate_at_once(db, fragrance_ids):
+    fragrances.get(db, fragrance_ids[0])
+    fragrances.update(db, fragrance_ids[0], inventory_schema.FragranceUpdate(stock_g=40))
+    db.expunge_all()
+    assert fragrances.get(db, fragrance_ids[0]).stock_g == 40
+    fragrances.delete(db, fragrance_ids[0])
+    assert fragrances.get(db, fragrance_ids[0]) is None
+
+def test_write_from_another_process_is_seen_after_the_check_interval(engine, db, fragrance_ids, monkeypatch):
+    fragrances.get(db, fragrance_ids[0])
+    other_process_update(engine, fragrance_ids[0], 7)
+    db.expunge_all()
+    assert fragrances.get(db, fragrance_ids[0]).stock_g == 100  # Until the next check
+    monkeypatch.setattr(cache, "CHECK_INTERVAL_S", 0)
+    monkeypatch.setattr(cache, "_next_check", 0.0)
+    db.expunge_all()
+    assert fragrances.get(db, fragrance_ids[0]).stock_g == 7
+
+def test_rows_from_a_snapshot_older_than_the_applied_log_are_not_stored(engine, db, fragrance_ids, monkeypatch):
+    # A load that read the row, and the log position, before another process wrote it...
+    Fragrance = inventory_model.Fragrance
+    item, position = db.execute(select(Fragrance, cache.log_position()).where(Fragrance.id == fragrance_ids[0])).one()
+    other_process_update(engine, fragrance_ids[0], 7)
+    # ...and another thread of this process applying that write before the load is stored
+    monkeypatch.setattr(cache, "CHECK_INTERVAL_S", 0)
+    monkeypatch.setattr(cache, "_next_check", 0.0)
+    cache.sync(db)
+    fragrances.cache.store(fragrances.cache.generation, position, [item])
+    assert len(fragrances.cache) == 0
+    db.expunge_all()
+    assert fragrances.get(db, fragrance_ids[0]).stock_g == 7
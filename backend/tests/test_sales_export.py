@@ -0,0 +1,47 @@
+"""
+The streamed sales export (GET /sales/sales/export/): one row per sale item, read with
+the session the export opens for itself while the body streams.
+"""
+
+import csv
+import gzip
+import io
+import json
+
+import pytest
+
+@pytest.fixture
+def sales(client):
+    ids = []
+    for n in range(3):
+        response = client.post("/sales/sales/", json={"payment_method": "Efectivo", "sale_items": [
+            {"product_type": "finished_product", "item_name": f"Mist {n}", "unit_price": 1000, "quantity": 1},
+            {"product_type": "finished_product", "item_name": f"Candle {n}", "unit_price": 500, "quantity": 2},
+        ]})
+        assert response.status_code == 201
+        ids.append(response.json()["id"])
+    return ids
+
+def export(client, **params):
+    sale_date = client.get("/sales/sales/").json()[0]["sale_date"][:10]
+    return client.get("/sales/sales/export/", params={"start_date": sale_date, "end_date": sale_date, **params})
+
+def test_csv_export_has_a_row_per_item(client, sales):
+    response = export(client)
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/csv")
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert [(int(row["sale_id"]), row["item_name"]) for row in rows] == [
+        (sale_id, f"{name} {n}") for n, sale_id in enumerate(sales) for name in ("Mist", "Candle")
+    ]
+
+def test_gzipped_ndjson_export(client, sales):
+    response = export(client, format="ndjson", gzip=True)
+    assert response.headers["content-type"] == "application/gzip"
+    rows = [json.loads(line) for line in gzip.decompress(response.content).decode("utf-8").splitlines()]
+    assert len(rows) == 2 * len(sales)
+    assert sum(row["line_total"] for row in rows) == 3 * (1000 + 2 * 500)
+
+def test_export_rejects_unknown_formats(client):
+    response = client.get("/sales/sales/export/", params={"start_date": "2024-01-01", "end_date": "2024-01-01", "format": "xml"})
+    assert response.status_code == 400
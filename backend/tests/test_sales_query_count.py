@@ -0,0 +1,74 @@
+"""
+Reading sales costs a fixed number of statements, however many sales are read: one
+SELECT of the sales joined to their customers and one SELECT ... IN (...) of their
+items. Guards _query_sales_with_details against lazy loads coming back (N+1).
+
+Run from the backend directory:
+    python -m pytest tests
+"""
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from app.crud import sales_crud
+from app.database import Base
+from app.models import sales_model
+from app.schemas import sales_schema
+
+SALES_QUERIES = 2
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    Base.metadata.create_all(engine)
+    session = sessionmaker(autoflush=False, expire_on_commit=False, bind=engine)()
+    customers = [sales_model.Customer(name=f"Customer {i}") for i in range(5)]
+    for i in range(50):
+        sale = sales_model.Sale(customer=customers[i % 5] if i % 3 else None, subtotal=1000, total_amount=1000)
+        sale.sale_items = [
+            sales_model.SaleItem(product_type="individual_item", item_name=f"Item {j}", unit_price=500, line_total=500)
+            for j in range(2)
+        ]
+        session.add(sale)
+    session.commit()
+    session.expunge_all()  # Reads must load everything themselves
+    yield session
+    session.close()
+    engine.dispose()
+
+@pytest.fixture
+def statements(db):
+    """
+    The statements run on the session's engine from now on.
+    """
+    executed = []
+
+    def count(conn, cursor, statement, parameters, context, executemany):
+        executed.append(statement)
+
+    event.listen(db.get_bind(), "before_cursor_execute", count)
+    yield executed
+    event.remove(db.get_bind(), "before_cursor_execute", count)
+
+def serialize(sales):
+    # Serializing touches every attribute a response would, so lazy loads would show
+    return [sales_schema.Sale.model_validate(sale) for sale in sales]
+
+@pytest.mark.parametrize("limit", [1, 10, 50])
+def test_get_sales(db, statements, limit):
+    sales = sales_crud.get_sales(db, limit=limit)
+    serialize(sales)
+    assert len(sales) == limit
+    assert len(statements) == SALES_QUERIES
+
+def test_get_sale(db, statements):
+    serialize([sales_crud.get_sale(db, 7)])
+    assert len(statements) == SALES_QUERIES
+
+@pytest.mark.parametrize("end_date", ["2000-01-01", "2999-12-31"])
+def test_get_sales_by_date_range(db, statements, end_date):
+    sales = sales_crud.get_sales_by_date_range(db, "1999-01-01", end_date)
+    serialize(sales)
+    # With no sales there are no items to load
+    assert len(statements) == (SALES_QUERIES if sales else 1)
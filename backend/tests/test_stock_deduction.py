@@ -0,0 +1,118 @@
+"""
+Stock deduction at checkout (inventory_ledger_crud.deduct_stock through create_sale):
+concurrent checkouts of one stocked item never oversell, and rejected ones answer 409
+with the shortages and leave nothing behind.
+"""
+
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from sqlalchemy import func, select
+
+from app.crud import inventory_crud, sales_crud
+from app.models import inventory_model, sales_model
+from app.schemas import inventory_schema, sales_schema
+
+FRAGRANCE_GRAMS = 13.0
+STOCK_SALES = 20  # Sales the fragrance stock covers
+BOTTLES = 100
+
+@pytest.fixture
+def stocked(db):
+    sales_crud.create_recipe(db, sales_schema.RecipeCreate(
+        name="Perfume 30ml Nicho Genérico", size_ml=30, fragrance_type="nicho", bottle_type="generico",
+        fragrance_grams=FRAGRANCE_GRAMS, fijador_drops=15, potencializador_drops=1, concentrado_drops=3, base_price=20000
+    ))
+    fragrance = inventory_crud.fragrances.create(db, inventory_schema.FragranceCreate(
+        internal_name="Stocked", cost_per_g=1.0, stock_g=FRAGRANCE_GRAMS * STOCK_SALES
+    ))
+    bottle = inventory_crud.bottles.create(db, inventory_schema.BottleCreate(
+        name="Bottle 30ml", capacity_ml=30, cost_per_unit=1.0, stock_units=BOTTLES
+    ))
+    return {"fragrance_id": fragrance.id, "bottle_id": bottle.id}
+
+def perfume_sale(stocked: dict) -> dict:
+    return {"sale_items": [{
+        "product_type": "perfume", "item_name": "Perfume", "unit_price": 20000, "size_ml": 30,
+        "fragrance_type": "nicho", **stocked,
+    }]}
+
+def test_parallel_checkouts_never_oversell(client, db, stocked):
+    attempts = STOCK_SALES * 3
+    with ThreadPoolExecutor(8) as pool:
+        responses = list(pool.map(lambda _: client.post("/sales/sales/", json=perfume_sale(stocked)), range(attempts)))
+
+    statuses = [response.status_code for response in responses]
+    assert statuses.count(201) == STOCK_SALES
+    assert statuses.count(409) == attempts - STOCK_SALES
+    for response in responses:
+        if response.status_code == 409:
+            shortages = response.json()["detail"]["shortages"]
+            assert [(shortage["kind"], shortage["id"]) for shortage in shortages] == [("fragrance", stocked["fragrance_id"])]
+            assert shortages[0]["required"] == FRAGRANCE_GRAMS
+            assert shortages[0]["available"] < FRAGRANCE_GRAMS
+
+    fragrance = db.get(inventory_model.Fragrance, stocked["fragrance_id"])
+    bottle = db.get(inventory_model.Bottle, stocked["bottle_id"])
+    assert fragrance.stock_g == 0
+    assert bottle.stock_units == BOTTLES - STOCK_SALES
+
+def test_rejected_checkouts_leave_no_rows(client, db, stocked):
+    for _ in range(STOCK_SALES + 5):
+        client.post("/sales/sales/", json=perfume_sale(stocked))
+
+    Movement = inventory_model.InventoryMovement
+    assert db.scalar(select(func.count()).select_from(sales_model.Sale)) == STOCK_SALES
+    assert db.scalar(select(func.count()).select_from(sales_model.SaleItem)) == STOCK_SALES
+    sale_movements = db.execute(
+        select(Movement.item_type, func.count(), func.sum(Movement.quantity))
+        .where(Movement.movement_type == "sale").group_by(Movement.item_type).order_by(Movement.item_type)
+    ).all()
+    assert [tuple(row) for row in sale_movements] == [
+        ("bottle", STOCK_SALES, -STOCK_SALES),
+        ("fragrance", STOCK_SALES, -FRAGRANCE_GRAMS * STOCK_SALES),
+    ]
+    # Every ledger row of a sale points at a sale that exists
+    orphans = db.scalar(
+        select(func.count()).select_from(Movement)
+        .where(Movement.sale_id.is_not(None), Movement.sale_id.not_in(select(sales_model.Sale.id)))
+    )
+    assert orphans == 0
+
+def test_out_of_stock_error_lists_every_short_item(db, stocked):
+    sale = sales_schema.SaleCreateSimple(sale_items=[
+        sales_schema.SaleItemSimple(
+            product_type="perfume", item_name="Perfume", unit_price=20000, size_ml=30, fragrance_type="nicho",
+            quantity=STOCK_SALES + 1, **stocked
+        ),
+    ])
+    with pytest.raises(sales_crud.OutOfStockError) as raised:
+        sales_crud.create_sale(db, sale)
+    assert raised.value.shortages == [{
+        "kind": "fragrance", "id": stocked["fragrance_id"], "name": "Stocked",
+        "required": FRAGRANCE_GRAMS * (STOCK_SALES + 1), "available": FRAGRANCE_GRAMS * STOCK_SALES,
+    }]
+    db.expire_all()
+    assert db.get(inventory_model.Fragrance, stocked["fragrance_id"]).stock_g == FRAGRANCE_GRAMS * STOCK_SALES
+
+def test_perfume_without_recipe_records_what_it_takes(client, db, stocked):
+    # No 100 ml recipe: the line is priced as sent, but still uses the fragrance and bottle
+    sale = {"sale_items": [{
+        "product_type": "perfume", "item_name": "Custom 100ml", "unit_price": 50000, "size_ml": 100,
+        "fragrance_type": "nicho", "extra_fragrance_grams": 5, **stocked,
+    }]}
+    response = client.post("/sales/sales/", json=sale)
+    assert response.status_code == 201
+    item = response.json()["sale_items"][0]
+    assert item["recipe_id"] is None
+    assert (item["fragrance_id"], item["bottle_id"]) == (stocked["fragrance_id"], stocked["bottle_id"])
+
+    Movement = inventory_model.InventoryMovement
+    movements = db.execute(
+        select(Movement.item_type, Movement.item_id, Movement.quantity).where(Movement.movement_type == "sale")
+        .order_by(Movement.item_type)
+    ).all()
+    assert [tuple(row) for row in movements] == [
+        ("bottle", stocked["bottle_id"], -1),
+        ("fragrance", stocked["fragrance_id"], -5),
+    ]